@@ -20,9 +20,34 @@ def load_config(path=CONFIG_PATH):
     else:
         _normalize_legacy_format(config)
 
+    if 'cache' in config:
+        _validate_cache(config['cache'])
+
     return config
 
 
+def _validate_limit(value, name: str):
+    """rpm/tpm 한도 검증. (0이면 제한 없음)"""
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+
+
+def _validate_cache(cache: dict):
+    """응답 캐시 설정 검증. (cache.enabled, max_entries, max_bytes, ttl_seconds, path)"""
+    if not isinstance(cache, dict):
+        raise ValueError("Config key 'cache' must be a dict")
+    for key in ('max_entries', 'max_bytes'):
+        value = cache.get(key)
+        if value is not None and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+            raise ValueError(f"Config key 'cache.{key}' must be a positive integer")
+    ttl = cache.get('ttl_seconds')
+    if ttl is not None and (not isinstance(ttl, (int, float)) or isinstance(ttl, bool) or ttl <= 0):
+        raise ValueError("Config key 'cache.ttl_seconds' must be a positive number")
+    path = cache.get('path')
+    if path is not None and not isinstance(path, str):
+        raise ValueError("Config key 'cache.path' must be a string")
+
+
 def _normalize_legacy_format(config: dict):
     """기존 flat 포맷(api_key, models, rpm 최상위)을 providers 구조로 정규화."""
     required_keys = ['api_key', 'models', 'rpm', 'http_port']
@@ -41,6 +66,9 @@ def _normalize_legacy_format(config: dict):
             'rpm': config['rpm'],
         }
     }
+    if 'tpm' in config:
+        config['providers']['gemini']['tpm'] = config['tpm']
+        _validate_limit(config['tpm'], "Config key 'tpm'")
     config['all_models'] = list(config['models'])
     config['model_provider_map'] = {m: 'gemini' for m in config['models']}
 
@@ -63,6 +91,20 @@ def _normalize_providers_format(config: dict):
                 raise ValueError(f"Provider '{pname}' missing required key: {key}")
         if not isinstance(pconf['models'], list):
             raise ValueError(f"Provider '{pname}' models must be a list")
+        workers = pconf.get('workers', config.get('workers'))
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError(f"Provider '{pname}' workers must be a positive integer")
+        if 'tpm' in pconf:
+            _validate_limit(pconf['tpm'], f"Provider '{pname}' tpm")
+        model_limits = pconf.get('model_limits', {})
+        if not isinstance(model_limits, dict):
+            raise ValueError(f"Provider '{pname}' model_limits must be a dict")
+        for model, limits in model_limits.items():
+            if not isinstance(limits, dict):
+                raise ValueError(f"Provider '{pname}' model_limits['{model}'] must be a dict")
+            for key in ('rpm', 'tpm'):
+                if key in limits:
+                    _validate_limit(limits[key], f"Provider '{pname}' model_limits['{model}'].{key}")
 
         for m in pconf['models']:
             if m in model_provider_map:
@@ -2,7 +2,7 @@
 from google.genai import types
 import asyncio
 import logging
-from llm_service import LLMService
+from llm_service import LLMService, iterate_in_executor, report_usage
 
 logger = logging.getLogger("GenAIService")
 
@@ -66,12 +66,8 @@ class GenAIService(LLMService):
 
         return gemini_contents, system_instruction
 
-    async def generate_response(self, model_name: str, messages: list, options: dict = None):
-        """
-        Call Gemini API.
-        model_name: specific model to use (must be in config list ideally, or just pass through)
-        messages: list of dict {'role':..., 'content':...}
-        """
+    def _build_request(self, model_name: str, messages: list, options: dict = None):
+        """요청 옵션을 (모델, contents, config)로 변환한다. 일반/스트리밍 호출이 같이 쓴다."""
         target_model = model_name if model_name else self.default_model
 
         contents, sys_inst = self._convert_messages(messages, target_model)
@@ -88,6 +84,16 @@ class GenAIService(LLMService):
         if sys_inst:
             generate_config.system_instruction = sys_inst
 
+        return target_model, contents, generate_config
+
+    async def generate_response(self, model_name: str, messages: list, options: dict = None):
+        """
+        Call Gemini API.
+        model_name: specific model to use (must be in config list ideally, or just pass through)
+        messages: list of dict {'role':..., 'content':...}
+        """
+        target_model, contents, generate_config = self._build_request(model_name, messages, options)
+
         loop = asyncio.get_running_loop()
 
         def _call_api():
@@ -98,6 +104,25 @@ class GenAIService(LLMService):
             )
 
         response = await loop.run_in_executor(None, _call_api)
+        report_usage(getattr(response.usage_metadata, 'total_token_count', None))
 
         # Extract text
         return response.text
+
+    async def stream_response(self, model_name: str, messages: list, options: dict = None):
+        """generate_content_stream으로 받은 조각의 텍스트를 받는 즉시 내보낸다."""
+        target_model, contents, generate_config = self._build_request(model_name, messages, options)
+
+        def _open_stream():
+            return self.client.models.generate_content_stream(
+                model=target_model,
+                contents=contents,
+                config=generate_config
+            )
+
+        async for chunk in iterate_in_executor(_open_stream):
+            if chunk.usage_metadata is not None:
+                report_usage(chunk.usage_metadata.total_token_count)
+            # 마지막 조각은 사용량 메타데이터만 담고 텍스트가 없을 수 있다.
+            if chunk.text:
+                yield chunk.text
@@ -1,4 +1,76 @@
-﻿from abc import ABC, abstractmethod
+﻿import asyncio
+import threading
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, Iterable, Optional
+
+_STREAM_END = object()
+
+# 마지막 프로바이더 호출이 보고한 실제 토큰 사용량. 태스크(워커)마다 따로 유지된다.
+_last_usage: ContextVar[Optional[int]] = ContextVar("llm_last_usage", default=None)
+
+
+def report_usage(total_tokens) -> None:
+    """서비스가 응답의 usage 메타데이터(입력+출력 토큰 수)를 알린다. 값이 없으면 무시한다."""
+    if isinstance(total_tokens, int):
+        _last_usage.set(total_tokens)
+
+
+def take_usage() -> Optional[int]:
+    """현재 태스크에서 마지막으로 보고된 토큰 사용량을 꺼낸다. (꺼내면 비워진다)"""
+    used = _last_usage.get()
+    _last_usage.set(None)
+    return used
+
+
+async def iterate_in_executor(make_iterator: Callable[[], Iterable]) -> AsyncIterator:
+    """
+    동기 SDK의 스트림을 기본 executor 스레드에서 돌리며, 받는 대로 이벤트 루프 쪽으로 넘긴다.
+    소비하는 쪽이 중간에 그만두면 스레드도 다음 조각을 받은 뒤 스트림을 닫고 멈춘다.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def _put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # 이벤트 루프가 이미 닫혔으면 받을 쪽도 없다.
+            stop.set()
+
+    def _pump():
+        iterator = None
+        try:
+            iterator = make_iterator()
+            for item in iterator:
+                if stop.is_set():
+                    break
+                _put(item)
+        except BaseException as e:
+            _put(_STREAM_END, e)
+        else:
+            _put(_STREAM_END)
+        finally:
+            close = getattr(iterator, "close", None)
+            if stop.is_set() and close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+    loop.run_in_executor(None, _pump)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _STREAM_END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
 
 
 class LLMService(ABC):
@@ -9,6 +81,13 @@ class LLMService(ABC):
         """모델에 메시지를 보내고 응답 텍스트를 반환한다."""
         ...
 
+    async def stream_response(self, model_name: str, messages: list, options: dict = None) -> AsyncIterator[str]:
+        """
+        응답 텍스트를 프로바이더가 보내는 순서대로 조각(chunk) 단위로 내보낸다.
+        스트리밍 API가 없는 프로바이더는 전체 응답을 한 조각으로 내보낸다.
+        """
+        yield await self.generate_response(model_name, messages, options)
+
     @abstractmethod
     def get_provider_name(self) -> str:
         """프로바이더 이름을 반환한다 (예: 'gemini', 'openai')."""
@@ -1,5 +1,5 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import PlainTextResponse, JSONResponse
+from fastapi.responses import PlainTextResponse, JSONResponse, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 import uvicorn
@@ -8,6 +8,7 @@ import logging
 import os
 from datetime import datetime, timezone, timedelta
 import asyncio
+import json
 
 # Local imports
 from config_loader import load_config
@@ -83,6 +84,23 @@ def _model_details(model_name: str) -> OllamaModelDetails:
         family = "gemini"
     return OllamaModelDetails(family=family, families=[family])
 
+def _ndjson_stream(qm: QueueManager, model: str, messages: list, options: dict, make_chunk) -> StreamingResponse:
+    """
+    Ollama 스트리밍 형식(application/x-ndjson) 응답.
+    make_chunk(text, done)가 만든 객체를 한 줄씩 내보내고, 마지막 줄은 done=true로 끝낸다.
+    응답이 이미 시작된 뒤의 오류는 Ollama처럼 {"error": ...} 줄로 알린다.
+    """
+    async def _lines():
+        try:
+            async for chunk in qm.stream_request(model, messages, options):
+                yield make_chunk(chunk, False).model_dump_json(exclude_none=True) + "\n"
+            yield make_chunk("", True).model_dump_json(exclude_none=True) + "\n"
+        except Exception as e:
+            logger.error(f"Stream error ({model}): {e}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
+
 # --- Ollama-compatible Endpoints ---
 
 @app.get("/", response_class=PlainTextResponse)
@@ -170,6 +188,17 @@ async def chat(request: OllamaChatRequest):
         if logger.isEnabledFor(logging.DEBUG):
              logger.debug(f"Messages: {messages_dict}")
 
+        if request.stream:
+            def make_chunk(text: str, done: bool) -> OllamaChatResponse:
+                return OllamaChatResponse(
+                    model=request.model,
+                    created_at=datetime.now(timezone.utc).isoformat(),
+                    message=ChatMessage(role="assistant", content=text),
+                    done=done,
+                    done_reason="stop" if done else None
+                )
+            return _ndjson_stream(qm, request.model, messages_dict, options, make_chunk)
+
         future = await qm.submit_request(request.model, messages_dict, options)
         result_text = await future
 
@@ -203,6 +232,17 @@ async def generate(request: OllamaGenerateRequest):
     messages.append({"role": "user", "content": request.prompt})
 
     try:
+        if request.stream:
+            def make_chunk(text: str, done: bool) -> OllamaGenerateResponse:
+                return OllamaGenerateResponse(
+                    model=request.model,
+                    created_at=datetime.now(timezone.utc).isoformat(),
+                    response=text,
+                    done=done,
+                    done_reason="stop" if done else None
+                )
+            return _ndjson_stream(qm, request.model, messages, options, make_chunk)
+
         future = await qm.submit_request(request.model, messages, options)
         result_text = await future
 
@@ -1,7 +1,7 @@
 ﻿from openai import OpenAI
 import asyncio
 import logging
-from llm_service import LLMService
+from llm_service import LLMService, iterate_in_executor, report_usage
 
 logger = logging.getLogger("OpenAIService")
 
@@ -27,7 +27,8 @@ class OpenAIService(LLMService):
             converted.append({"role": role, "content": content})
         return converted
 
-    async def generate_response(self, model_name: str, messages: list, options: dict = None) -> str:
+    def _build_kwargs(self, model_name: str, messages: list, options: dict = None) -> dict:
+        """chat.completions.create 인자를 만든다. 일반/스트리밍 호출이 같이 쓴다."""
         target_model = model_name if model_name else self.default_model
 
         openai_messages = self._convert_messages(messages)
@@ -48,11 +49,33 @@ class OpenAIService(LLMService):
             if max_tokens:
                 kwargs["max_tokens"] = max_tokens
 
+        return kwargs
+
+    async def generate_response(self, model_name: str, messages: list, options: dict = None) -> str:
+        kwargs = self._build_kwargs(model_name, messages, options)
+
         loop = asyncio.get_running_loop()
 
         def _call_api():
             return self.client.chat.completions.create(**kwargs)
 
         response = await loop.run_in_executor(None, _call_api)
+        report_usage(getattr(response.usage, "total_tokens", None))
 
         return response.choices[0].message.content
+
+    async def stream_response(self, model_name: str, messages: list, options: dict = None):
+        """stream=True로 받은 delta 텍스트를 받는 즉시 내보낸다."""
+        kwargs = self._build_kwargs(model_name, messages, options)
+
+        def _open_stream():
+            return self.client.chat.completions.create(
+                **kwargs, stream=True, stream_options={"include_usage": True}
+            )
+
+        async for chunk in iterate_in_executor(_open_stream):
+            # 사용량만 담긴 마지막 조각은 choices가 비어 있다.
+            if chunk.usage is not None:
+                report_usage(chunk.usage.total_tokens)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -1,10 +1,12 @@
 ﻿import asyncio
 import hashlib
 import json
-from rate_limiter import RateLimiter
+from typing import AsyncIterator, Callable, Optional
+from rate_limiter import RateLimiter, estimate_tokens
+from response_cache import ResponseCache
 from genai_service import GenAIService
 from openai_service import OpenAIService
-from llm_service import LLMService
+from llm_service import LLMService, take_usage
 from config_loader import load_config
 import logging
 
@@ -12,6 +14,9 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("QueueManager")
 
+# 프로바이더별 동시 처리 워커 수 기본값 (config의 workers로 변경)
+DEFAULT_WORKERS_PER_PROVIDER = 4
+
 # 모델 접두사 기반 프로바이더 추론 규칙
 _PREFIX_PROVIDER_MAP = [
     (("gpt", "o1-", "o3-", "o4-"), "openai"),
@@ -19,19 +24,41 @@ _PREFIX_PROVIDER_MAP = [
 ]
 
 
+class _Flight:
+    """처리 중인 요청 하나(공유 Future)와 그 결과를 기다리는 호출자 수."""
+    __slots__ = ("future", "waiters")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
 class QueueManager:
     def __init__(self):
         self.config = load_config()
         self._services: dict[str, LLMService] = {}
         self._limiters: dict[str, RateLimiter] = {}
+        # 모델별 RPM/TPM 한도 (providers.<이름>.model_limits). 프로바이더 한도와 함께 적용된다.
+        self._model_limiters: dict[str, RateLimiter] = {}
+        # 프로바이더별 큐와 동시 워커 수. 느린 프로바이더가 다른 프로바이더 요청을 막지 않도록 분리한다.
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._worker_counts: dict[str, int] = {}
         self._init_providers()
-        self.queue = asyncio.Queue()
         self.running = False
-        self.worker_task = None
+        self.worker_tasks: list[asyncio.Task] = []
         self._deterministic = self.config.get('deterministic', False)
-        self._cache: dict[str, str] = {}
-        if self._deterministic:
-            logger.info("Deterministic mode enabled: responses will be cached")
+        # 응답 캐시: deterministic 모드이거나 cache.enabled일 때 사용 (항목/바이트 상한 + LRU, 선택 TTL/SQLite)
+        cache_conf = self.config.get('cache') or {}
+        self._cache: Optional[ResponseCache] = None
+        if self._deterministic or cache_conf.get('enabled', False):
+            self._cache = ResponseCache.from_config(cache_conf)
+            logger.info(
+                f"Response cache enabled: max_entries={self._cache.max_entries}, "
+                f"max_bytes={self._cache.max_bytes}, ttl={self._cache.ttl_seconds}, path={self._cache.path}"
+            )
+        # 같은 (model, messages, options)로 처리 중인 요청. 중복 요청은 프로바이더 호출/RPM 슬롯 하나를 공유한다.
+        self._inflight: dict[str, _Flight] = {}
+        self.coalesced = 0
 
     # 프로바이더 이름 → LLMService 클래스 매핑 (테스트 패치 호환을 위해 런타임 해결)
     _PROVIDER_CLASS_NAMES: dict[str, str] = {
@@ -54,8 +81,15 @@ class QueueManager:
                 api_key=pconf['api_key'],
                 default_model=default_model,
             )
-            self._limiters[pname] = RateLimiter(pconf['rpm'])
-            logger.info(f"Provider '{pname}' initialized: models={pconf['models']}, rpm={pconf['rpm']}")
+            self._limiters[pname] = RateLimiter(pconf['rpm'], pconf.get('tpm', 0))
+            for model, limits in pconf.get('model_limits', {}).items():
+                self._model_limiters[model] = RateLimiter(limits.get('rpm', 0), limits.get('tpm', 0))
+            self._queues[pname] = asyncio.Queue()
+            self._worker_counts[pname] = pconf.get('workers', self.config.get('workers', DEFAULT_WORKERS_PER_PROVIDER))
+            logger.info(
+                f"Provider '{pname}' initialized: models={pconf['models']}, rpm={pconf['rpm']}, "
+                f"tpm={pconf.get('tpm', 0)}, workers={self._worker_counts[pname]}"
+            )
 
     def _resolve_provider(self, model: str) -> str:
         """모델명으로 프로바이더를 결정한다."""
@@ -91,122 +125,232 @@ class QueueManager:
         return self.config.get('rpm', 0)
 
     async def start(self):
-        """Start the background worker."""
+        """Start the background workers (프로바이더별 워커 풀)."""
         if not self.running:
             self.running = True
-            self.worker_task = asyncio.create_task(self._worker())
-            logger.info("Queue Manager started.")
+            for pname, count in self._worker_counts.items():
+                for i in range(count):
+                    self.worker_tasks.append(
+                        asyncio.create_task(self._worker(pname), name=f"qm-{pname}-{i}")
+                    )
+            logger.info(f"Queue Manager started. workers={self._worker_counts}")
 
     async def stop(self):
-        """Stop the background worker."""
+        """Stop the background workers."""
         self.running = False
-        if self.worker_task:
-            self.worker_task.cancel()
-            try:
-                await self.worker_task
-            except asyncio.CancelledError:
-                pass
+        tasks, self.worker_tasks = self.worker_tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
             logger.info("Queue Manager stopped.")
+        if self._cache is not None:
+            # 남은 캐시 쓰기를 반영하는 동안 이벤트 루프를 막지 않는다.
+            await asyncio.to_thread(self._cache.close)
 
-    async def submit_request(self, model: str, messages: list, options: dict = None) -> asyncio.Future:
+    async def submit_request(self, model: str, messages: list, options: dict = None,
+                             on_chunk: Optional[Callable[[str], None]] = None) -> asyncio.Future:
         """
         Submit a request to the queue. Returns a Future that will await the result.
+        모델의 프로바이더 큐에 넣으므로 다른 프로바이더의 처리 지연과 무관하게 진행된다.
+        on_chunk를 주면 프로바이더 스트리밍 API로 호출하고, 받은 조각마다 on_chunk를 부른다.
+        (Future는 조각을 모두 이은 전체 텍스트로 끝난다)
+        같은 요청이 이미 처리 중이면 큐에 넣지 않고 그 결과를 함께 받는다. (스트리밍 요청은 제외)
         """
         loop = asyncio.get_running_loop()
         future = loop.create_future()
 
+        provider = self._resolve_provider(model)
+        queue = self._queues.get(provider)
+        if queue is None:
+            future.set_exception(ValueError(f"No service for provider '{provider}' (model={model})"))
+            return future
+
+        key = self._make_cache_key(model, messages, options)
+        if on_chunk is None:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                logger.debug(f"Coalesced request for model {model} (key={key[:16]}...)")
+                return self._join(flight)
+            flight = _Flight(future)
+            self._inflight[key] = flight
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
         item = {
             'model': model,
             'messages': messages,
             'options': options,
-            'future': future
+            'key': key,
+            'future': future,
+            'on_chunk': on_chunk,
         }
 
-        await self.queue.put(item)
-        return future
+        await queue.put(item)
+        return future if on_chunk else self._join(flight)
 
-    async def _worker(self):
-        """Background worker to process queue items with rate limiting."""
-        while self.running:
-            try:
-                # Wait for item
-                item = await self.queue.get()
+    def _join(self, flight: _Flight) -> asyncio.Future:
+        """
+        공유 Future의 결과를 받는 호출자별 Future를 만든다.
+        한 호출자가 취소해도 다른 호출자는 계속 기다리고, 모두 취소하면 공유 요청도 취소한다.
+        """
+        caller = asyncio.get_running_loop().create_future()
+        flight.waiters += 1
 
-                model = item['model']
-                msgs = item['messages']
-                opts = item['options']
-                fut = item['future']
+        def _settle(shared: asyncio.Future):
+            if caller.done():
+                return
+            if shared.cancelled():
+                caller.cancel()
+            elif shared.exception() is not None:
+                caller.set_exception(shared.exception())
+            else:
+                caller.set_result(shared.result())
 
-                if fut.cancelled():
-                    self.queue.task_done()
-                    continue
-
-                # Resolve provider for this model
-                provider = self._resolve_provider(model)
-                svc = self._services.get(provider)
-                lim = self._limiters.get(provider)
-
-                if svc is None:
-                    if not fut.cancelled():
-                        fut.set_exception(
-                            ValueError(f"No service for provider '{provider}' (model={model})")
-                        )
-                    self.queue.task_done()
-                    continue
-
-                # Deterministic 캐시 확인
-                if self._deterministic:
-                    cache_key = self._make_cache_key(model, msgs)
-                    cached = self._cache.get(cache_key)
-                    if cached is not None:
-                        logger.info(f"Cache hit for model {model} (provider={provider})")
-                        if not fut.cancelled():
-                            fut.set_result(cached)
-                        self.queue.task_done()
-                        continue
-
-                # Check Rate Limit
-                if lim:
-                    await lim.wait_for_slot()
+        def _leave(_):
+            flight.waiters -= 1
+            if caller.cancelled() and flight.waiters == 0 and not flight.future.done():
+                flight.future.cancel()
+
+        flight.future.add_done_callback(_settle)
+        caller.add_done_callback(_leave)
+        return caller
 
+    async def stream_request(self, model: str, messages: list, options: dict = None) -> AsyncIterator[str]:
+        """
+        응답을 조각 단위로 내보내는 비동기 이터레이터.
+        일반 요청과 같은 프로바이더 큐/워커/RPM 리미터를 거치며, 소비를 중단하면 프로바이더 스트림도 멈춘다.
+        """
+        chunks: asyncio.Queue = asyncio.Queue()
+        future = await self.submit_request(model, messages, options, on_chunk=chunks.put_nowait)
+        future.add_done_callback(lambda _: chunks.put_nowait(None))
+        try:
+            while True:
+                chunk = await chunks.get()
+                if chunk is None:
+                    break
+                yield chunk
+            # 오류로 끝났으면 여기서 다시 던진다.
+            await future
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def _worker(self, provider: str):
+        """프로바이더 큐를 처리하는 워커. 같은 프로바이더의 워커들이 RPM 리미터를 공유한다."""
+        queue = self._queues[provider]
+        while self.running:
+            try:
+                item = await queue.get()
                 try:
-                    logger.info(f"Processing request for model {model} (provider={provider})...")
-                    result = await svc.generate_response(model, msgs, opts)
-                    if self._deterministic:
-                        self._cache[cache_key] = result
-                        logger.debug(f"Cached response for model {model} (key={cache_key[:16]}...)")
-                    if not fut.cancelled():
-                        fut.set_result(result)
-                except Exception as e:
-                    logger.error(f"Error processing request: {e}")
-                    if not fut.cancelled():
-                        fut.set_exception(e)
+                    await self._process(provider, item)
                 finally:
-                    self.queue.task_done()
-
+                    queue.task_done()
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Worker error: {e}")
+                logger.error(f"Worker error ({provider}): {e}")
                 # Prevent worker crash loop
                 await asyncio.sleep(1)
 
+    async def _process(self, provider: str, item: dict):
+        """요청 하나를 캐시 확인 → RPM/TPM 대기 → 프로바이더 호출 → 토큰 사용량 보정 순서로 처리한다."""
+        model = item['model']
+        msgs = item['messages']
+        opts = item['options']
+        fut = item['future']
+        on_chunk = item.get('on_chunk')
+
+        if fut.cancelled():
+            return
+
+        svc = self._services[provider]
+        # 모델 한도를 먼저 기다린다. (프로바이더 슬롯을 잡은 채 모델 한도를 기다리면 다른 모델이 막힌다)
+        limiters = [lim for lim in (self._model_limiters.get(model), self._limiters.get(provider)) if lim]
+
+        # 응답 캐시 확인
+        if self._cache is not None:
+            cache_key = item['key']
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"Cache hit for model {model} (provider={provider})")
+                if not fut.cancelled():
+                    if on_chunk:
+                        on_chunk(cached)
+                    fut.set_result(cached)
+                return
+
+        # Check Rate Limit (요청 1개 + 추정 토큰 수를 차감하고, 응답의 실제 사용량으로 보정)
+        tokens = estimate_tokens(msgs, opts)
+        reservations = []
+        for lim in limiters:
+            reservations.append((lim, await lim.wait_for_slot(tokens)))
+        take_usage()
+
+        try:
+            logger.info(f"Processing request for model {model} (provider={provider})...")
+            if on_chunk:
+                result = await self._stream(svc, model, msgs, opts, fut, on_chunk)
+                if result is None:
+                    logger.info(f"Stream for model {model} cancelled by client")
+                    return
+            else:
+                result = await svc.generate_response(model, msgs, opts)
+            used = take_usage()
+            if used is not None:
+                for lim, reservation in reservations:
+                    lim.record_usage(reservation, used)
+            if self._cache is not None:
+                self._cache.set(cache_key, result)
+                logger.debug(f"Cached response for model {model} (key={cache_key[:16]}...)")
+            if not fut.cancelled():
+                fut.set_result(result)
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            if not fut.cancelled():
+                fut.set_exception(e)
+
+    @staticmethod
+    async def _stream(svc: LLMService, model: str, msgs: list, opts: dict, fut: asyncio.Future,
+                      on_chunk: Callable[[str], None]) -> Optional[str]:
+        """프로바이더 스트림을 조각마다 on_chunk로 넘긴다. 요청이 취소되면 None을 반환한다."""
+        parts = []
+        stream = svc.stream_response(model, msgs, opts)
+        try:
+            async for chunk in stream:
+                if fut.cancelled():
+                    return None
+                parts.append(chunk)
+                on_chunk(chunk)
+        finally:
+            await stream.aclose()
+        return "".join(parts)
+
     @staticmethod
-    def _make_cache_key(model: str, messages: list) -> str:
-        """모델 + 메시지 내용으로 캐시 키 생성."""
-        raw = json.dumps({"model": model, "messages": messages}, sort_keys=True, ensure_ascii=False)
+    def _make_cache_key(model: str, messages: list, options: dict = None) -> str:
+        """모델 + 메시지 + 옵션(temperature 등)으로 캐시 키 생성."""
+        raw = json.dumps({"model": model, "messages": messages, "options": options or {}},
+                         sort_keys=True, ensure_ascii=False)
         return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
     def get_status(self):
         """Return status for health check."""
         providers_status = {}
         for pname, lim in self._limiters.items():
-            providers_status[pname] = {"rpm": lim.rpm}
+            providers_status[pname] = {
+                "rpm": lim.rpm,
+                "tpm": self.config['providers'][pname].get('tpm', 0),
+                "queue_size": self._queues[pname].qsize(),
+                "workers": self._worker_counts[pname],
+            }
         status = {
-            "queue_size": self.queue.qsize(),
+            "queue_size": sum(q.qsize() for q in self._queues.values()),
             "rpm_config": self.rpm,
             "providers": providers_status,
+            "inflight": len(self._inflight),
+            "coalesced": self.coalesced,
         }
-        if self._deterministic:
+        if self._cache is not None:
             status["deterministic_cache_size"] = len(self._cache)
+            status["cache"] = self._cache.stats()
         return status
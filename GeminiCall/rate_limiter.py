@@ -1,37 +1,131 @@
 import asyncio
-import time
 from collections import deque
+from typing import Optional
+
+# 토큰 수 추정: 대략 4글자당 1토큰 (실제 사용량은 응답의 usage로 보정)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: list, options: dict = None) -> int:
+    """요청이 쓸 토큰 수를 메시지 길이와 최대 출력 토큰으로 추정한다."""
+    chars = sum(len(str(m.get('content', ''))) for m in messages or [])
+    tokens = chars // CHARS_PER_TOKEN + 1
+    if options:
+        tokens += options.get('max_output_tokens') or options.get('num_predict') or 0
+    return tokens
+
+
+class Reservation:
+    """wait_for_slot이 차감한 사용량. 응답을 받은 뒤 record_usage로 실제 토큰 수를 반영한다."""
+    __slots__ = ("at", "tokens")
+
+    def __init__(self, at: float, tokens: int):
+        self.at = at
+        self.tokens = tokens
+
 
 class RateLimiter:
-    def __init__(self, rpm: int):
+    """
+    RPM(요청 수)과 TPM(토큰 수)을 함께 제한하는 버킷.
+    - 버킷에는 interval(1분) 동안 rpm개 요청/tpm개 토큰이 있고, 쓴 양은 interval 뒤에 돌아온다.
+      한도만큼은 한 번에 쓸 수 있고(burst), 어느 1분 구간에서도 프로바이더 한도를 넘지 않는다.
+    - 대기자는 FIFO로 줄을 서고, 앞 대기자가 들어갈 수 있는 정확한 시각에 타이머 하나로 깨운다.
+      (락을 잡고 자지 않으므로 대기 중에도 다른 요청의 사용량 보정/취소가 바로 반영된다)
+    - rpm/tpm이 0이면 해당 항목은 제한하지 않는다.
+    """
+    def __init__(self, rpm: int, tpm: int = 0):
         self.rpm = rpm
+        self.tpm = tpm
         self.interval = 60.0  # 1 minute window
-        self.request_timestamps = deque()
-        self._lock = asyncio.Lock()
+        self._spent: deque[Reservation] = deque()
+        self._tokens_spent = 0
+        self._waiters: deque[tuple[asyncio.Future, int]] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _expire(self, now: float):
+        while self._spent and now - self._spent[0].at >= self.interval:
+            self._tokens_spent -= self._spent.popleft().tokens
 
-    async def wait_for_slot(self):
+    def _ready_at(self, now: float, tokens: int) -> float:
+        """tokens를 쓰는 요청이 한도 안에 들어가는 가장 이른 시각."""
+        ready = now
+        if self.rpm > 0 and len(self._spent) >= self.rpm:
+            ready = max(ready, self._spent[len(self._spent) - self.rpm].at + self.interval)
+        if self.tpm > 0:
+            # 한 요청이 tpm보다 크면 버킷이 빌 때까지만 기다린다.
+            excess = self._tokens_spent + min(tokens, self.tpm) - self.tpm
+            for spent in self._spent:
+                if excess <= 0:
+                    break
+                excess -= spent.tokens
+                ready = max(ready, spent.at + self.interval)
+        return ready
+
+    def _take(self, now: float, tokens: int) -> Reservation:
+        reservation = Reservation(now, tokens)
+        self._spent.append(reservation)
+        self._tokens_spent += tokens
+        return reservation
+
+    def _dispatch(self):
+        """줄 앞에서부터 들어갈 수 있는 대기자를 깨우고, 남은 대기자를 위한 타이머를 다시 건다."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self._expire(now)
+        while self._waiters:
+            future, tokens = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            ready = self._ready_at(now, tokens)
+            if ready > now:
+                self._timer = loop.call_at(ready, self._dispatch)
+                return
+            self._waiters.popleft()
+            future.set_result(self._take(now, tokens))
+
+    async def wait_for_slot(self, tokens: int = 0) -> Reservation:
         """
-        Waits until a slot is available within the RPM limit.
-        Thread-safe (asyncio) using Lock.
+        RPM/TPM 한도 안에 들어갈 때까지 기다린 뒤 요청 1개와 tokens만큼 차감한다.
+        먼저 기다리던 요청이 있으면 그 뒤에 선다. (공정성)
         """
-        if self.rpm <= 0:
-            return  # No limit
-
-        async with self._lock:
-            while True:
-                now = time.time()
-                
-                # Remove timestamps older than the interval
-                while self.request_timestamps and now - self.request_timestamps[0] > self.interval:
-                    self.request_timestamps.popleft()
-                
-                if len(self.request_timestamps) < self.rpm:
-                    self.request_timestamps.append(now)
-                    return
-                
-                # If limit reached, wait until the oldest timestamp expires
-                oldest = self.request_timestamps[0]
-                wait_time = self.interval - (now - oldest)
-                
-                if wait_time > 0:
-                    await asyncio.sleep(wait_time + 0.05) # Small buffer
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.rpm <= 0 and self.tpm <= 0:
+            return Reservation(now, tokens)  # No limit
+
+        self._expire(now)
+        if not self._waiters and self._ready_at(now, tokens) <= now:
+            return self._take(now, tokens)
+
+        future = loop.create_future()
+        self._waiters.append((future, tokens))
+        if len(self._waiters) == 1:
+            self._dispatch()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 깨어난 직후 취소되면 차감한 요청/토큰을 돌려준다.
+                reservation = future.result()
+                if reservation in self._spent:
+                    self._spent.remove(reservation)
+                    self._tokens_spent -= reservation.tokens
+            self._dispatch()
+            raise
+
+    def record_usage(self, reservation: Reservation, tokens: int):
+        """추정으로 차감한 토큰을 실제 사용량으로 바꾼다. 아직 1분 구간 안에 있을 때만 반영된다."""
+        delta = tokens - reservation.tokens
+        reservation.tokens = tokens
+        if reservation in self._spent:
+            self._tokens_spent += delta
+            if delta < 0 and self._waiters:
+                self._dispatch()
+
+    @property
+    def tokens_in_window(self) -> int:
+        return self._tokens_spent
@@ -0,0 +1,192 @@
+﻿import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger("ResponseCache")
+
+# 기본 상한 (config의 cache.max_entries / cache.max_bytes로 변경)
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    응답 캐시. 항목 수 또는 바이트 상한을 넘으면 가장 오래 쓰이지 않은 항목부터 내보낸다. (LRU)
+    - ttl_seconds: 저장 후 이 시간이 지난 항목은 조회 시 버린다. (None이면 만료 없음)
+    - path: SQLite 파일에 같이 기록해 재시작 후에도 캐시를 이어 쓴다.
+      조회는 항상 메모리에서 하고, 디스크에는 저장/삭제만 반영한다. (적중 시 디스크 쓰기 없음)
+      디스크 쓰기는 전용 스레드 하나가 모아서 트랜잭션 단위로 처리하므로 이벤트 루프를 막지 않는다.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: Optional[float] = None, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        # key -> (value, size, stored_at). 끝쪽이 가장 최근에 쓰인 항목이다.
+        self._entries: OrderedDict[str, tuple[str, int, float]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: Optional[sqlite3.Connection] = None
+        # 디스크에 반영할 (sql, 파라미터 목록). None은 writer 스레드 종료 신호다.
+        self._writes: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        if path:
+            self._open(path)
+            self._writer = threading.Thread(target=self._write_loop, name="response-cache-writer", daemon=True)
+            self._writer.start()
+
+    @classmethod
+    def from_config(cls, conf: Optional[dict]) -> "ResponseCache":
+        conf = conf or {}
+        return cls(
+            max_entries=conf.get('max_entries', DEFAULT_MAX_ENTRIES),
+            max_bytes=conf.get('max_bytes', DEFAULT_MAX_BYTES),
+            ttl_seconds=conf.get('ttl_seconds'),
+            path=conf.get('path'),
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _open(self, path: str):
+        """SQLite 파일을 열고 저장된 항목을 저장 순서대로 메모리에 올린다."""
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL에서는 NORMAL이어도 DB가 깨지지 않는다. (전원 장애 시 마지막 커밋 몇 개만 잃을 수 있음)
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        expired = []
+        for key, value, stored_at in self._db.execute(
+                "SELECT key, value, stored_at FROM responses ORDER BY stored_at"):
+            if self._expired(stored_at):
+                expired.append((key,))
+                continue
+            self._insert(key, value, stored_at)
+        if expired:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", expired)
+        self._evict()
+        logger.info(f"Loaded {len(self._entries)} cached responses from {path} ({self.bytes} bytes)")
+
+    def _persist(self, sql: str, params: list):
+        # _open 중에 쌓인 쓰기는 writer 스레드가 시작되면 처리된다.
+        if self._db is not None:
+            self._writes.put((sql, params))
+
+    def _write_loop(self):
+        """쌓인 쓰기를 한 트랜잭션으로 묶어 반영한다. 이 스레드만 시작 후의 SQLite 연결을 쓴다."""
+        while True:
+            batch = [self._writes.get()]
+            while True:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            try:
+                self._db.execute("BEGIN")
+                for op in batch:
+                    if op is not None:
+                        self._db.executemany(*op)
+                self._db.execute("COMMIT")
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist {len(batch)} cache writes: {e}")
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+            finally:
+                for _ in batch:
+                    self._writes.task_done()
+            if stop:
+                return
+
+    def flush(self):
+        """지금까지 요청한 디스크 쓰기가 모두 반영될 때까지 기다린다. (블로킹)"""
+        if self._writer is not None:
+            self._writes.join()
+
+    def close(self):
+        """남은 쓰기를 반영하고 SQLite 파일을 닫는다. (블로킹, 이벤트 루프에서는 to_thread로 부른다)"""
+        if self._writer is None:
+            return
+        self._writes.put(None)
+        self._writer.join()
+        self._writer = None
+        self._db.close()
+        self._db = None
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds
+
+    @staticmethod
+    def _size(key: str, value: str) -> int:
+        return len(key) + len(value.encode("utf-8"))
+
+    def _insert(self, key: str, value: str, stored_at: float):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        size = self._size(key, value)
+        self._entries[key] = (value, size, stored_at)
+        self.bytes += size
+
+    def _evict(self):
+        evicted = []
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            key, (_, size, _) = self._entries.popitem(last=False)
+            self.bytes -= size
+            evicted.append((key,))
+        if evicted:
+            self.evictions += len(evicted)
+            self._persist("DELETE FROM responses WHERE key = ?", evicted)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, size, stored_at = entry
+        if self._expired(stored_at):
+            del self._entries[key]
+            self.bytes -= size
+            self._persist("DELETE FROM responses WHERE key = ?", [(key,)])
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        if self._size(key, value) > self.max_bytes:
+            # 상한보다 큰 응답 하나가 캐시 전체를 비우지 않도록 저장하지 않는다.
+            logger.debug(f"Response too large to cache (key={key[:16]}...)")
+            return
+        stored_at = time.time()
+        self._insert(key, value, stored_at)
+        self._persist(
+            "INSERT OR REPLACE INTO responses (key, value, stored_at) VALUES (?, ?, ?)",
+            [(key, value, stored_at)],
+        )
+        self._evict()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "path": self.path,
+        }
@@ -1,4 +1,5 @@
-﻿import pytest
+﻿import json
+import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch, AsyncMock
 from main import app
@@ -27,6 +28,11 @@ def client():
         svc_inst = MockGemini.return_value
         svc_inst.generate_response = AsyncMock(return_value="AI Response")
 
+        async def fake_stream(model, messages, options=None):
+            for part in ("AI ", "Res", "ponse"):
+                yield part
+        svc_inst.stream_response = fake_stream
+
         # Setup Limiter Mock
         limit_inst = MockLimiter.return_value
         limit_inst.wait_for_slot = AsyncMock()
@@ -56,6 +62,29 @@ def test_ollama_chat(client):
     assert data['message']['content'] == "AI Response"
     assert data['done'] is True
 
+def test_ollama_chat_stream(client):
+    payload = {
+        "model": "gemma-27b",
+        "messages": [{"role": "user", "content": "hi"}],
+        "stream": True
+    }
+    resp = client.post("/api/chat", json=payload)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [l['message']['content'] for l in lines[:-1]] == ["AI ", "Res", "ponse"]
+    assert all(l['done'] is False for l in lines[:-1])
+    assert lines[-1]['done'] is True
+    assert lines[-1]['done_reason'] == "stop"
+
+def test_ollama_generate_stream(client):
+    payload = {"model": "gemma-27b", "prompt": "hi", "stream": True}
+    resp = client.post("/api/generate", json=payload)
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert "".join(l['response'] for l in lines) == "AI Response"
+    assert lines[-1]['done'] is True
+
 def test_json_rpc_success(client):
     payload = {
         "jsonrpc": "2.0",
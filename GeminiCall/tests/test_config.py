@@ -159,3 +159,51 @@ def test_providers_missing_http_port(tmp_path):
 
     with pytest.raises(ValueError, match="Missing required config key: http_port"):
         load_config(str(p))
+
+def test_providers_invalid_workers(tmp_path):
+    bad_config = {
+        "providers": {
+            "gemini": {
+                "api_key": "k1",
+                "models": ["m1"],
+                "rpm": 10,
+                "workers": 0
+            }
+        },
+        "http_port": 20006
+    }
+    p = tmp_path / "config.json"
+    with open(p, 'w', encoding='utf-8') as f:
+        json.dump(bad_config, f)
+
+    with pytest.raises(ValueError, match="workers must be a positive integer"):
+        load_config(str(p))
+
+def test_cache_invalid_max_bytes(tmp_path):
+    bad_config = dict(VALID_CONFIG, cache={"enabled": True, "max_bytes": 0})
+    p = tmp_path / "config.json"
+    with open(p, 'w', encoding='utf-8') as f:
+        json.dump(bad_config, f)
+
+    with pytest.raises(ValueError, match="cache.max_bytes"):
+        load_config(str(p))
+
+def test_providers_invalid_model_limits(tmp_path):
+    bad_config = {
+        "providers": {
+            "gemini": {
+                "api_key": "k1",
+                "models": ["m1"],
+                "rpm": 10,
+                "tpm": 1000,
+                "model_limits": {"m1": {"tpm": -1}}
+            }
+        },
+        "http_port": 20006
+    }
+    p = tmp_path / "config.json"
+    with open(p, 'w', encoding='utf-8') as f:
+        json.dump(bad_config, f)
+
+    with pytest.raises(ValueError, match="must be a non-negative integer"):
+        load_config(str(p))
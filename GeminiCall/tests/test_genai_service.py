@@ -53,3 +53,20 @@ async def test_generate_response_calls_client(mock_genai_client):
 async def test_get_provider_name(mock_genai_client):
     service = GenAIService(api_key="TEST_KEY", default_model="gemini-test")
     assert service.get_provider_name() == "gemini"
+
+@pytest.mark.asyncio
+async def test_stream_response_yields_chunks(mock_genai_client):
+    service = GenAIService(api_key="TEST_KEY", default_model="gemini-test")
+
+    chunks = [MagicMock(text="Gene"), MagicMock(text="rated"), MagicMock(text=None)]
+    mock_genai_client.models.generate_content_stream.return_value = iter(chunks)
+
+    received = [c async for c in service.stream_response(
+        model_name="gemini-test",
+        messages=[{'role': 'user', 'content': 'Hello'}]
+    )]
+
+    assert received == ["Gene", "rated"]
+    call_kwargs = mock_genai_client.models.generate_content_stream.call_args.kwargs
+    assert call_kwargs['model'] == "gemini-test"
+
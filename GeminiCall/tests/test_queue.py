@@ -2,6 +2,7 @@
 import asyncio
 from unittest.mock import MagicMock, AsyncMock, patch
 from queue_manager import QueueManager
+from llm_service import report_usage
 
 @pytest.fixture
 def mock_dependencies():
@@ -65,3 +66,251 @@ async def test_queue_error_propagation(mock_dependencies):
 
     finally:
         await qm.stop()
+
+
+@pytest.fixture
+def two_provider_dependencies():
+    with patch('queue_manager.load_config') as mock_conf, \
+         patch('queue_manager.GenAIService') as mock_gemini_cls, \
+         patch('queue_manager.OpenAIService') as mock_openai_cls, \
+         patch('queue_manager.RateLimiter') as mock_limit_cls:
+
+        mock_conf.return_value = {
+            "rpm": 60, "models": ["gemini-x", "gpt-x"], "api_key": "k", "http_port": 0,
+            "providers": {
+                "gemini": {"api_key": "k", "models": ["gemini-x"], "rpm": 60, "workers": 2},
+                "openai": {"api_key": "k", "models": ["gpt-x"], "rpm": 60, "workers": 1},
+            },
+            "all_models": ["gemini-x", "gpt-x"],
+            "model_provider_map": {"gemini-x": "gemini", "gpt-x": "openai"},
+        }
+
+        limit_inst = mock_limit_cls.return_value
+        limit_inst.wait_for_slot = AsyncMock()
+        limit_inst.rpm = 60
+
+        yield mock_gemini_cls.return_value, mock_openai_cls.return_value
+
+@pytest.mark.asyncio
+async def test_slow_provider_does_not_block_other_provider(two_provider_dependencies):
+    gemini, openai = two_provider_dependencies
+    release = asyncio.Event()
+
+    async def slow_gemini(model, messages, options=None):
+        await release.wait()
+        return "gemini done"
+
+    gemini.generate_response = AsyncMock(side_effect=slow_gemini)
+    openai.generate_response = AsyncMock(return_value="openai done")
+
+    qm = QueueManager()
+    await qm.start()
+    try:
+        slow = await qm.submit_request("gemini-x", [])
+        await asyncio.sleep(0)
+        fast = await qm.submit_request("gpt-x", [])
+        # Gemini 호출이 끝나지 않아도 OpenAI 요청은 바로 처리되어야 한다.
+        assert await asyncio.wait_for(fast, timeout=1.0) == "openai done"
+        assert not slow.done()
+        release.set()
+        assert await asyncio.wait_for(slow, timeout=1.0) == "gemini done"
+    finally:
+        await qm.stop()
+
+@pytest.mark.asyncio
+async def test_provider_workers_run_concurrently(two_provider_dependencies):
+    gemini, _ = two_provider_dependencies
+    in_flight = 0
+    peak = 0
+
+    async def tracked(model, messages, options=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.05)
+        in_flight -= 1
+        return "ok"
+
+    gemini.generate_response = AsyncMock(side_effect=tracked)
+
+    qm = QueueManager()
+    await qm.start()
+    try:
+        futures = [await qm.submit_request("gemini-x", [{"role": "user", "content": str(i)}]) for i in range(6)]
+        results = await asyncio.wait_for(asyncio.gather(*futures), timeout=2.0)
+        assert results == ["ok"] * 6
+        # workers=2 이므로 동시에 2개까지만 프로바이더를 호출한다.
+        assert peak == 2
+        status = qm.get_status()
+        assert status["providers"]["gemini"]["workers"] == 2
+        assert status["providers"]["openai"]["workers"] == 1
+    finally:
+        await qm.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_request_goes_through_limiter(mock_dependencies):
+    async def fake_stream(model, messages, options=None):
+        for part in ("Pro", "cess", "ed"):
+            yield part
+    mock_dependencies.stream_response = fake_stream
+
+    qm = QueueManager()
+    await qm.start()
+
+    try:
+        chunks = [c async for c in qm.stream_request("model-x", [{"role": "user", "content": "hi"}])]
+
+        assert chunks == ["Pro", "cess", "ed"]
+        qm.limiter.wait_for_slot.assert_awaited_once()
+        mock_dependencies.generate_response.assert_not_called()
+
+    finally:
+        await qm.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_request_error_propagation(mock_dependencies):
+    async def failing_stream(model, messages, options=None):
+        yield "partial"
+        raise ValueError("Stream Fail")
+    mock_dependencies.stream_response = failing_stream
+
+    qm = QueueManager()
+    await qm.start()
+
+    try:
+        received = []
+        with pytest.raises(ValueError, match="Stream Fail"):
+            async for chunk in qm.stream_request("model-x", []):
+                received.append(chunk)
+        assert received == ["partial"]
+
+    finally:
+        await qm.stop()
+
+
+
+@pytest.mark.asyncio
+async def test_cache_key_includes_options(mock_dependencies):
+    mock_dependencies.generate_response.side_effect = ["t0", "t1"]
+    with patch('queue_manager.load_config') as mock_conf:
+        mock_conf.return_value = {
+            "rpm": 60, "models": ["model-x"], "api_key": "k", "http_port": 0,
+            "providers": {
+                "gemini": {"api_key": "k", "models": ["model-x"], "rpm": 60}
+            },
+            "model_provider_map": {"model-x": "gemini"},
+            "cache": {"enabled": True, "max_entries": 10},
+        }
+        qm = QueueManager()
+    await qm.start()
+
+    try:
+        msgs = [{"role": "user", "content": "hi"}]
+        results = []
+        for temperature in (0, 0, 1):
+            future = await qm.submit_request("model-x", msgs, {"temperature": temperature})
+            results.append(await asyncio.wait_for(future, timeout=2.0))
+
+        assert results == ["t0", "t0", "t1"]
+        assert mock_dependencies.generate_response.call_count == 2
+        assert qm.get_status()["cache"]["hits"] == 1
+
+    finally:
+        await qm.stop()
+
+
+@pytest.mark.asyncio
+async def test_identical_inflight_requests_are_coalesced(mock_dependencies):
+    release = asyncio.Event()
+
+    async def slow(model, messages, options=None):
+        await release.wait()
+        return "shared"
+
+    mock_dependencies.generate_response = AsyncMock(side_effect=slow)
+
+    qm = QueueManager()
+    await qm.start()
+    try:
+        msgs = [{"role": "user", "content": "same"}]
+        first = await qm.submit_request("model-x", msgs, {"temperature": 0})
+        second = await qm.submit_request("model-x", list(msgs), {"temperature": 0})
+        other = await qm.submit_request("model-x", msgs, {"temperature": 1})
+        assert qm.get_status()["coalesced"] == 1
+
+        # 한 호출자가 취소해도 같은 요청을 기다리는 다른 호출자는 결과를 받는다.
+        first.cancel()
+        release.set()
+        assert await asyncio.wait_for(second, timeout=1.0) == "shared"
+        assert await asyncio.wait_for(other, timeout=1.0) == "shared"
+        assert mock_dependencies.generate_response.call_count == 2
+        qm.limiter.wait_for_slot.assert_awaited()
+        assert qm.limiter.wait_for_slot.await_count == 2
+        assert qm.get_status()["inflight"] == 0
+
+        # 끝난 요청은 다시 보내면 새로 호출한다.
+        again = await qm.submit_request("model-x", msgs, {"temperature": 0})
+        assert await asyncio.wait_for(again, timeout=1.0) == "shared"
+        assert mock_dependencies.generate_response.call_count == 3
+    finally:
+        await qm.stop()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_request_cancelled_when_all_callers_cancel(mock_dependencies):
+    qm = QueueManager()
+    # 워커를 시작하지 않아 요청이 큐에 머문다.
+    first = await qm.submit_request("model-x", [])
+    second = await qm.submit_request("model-x", [])
+    shared = qm._inflight[next(iter(qm._inflight))].future
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not shared.cancelled()
+    second.cancel()
+    await asyncio.sleep(0)
+    assert shared.cancelled()
+
+    # 취소된 요청은 워커가 프로바이더를 호출하지 않고 건너뛴다.
+    await qm.start()
+    try:
+        await asyncio.sleep(0.05)
+        mock_dependencies.generate_response.assert_not_called()
+    finally:
+        await qm.stop()
+
+
+@pytest.mark.asyncio
+async def test_model_limits_and_usage_correction(mock_dependencies):
+    async def generate(model, messages, options=None):
+        report_usage(7)
+        return "Processed"
+
+    mock_dependencies.generate_response = AsyncMock(side_effect=generate)
+    with patch('queue_manager.load_config') as mock_conf:
+        mock_conf.return_value = {
+            "rpm": 60, "models": ["model-x"], "api_key": "k", "http_port": 0,
+            "providers": {
+                "gemini": {"api_key": "k", "models": ["model-x"], "rpm": 60, "tpm": 1000,
+                           "model_limits": {"model-x": {"tpm": 100}}}
+            },
+            "model_provider_map": {"model-x": "gemini"},
+        }
+        qm = QueueManager()
+    await qm.start()
+
+    try:
+        future = await qm.submit_request("model-x", [{"role": "user", "content": "x" * 40}])
+        assert await asyncio.wait_for(future, timeout=2.0) == "Processed"
+
+        # 모델 한도와 프로바이더 한도를 모두 거치고, 추정치(11)를 실제 사용량(7)으로 보정한다.
+        limiter = qm.limiter
+        assert limiter.wait_for_slot.await_count == 2
+        limiter.wait_for_slot.assert_awaited_with(11)
+        assert limiter.record_usage.call_count == 2
+        assert limiter.record_usage.call_args.args[1] == 7
+        assert qm.get_status()["providers"]["gemini"]["tpm"] == 1000
+    finally:
+        await qm.stop()
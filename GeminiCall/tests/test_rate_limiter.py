@@ -2,7 +2,7 @@
 import pytest
 import asyncio
 import time
-from rate_limiter import RateLimiter
+from rate_limiter import RateLimiter, estimate_tokens
 
 @pytest.mark.asyncio
 async def test_rate_limiter_under_limit():
@@ -37,3 +37,65 @@ async def test_rate_limiter_over_limit():
     end = time.time()
     
     assert end - start >= 1.0
+
+@pytest.mark.asyncio
+async def test_rate_limiter_tpm_limit():
+    # TPM 100 -> 60 + 60 토큰은 한 구간에 들어가지 않으므로 두 번째는 대기
+    limiter = RateLimiter(0, tpm=100)
+    limiter.interval = 0.5
+
+    start = time.time()
+    await limiter.wait_for_slot(60)
+    await limiter.wait_for_slot(30)
+    assert time.time() - start < 0.2
+
+    await limiter.wait_for_slot(60)
+    assert time.time() - start >= 0.5
+
+@pytest.mark.asyncio
+async def test_rate_limiter_usage_correction_wakes_waiter():
+    limiter = RateLimiter(0, tpm=100)
+    limiter.interval = 10.0
+
+    reservation = await limiter.wait_for_slot(90)
+    waiter = asyncio.ensure_future(limiter.wait_for_slot(50))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    # 실제 사용량이 추정보다 적으면 기다리던 요청이 바로 들어간다.
+    limiter.record_usage(reservation, 20)
+    await asyncio.wait_for(waiter, timeout=0.5)
+    assert limiter.tokens_in_window == 70
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waiters_are_fifo():
+    limiter = RateLimiter(1)
+    limiter.interval = 0.2
+    order = []
+
+    async def request(i):
+        await limiter.wait_for_slot()
+        order.append(i)
+
+    await asyncio.wait_for(asyncio.gather(*(request(i) for i in range(4))), timeout=2.0)
+    assert order == [0, 1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_rate_limiter_cancelled_waiter_does_not_block():
+    limiter = RateLimiter(1)
+    limiter.interval = 0.3
+    await limiter.wait_for_slot()
+
+    first = asyncio.ensure_future(limiter.wait_for_slot())
+    second = asyncio.ensure_future(limiter.wait_for_slot())
+    await asyncio.sleep(0.05)
+    first.cancel()
+
+    await asyncio.wait_for(second, timeout=1.0)
+    assert first.cancelled()
+
+def test_estimate_tokens():
+    messages = [{"role": "user", "content": "x" * 400}]
+    assert estimate_tokens(messages) == 101
+    assert estimate_tokens(messages, {"max_output_tokens": 50}) == 151
+
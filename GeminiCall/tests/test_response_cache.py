@@ -0,0 +1,103 @@
+﻿import threading
+
+import pytest
+from unittest.mock import patch
+from response_cache import ResponseCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # a가 최근 사용됨 -> b가 먼저 밀려남
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_max_bytes_bound():
+    cache = ResponseCache(max_entries=100, max_bytes=30)
+    for i in range(5):
+        cache.set(f"k{i}", "x" * 10)  # 항목당 12 바이트
+
+    assert cache.bytes <= 30
+    assert len(cache) == 2
+    assert cache.get("k4") == "x" * 10
+
+    # 상한보다 큰 응답은 저장하지 않고 기존 항목도 유지한다.
+    cache.set("big", "y" * 100)
+    assert cache.get("big") is None
+    assert len(cache) == 2
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl_seconds=10)
+    with patch('response_cache.time.time', return_value=1000.0):
+        cache.set("a", "1")
+    with patch('response_cache.time.time', return_value=1005.0):
+        assert cache.get("a") == "1"
+    with patch('response_cache.time.time', return_value=1011.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.bytes == 0
+
+
+def test_sqlite_backend_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(max_entries=2, path=path)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.set("c", "3")  # a는 밀려나면서 파일에서도 지워진다
+    cache.close()
+
+    reopened = ResponseCache(max_entries=10, path=path)
+    assert len(reopened) == 2
+    assert reopened.get("a") is None
+    assert reopened.get("b") == "2"
+    assert reopened.get("c") == "3"
+
+
+def test_sqlite_backend_drops_expired_on_load(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    with patch('response_cache.time.time', return_value=1000.0):
+        cache = ResponseCache(ttl_seconds=60, path=path)
+        cache.set("old", "1")
+        cache.close()
+    with patch('response_cache.time.time', return_value=2000.0):
+        cache = ResponseCache(ttl_seconds=60, path=path)
+        cache.set("new", "2")
+        cache.close()
+        reopened = ResponseCache(ttl_seconds=60, path=path)
+        assert len(reopened) == 1
+        assert reopened.get("new") == "2"
+
+
+def test_sqlite_writes_run_off_caller_thread(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResponseCache(max_entries=1, path=path)
+    db = cache._db
+    threads = []
+
+    class _Spy:
+        def __getattr__(self, name):
+            threads.append(threading.get_ident())
+            return getattr(db, name)
+
+    cache._db = _Spy()
+    cache.set("a", "1")
+    cache.set("b", "2")  # a는 밀려난다
+    assert cache.get("b") == "2"
+    cache.flush()
+
+    # 메모리 갱신은 바로 끝나고, 디스크 쓰기는 모두 writer 스레드에서 일어난다.
+    assert threads
+    assert threading.get_ident() not in threads
+    cache._db = db
+    cache.close()
+    reopened = ResponseCache(max_entries=10, path=path)
+    assert reopened.get("a") is None
+    assert reopened.get("b") == "2"
+    reopened.close()
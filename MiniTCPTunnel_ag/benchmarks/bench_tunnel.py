@@ -0,0 +1,326 @@
+"""
+터널 종단 간 성능 벤치마크.
+
+서버, 클라이언트, 로컬 대상 서비스(sink/echo)를 띄우고 공용 포트를 통해 다음을 측정한다.
+- throughput: 동시 연결마다 payload를 업로드하고 sink의 수신 확인을 받을 때까지의 MiB/s
+- connect: 짧은 연결(연결 + 1회 왕복)의 p50/p99 지연과 초당 연결 수
+
+결과는 JSON으로 출력하므로 업그레이드 전후 결과를 비교해 FrameCodec/브리지 회귀를 잡는 데 사용한다.
+
+    python benchmarks/bench_tunnel.py --payload-sizes 65536,4194304 --concurrency 8
+    python benchmarks/bench_tunnel.py --isolate-server --mux-channels 0 --output before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import nacl.signing
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared.event_loop import EVENT_LOOP_CHOICES, resolve_event_loop, run as run_event_loop
+from mini_tcp_tunnel.shared.framing import configure_crypto_offload
+
+logger = logging.getLogger("Bench")
+
+# sink 서비스가 업로드 수신 완료를 알리는 응답 (8바이트 수신 바이트 수)
+ACK_LEN = 8
+
+
+def percentile(values, pct: float) -> float:
+    """nearest-rank 방식 백분위수 (값이 없으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def start_target_service(port: int):
+    """
+    첫 바이트로 동작을 고르는 로컬 대상 서비스
+    - b"S" + u64 길이: 그만큼 읽은 뒤(sink) 받은 바이트 수를 8바이트로 응답한다.
+    - 그 외: 받은 바이트를 그대로 돌려준다(echo).
+    """
+    async def handle(reader, writer):
+        try:
+            first = await reader.read(1)
+            if first == b"S":
+                expected = int.from_bytes(await reader.readexactly(8), "big")
+                received = 0
+                while received < expected:
+                    data = await reader.read(256 * 1024)
+                    if not data:
+                        break
+                    received += len(data)
+                writer.write(received.to_bytes(ACK_LEN, "big"))
+                await writer.drain()
+            elif first:
+                writer.write(first)
+                while True:
+                    data = await reader.read(65536)
+                    if not data:
+                        break
+                    writer.write(data)
+                    await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', port)
+
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.05):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+
+async def upload_once(port: int, payload: bytes) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(b"S" + len(payload).to_bytes(8, "big"))
+        view = memoryview(payload)
+        for offset in range(0, len(payload), 256 * 1024):
+            writer.write(view[offset:offset + 256 * 1024])
+            await writer.drain()
+        ack = await reader.readexactly(ACK_LEN)
+        return int.from_bytes(ack, "big")
+    finally:
+        writer.close()
+
+
+async def measure_throughput(port: int, payload_size: int, concurrency: int, rounds: int) -> dict:
+    payload = os.urandom(payload_size)
+    errors = 0
+    delivered = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        results = await asyncio.gather(*(upload_once(port, payload) for _ in range(concurrency)),
+                                       return_exceptions=True)
+        for r in results:
+            if isinstance(r, int) and r == payload_size:
+                delivered += r
+            else:
+                errors += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "payload_size": payload_size,
+        "concurrency": concurrency,
+        "transfers": rounds * concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "mib_per_sec": round(delivered / elapsed / (1024 * 1024), 2) if elapsed > 0 else 0.0,
+    }
+
+
+async def connect_once(port: int) -> float:
+    """공용 포트 연결부터 1바이트 echo 왕복까지 걸린 시간(초)"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(b"P")
+        await writer.drain()
+        if await reader.readexactly(1) != b"P":
+            raise ValueError("unexpected echo")
+        return time.perf_counter() - start
+    finally:
+        writer.close()
+
+
+async def measure_connect(port: int, connections: int, concurrency: int, timeout: float) -> dict:
+    sem = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            try:
+                latencies.append(await asyncio.wait_for(connect_once(port), timeout))
+            except Exception:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    return {
+        "connections": connections,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "conns_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+
+def _server_process(server_port: int, server_seed: bytes, client_pub: bytes, args_dict: dict, ready):
+    """--isolate-server: 서버를 별도 프로세스(별도 코어)에서 실행한다."""
+    # stdout은 JSON 결과 전용이므로 로그는 stderr로 보낸다.
+    logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stderr)
+    ALLOWED_CLIENT_KEYS.append(client_pub)
+    configure_crypto_offload(args_dict["crypto_offload_threshold"])
+
+    async def serve():
+        server = Server(server_port, nacl.signing.SigningKey(server_seed),
+                        read_size=args_dict["read_size"], coalesce_ms=args_dict["coalesce_ms"])
+        task = asyncio.create_task(server.listen())
+        await asyncio.sleep(0.3)
+        ready.set()
+        await task
+
+    try:
+        run_event_loop(serve, args_dict["event_loop"])
+    except KeyboardInterrupt:
+        pass
+
+
+async def run_benchmark(args) -> dict:
+    server_port = args.base_port
+    tunnel_port = args.base_port + 1
+    target_port = args.base_port + 2
+
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    client_pub = client_key.verify_key.encode()
+
+    server = None
+    server_task = None
+    server_proc = None
+    if args.isolate_server:
+        ctx = multiprocessing.get_context("spawn")
+        ready = ctx.Event()
+        server_proc = ctx.Process(target=_server_process,
+                                  args=(server_port, server_key.encode(), client_pub, vars(args), ready),
+                                  daemon=True)
+        server_proc.start()
+        if not await asyncio.get_running_loop().run_in_executor(None, ready.wait, 15.0):
+            raise RuntimeError("Server process did not start")
+    else:
+        ALLOWED_CLIENT_KEYS.append(client_pub)
+        server = Server(server_port, server_key, read_size=args.read_size, coalesce_ms=args.coalesce_ms)
+        server_task = asyncio.create_task(server.listen())
+        await asyncio.sleep(0.3)
+
+    target = await start_target_service(target_port)
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=args.mux_channels,
+        data_pool_size=args.data_pool_size,
+        read_size=args.read_size,
+        coalesce_ms=args.coalesce_ms,
+    )
+    tunnel_cfg = TunnelConfig("bench", tunnel_port, '127.0.0.1', target_port, compression=args.compression)
+    client.add_tunnel(tunnel_cfg)
+
+    report = {"throughput": [], "connect": None}
+    try:
+        await client.connect()
+        if not await wait_until(lambda: tunnel_cfg.tid in client.running_tunnels, 10.0):
+            raise RuntimeError("Tunnel did not open")
+        await wait_until(lambda: len(client.mux_channels) == args.mux_channels, 10.0)
+        await wait_until(lambda: len(client.data_pool.idle) == args.data_pool_size, 10.0)
+
+        # 워밍업: 첫 연결의 지연(채널 생성 등)이 측정에 섞이지 않게 한다.
+        await measure_connect(tunnel_port, min(8, args.connections), 1, args.timeout)
+
+        for payload_size in args.payload_sizes:
+            result = await measure_throughput(tunnel_port, payload_size, args.concurrency, args.rounds)
+            logger.info(f"throughput {result}")
+            report["throughput"].append(result)
+
+        report["connect"] = await measure_connect(tunnel_port, args.connections, args.concurrency, args.timeout)
+        logger.info(f"connect {report['connect']}")
+    finally:
+        await client.disconnect()
+        target.close()
+        if server_task:
+            server_task.cancel()
+            try:
+                await server_task
+            except asyncio.CancelledError:
+                pass
+            ALLOWED_CLIENT_KEYS.remove(client_pub)
+        if server_proc:
+            server_proc.terminate()
+            server_proc.join(timeout=5)
+    return report
+
+
+def parse_sizes(value: str):
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniTCPTunnel end-to-end benchmark")
+    parser.add_argument("--payload-sizes", type=parse_sizes, default=[64 * 1024, 1024 * 1024, 8 * 1024 * 1024],
+                        help="Comma separated upload sizes in bytes for the throughput test")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent public connections")
+    parser.add_argument("--rounds", type=int, default=3, help="Throughput rounds per payload size")
+    parser.add_argument("--connections", type=int, default=500, help="Short connections for the connect latency test")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Per-connection timeout (seconds)")
+    parser.add_argument("--mux-channels", type=int, default=2)
+    parser.add_argument("--data-pool-size", type=int, default=0)
+    parser.add_argument("--read-size", type=int, default=64 * 1024)
+    parser.add_argument("--coalesce-ms", type=float, default=0.0)
+    parser.add_argument("--compression", choices=["auto", "always", "never"], default="never")
+    parser.add_argument("--crypto-offload-threshold", type=int, default=256 * 1024)
+    parser.add_argument("--event-loop", choices=list(EVENT_LOOP_CHOICES), default="asyncio")
+    parser.add_argument("--isolate-server", action="store_true", help="Run the server in a separate process")
+    parser.add_argument("--base-port", type=int, default=9061, help="Uses base, base+1 (tunnel), base+2 (target)")
+    parser.add_argument("--output", type=str, default="", help="Also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(name)s: %(message)s", stream=sys.stderr)
+    args.event_loop = resolve_event_loop(args.event_loop)
+    configure_crypto_offload(args.crypto_offload_threshold)
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "verbose")},
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+    }
+    report.update(run_event_loop(lambda: run_benchmark(args), args.event_loop))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,399 @@
+"""
+짧은 연결 대량 부하 테스트.
+
+하나의 터널로 HTTP 형태의 짧은 요청/응답(연결 → POST /rpc → 응답 → 종료)을 수천 개 동시에 보내고 다음을 측정한다.
+- setup: 공용 포트 TCP 연결 시간, first_byte: 요청 전송부터 첫 응답 바이트까지(페어링/채널 대기 포함), total
+- 실패 분류: 페어링 시간(10초) 초과로 응답 없이 끊김, 그 전에 끊김(대기 상한 거절 등), 연결 거부/리셋,
+  잘못된 응답, 클라이언트 시간 초과. 서버 쪽 pairing_expired/pairing_rejected 지표도 함께 출력한다.
+- 이벤트 루프 지연: 부하 생성 프로세스와 (--isolate-server이면) 서버 프로세스의 루프 지연 분포
+
+대상은 내장 HTTP 서비스(기본)나 --target으로 지정한 외부 서비스(예: tests/test_http_echo/server.py, 포트 8000)다.
+결과는 bench_tunnel.py처럼 JSON으로 출력한다.
+
+    python benchmarks/load_short_conns.py --exchanges 5000 --concurrency 1000
+    python benchmarks/load_short_conns.py --mux-channels 0 --max-pending 256 --isolate-server
+    python benchmarks/load_short_conns.py --target 127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import nacl.signing
+
+from bench_tunnel import percentile, wait_until
+from mini_tcp_tunnel.server.core import Server, client_id
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.constants import PAIRING_TIMEOUT, DEFAULT_MAX_PENDING_PER_TUNNEL
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared.event_loop import EVENT_LOOP_CHOICES, resolve_event_loop, run as run_event_loop
+from mini_tcp_tunnel.shared.framing import configure_crypto_offload
+
+logger = logging.getLogger("LoadShortConns")
+
+TUNNEL_ID = "load"
+# closed_early: 페어링 시간 전에 응답 없이 끊김 (예: 대기 상한 초과로 서버가 바로 거절)
+OUTCOMES = ("ok", "pairing_timeout", "closed_early", "connect_error", "reset", "bad_response", "client_timeout")
+# 응답 없이 끊긴 연결이 이 시간 이상 기다렸다면 서버의 페어링 만료로 본다.
+PAIRING_TIMEOUT_SLACK = 0.9
+
+
+def summarize_ms(values) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p90_ms": round(percentile(values, 90) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3) if values else 0.0,
+    }
+
+
+def raise_fd_limit() -> int:
+    """동시 연결 수천 개는 프로세스당 fd 기본 상한(1024)을 넘기므로 soft 상한을 hard까지 올린다."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    target = hard if hard != resource.RLIM_INFINITY else 65536
+    if soft < target:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+    return resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+
+
+class LoopLagSampler:
+    """interval마다 깨어나 예정 시각보다 늦은 만큼을 이벤트 루프 지연으로 기록한다."""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    async def stop(self) -> dict:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        return summarize_ms(self.samples)
+
+
+async def start_http_target(port: int, delay_ms: float):
+    """
+    tests/test_http_echo/server.py의 POST /rpc echo를 흉내 내는 최소 HTTP/1.1 서비스.
+    요청마다 응답 후 연결을 닫는다. (uvicorn 없이 대상 쪽 비용을 작게 유지한다)
+    """
+    async def handle(reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value.strip())
+            body = json.loads(await reader.readexactly(length)) if length else {}
+            if delay_ms > 0:
+                await asyncio.sleep(delay_ms / 1000.0)
+            params = body.get("params") or [""]
+            result = json.dumps({"jsonrpc": "2.0", "result": f"Echo: {params[0]}", "id": body.get("id")},
+                                separators=(",", ":")).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(result)).encode() + b"\r\nConnection: close\r\n\r\n" + result)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', port, backlog=4096)
+
+
+def build_request(index: int, request_size: int):
+    text = f"req-{index}-".ljust(max(request_size, 16), "x")
+    body = json.dumps({"jsonrpc": "2.0", "method": "echo", "params": [text], "id": index},
+                      separators=(",", ":")).encode()
+    head = (f"POST /rpc HTTP/1.1\r\nHost: tunnel\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode()
+    return head + body, f"Echo: {text}".encode()
+
+
+async def exchange(port: int, index: int, request_size: int, timeout: float) -> dict:
+    """연결 하나로 요청/응답 한 번을 주고받고 결과(outcome)와 구간별 시간을 반환한다."""
+    request, expected = build_request(index, request_size)
+    result = {"outcome": "ok", "setup": None, "first_byte": None, "total": None}
+    started = time.perf_counter()
+    deadline = started + timeout
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    except asyncio.TimeoutError:
+        result["outcome"] = "client_timeout"
+        return result
+    except OSError:
+        result["outcome"] = "connect_error"
+        return result
+    connected = time.perf_counter()
+    result["setup"] = connected - started
+    try:
+        writer.write(request)
+        await writer.drain()
+        first = await asyncio.wait_for(reader.read(65536), deadline - time.perf_counter())
+        if not first:
+            # 서버가 응답 없이 끊었다. 페어링 시간만큼 기다렸다면 데이터 채널이 오지 않은 경우다.
+            waited = time.perf_counter() - connected
+            result["outcome"] = "pairing_timeout" if waited >= PAIRING_TIMEOUT * PAIRING_TIMEOUT_SLACK else "closed_early"
+            return result
+        result["first_byte"] = time.perf_counter() - connected
+        rest = await asyncio.wait_for(reader.read(), deadline - time.perf_counter())
+        response = first + rest
+        result["total"] = time.perf_counter() - started
+        if not response.startswith(b"HTTP/1.1 200") or expected not in response:
+            result["outcome"] = "bad_response"
+    except asyncio.TimeoutError:
+        result["outcome"] = "client_timeout"
+    except (ConnectionResetError, BrokenPipeError):
+        result["outcome"] = "reset"
+    except OSError:
+        result["outcome"] = "connect_error"
+    finally:
+        writer.close()
+    return result
+
+
+async def generate_load(port: int, args) -> dict:
+    """
+    concurrency개까지 동시에 교환을 진행한다. rate가 양수이면 초당 rate개씩 일정 간격으로 시작한다(open loop).
+    """
+    sem = asyncio.Semaphore(args.concurrency)
+    results = []
+
+    async def one(index: int):
+        async with sem:
+            results.append(await exchange(port, index, args.request_size, args.timeout))
+
+    started = time.perf_counter()
+    if args.rate > 0:
+        tasks = []
+        for index in range(args.exchanges):
+            tasks.append(asyncio.create_task(one(index)))
+            # 다음 시작 시각까지 기다린다. (누적 오차가 생기지 않게 시작 시각 기준으로 계산)
+            delay = started + (index + 1) / args.rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await asyncio.gather(*tasks)
+    else:
+        await asyncio.gather(*(one(index) for index in range(args.exchanges)))
+    elapsed = time.perf_counter() - started
+
+    outcomes = {name: 0 for name in OUTCOMES}
+    for r in results:
+        outcomes[r["outcome"]] += 1
+    ok = [r for r in results if r["outcome"] == "ok"]
+    return {
+        "exchanges": {
+            "total": len(results),
+            "ok": outcomes["ok"],
+            "failed": len(results) - outcomes["ok"],
+            "seconds": round(elapsed, 4),
+            "ok_per_sec": round(outcomes["ok"] / elapsed, 1) if elapsed > 0 else 0.0,
+        },
+        "outcomes": outcomes,
+        "setup": summarize_ms([r["setup"] for r in results if r["setup"] is not None]),
+        "first_byte": summarize_ms([r["first_byte"] for r in ok]),
+        "total": summarize_ms([r["total"] for r in ok]),
+    }
+
+
+def tunnel_snapshot(server: Server, client_pub: bytes) -> dict:
+    metrics = server.metrics.tunnels.get((client_id(client_pub), TUNNEL_ID))
+    return metrics.snapshot() if metrics else {}
+
+
+def _server_process(server_port: int, server_seed: bytes, client_pub: bytes, args_dict: dict, ready, stop, results):
+    """--isolate-server: 서버를 별도 프로세스에서 실행하고, 종료 시 루프 지연/터널 지표를 돌려준다."""
+    logging.basicConfig(level=logging.ERROR, format="%(name)s: %(message)s", stream=sys.stderr)
+    raise_fd_limit()
+    ALLOWED_CLIENT_KEYS.append(client_pub)
+    configure_crypto_offload(args_dict["crypto_offload_threshold"])
+
+    async def serve():
+        server = Server(server_port, nacl.signing.SigningKey(server_seed),
+                        max_pending_per_tunnel=args_dict["max_pending"])
+        task = asyncio.create_task(server.listen())
+        sampler = LoopLagSampler(args_dict["lag_interval_ms"] / 1000.0)
+        sampler.start()
+        await asyncio.sleep(0.3)
+        ready.set()
+        await asyncio.get_running_loop().run_in_executor(None, stop.wait)
+        results.put({"loop_lag": await sampler.stop(), "tunnel": tunnel_snapshot(server, client_pub)})
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    run_event_loop(serve, args_dict["event_loop"])
+
+
+def parse_target(value: str):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def run_load(args) -> dict:
+    server_port = args.base_port
+    tunnel_port = args.base_port + 1
+    target_port = args.base_port + 2
+    target_host = '127.0.0.1'
+    if args.target:
+        target_host, target_port = parse_target(args.target)
+
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    client_pub = client_key.verify_key.encode()
+
+    server = server_task = server_proc = None
+    if args.isolate_server:
+        ctx = multiprocessing.get_context("spawn")
+        ready, stop, server_results = ctx.Event(), ctx.Event(), ctx.Queue()
+        server_proc = ctx.Process(target=_server_process,
+                                  args=(server_port, server_key.encode(), client_pub, vars(args),
+                                        ready, stop, server_results),
+                                  daemon=True)
+        server_proc.start()
+        if not await asyncio.get_running_loop().run_in_executor(None, ready.wait, 15.0):
+            raise RuntimeError("Server process did not start")
+    else:
+        ALLOWED_CLIENT_KEYS.append(client_pub)
+        server = Server(server_port, server_key, max_pending_per_tunnel=args.max_pending)
+        server_task = asyncio.create_task(server.listen())
+        await asyncio.sleep(0.3)
+
+    target = None if args.target else await start_http_target(target_port, args.service_delay_ms)
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=args.mux_channels,
+        data_pool_size=args.data_pool_size,
+    )
+    tunnel_cfg = TunnelConfig(TUNNEL_ID, tunnel_port, target_host, target_port, compression="never")
+    client.add_tunnel(tunnel_cfg)
+
+    sampler = LoopLagSampler(args.lag_interval_ms / 1000.0)
+    report = {}
+    try:
+        await client.connect()
+        if not await wait_until(lambda: tunnel_cfg.status == "Open", 10.0):
+            raise RuntimeError("Tunnel did not open")
+        await wait_until(lambda: len(client.mux_channels) == args.mux_channels, 10.0)
+        await wait_until(lambda: len(client.data_pool.idle) == args.data_pool_size, 10.0)
+
+        sampler.start()
+        report.update(await generate_load(tunnel_port, args))
+        # 단일 프로세스 모드에서는 서버/클라이언트/부하 생성기가 같은 루프를 쓴다.
+        report["loop_lag"] = {"generator": await sampler.stop()}
+        if server:
+            report["server_tunnel"] = tunnel_snapshot(server, client_pub)
+        logger.info(f"outcomes {report['outcomes']}")
+    finally:
+        await client.disconnect()
+        if target:
+            target.close()
+        if server_task:
+            server_task.cancel()
+            try:
+                await server_task
+            except asyncio.CancelledError:
+                pass
+            ALLOWED_CLIENT_KEYS.remove(client_pub)
+        if server_proc:
+            stop.set()
+            try:
+                remote = await asyncio.get_running_loop().run_in_executor(None, server_results.get, True, 10.0)
+                report.setdefault("loop_lag", {})["server"] = remote["loop_lag"]
+                report["server_tunnel"] = remote["tunnel"]
+            except Exception as e:
+                logger.warning(f"No report from server process: {e}")
+            server_proc.join(timeout=5)
+            if server_proc.is_alive():
+                server_proc.terminate()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MiniTCPTunnel short-lived connection load test")
+    parser.add_argument("--exchanges", type=int, default=5000, help="Total request/response exchanges")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Exchanges in flight at once")
+    parser.add_argument("--rate", type=float, default=0.0, help="Start N exchanges per second (0 = as fast as concurrency allows)")
+    parser.add_argument("--request-size", type=int, default=256, help="Approximate JSON-RPC text size in bytes")
+    parser.add_argument("--timeout", type=float, default=PAIRING_TIMEOUT + 5.0,
+                        help="Per-exchange timeout; keep above the 10 s pairing timeout to classify it")
+    parser.add_argument("--service-delay-ms", type=float, default=0.0, help="Built-in target response delay")
+    parser.add_argument("--target", type=str, default="", help="Use an external HTTP target host:port instead of the built-in one")
+    parser.add_argument("--mux-channels", type=int, default=2)
+    parser.add_argument("--data-pool-size", type=int, default=0)
+    parser.add_argument("--max-pending", type=int, default=DEFAULT_MAX_PENDING_PER_TUNNEL)
+    parser.add_argument("--crypto-offload-threshold", type=int, default=256 * 1024)
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0, help="Event-loop lag sampling interval")
+    parser.add_argument("--event-loop", choices=list(EVENT_LOOP_CHOICES), default="asyncio")
+    parser.add_argument("--isolate-server", action="store_true", help="Run the server in a separate process")
+    parser.add_argument("--base-port", type=int, default=9261, help="Uses base, base+1 (tunnel), base+2 (built-in target)")
+    parser.add_argument("--output", type=str, default="", help="Also write the JSON report to this file")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR,
+                        format="%(name)s: %(message)s", stream=sys.stderr)
+    args.event_loop = resolve_event_loop(args.event_loop)
+    configure_crypto_offload(args.crypto_offload_threshold)
+    fd_limit = raise_fd_limit()
+
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "verbose")},
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "fd_limit": fd_limit},
+    }
+    report.update(run_event_loop(lambda: run_load(args), args.event_loop))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -9,6 +9,7 @@ def main():
     parser = argparse.ArgumentParser(description="MiniTCPTunnel Client")
     parser.add_argument("--config", type=str, default="client.json", help="Path to configuration file")
     parser.add_argument("--verbose", action="store_true", help="Enable debug logs")
+    parser.add_argument("--bench-loop", action="store_true", help="Benchmark FrameCodec throughput on each available event loop and exit")
     args = parser.parse_args()
 
     # Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
@@ -24,6 +25,14 @@ def main():
     log_level = logging.DEBUG if args.verbose else logging.INFO
     # Ensure logs are written to stdout so shell redirection captures them.
     logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(message)s", stream=sys.stdout)
+
+    if args.bench_loop:
+        # UI는 qasync(Qt) 루프에서 돌아야 하므로 루프 선택은 서버에만 적용되고,
+        # 클라이언트 호스트의 측정값은 서버 배치/비교용으로만 사용한다.
+        from mini_tcp_tunnel.shared.loop_bench import bench_event_loops, format_bench_results
+        print(format_bench_results(bench_event_loops()))
+        return
+
     logging.info("Starting MiniTCPTunnel Client...")
 
     # PySide6 + asyncio integration using qasync
@@ -35,6 +44,8 @@ def main():
     from mini_tcp_tunnel.client.ui.state import AppState, TunnelViewModel
     from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
     from mini_tcp_tunnel.client.config_manager import ConfigManager
+    from mini_tcp_tunnel.shared.framing import configure_crypto_offload
+    from mini_tcp_tunnel.shared.tunnel_log import configure_log_sampling
     import nacl.encoding
     
     # 1. Load Config
@@ -70,7 +81,9 @@ def main():
             t_def.remote_port, 
             t_def.local_host, 
             t_def.local_port,
-            enabled=t_def.auto_start
+            enabled=t_def.auto_start,
+            compression=t_def.compression,
+            plaintext=t_def.plaintext
         )
         state.tunnels.append(vm)
 
@@ -83,12 +96,23 @@ def main():
 
     import signal
     
+    # 큰 프레임의 압축/암복호화는 스레드 풀에서 처리해 UI 이벤트 루프가 멈추지 않게 한다.
+    configure_crypto_offload(cfg_mgr.config.crypto_offload_threshold)
+    # 연결 단위 로그 샘플링 (이벤트 카운터는 모두 집계)
+    configure_log_sampling(cfg_mgr.config.log_sample)
+
     # 3. Setup Client Core
     client = ControlClient(
         server_host=state.server_host, 
         server_port=state.server_port, 
         identity_key=id_key,
         server_key=server_pub_key_bytes,
+        mux_channels=cfg_mgr.config.mux_channels,
+        data_pool_size=cfg_mgr.config.data_pool_size,
+        read_size=cfg_mgr.config.read_size,
+        coalesce_ms=cfg_mgr.config.coalesce_ms,
+        loop_watchdog_ms=cfg_mgr.config.loop_watchdog_ms,
+        data_heartbeat_interval=cfg_mgr.config.data_heartbeat_interval,
     )
 
     # 4. Setup UI
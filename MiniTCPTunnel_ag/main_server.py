@@ -9,6 +9,21 @@ def main():
     parser.add_argument("--port", type=int, default=9000, help="Control channel listen port")
     parser.add_argument("--timeout", type=int, default=0, help="Auto shutdown after N seconds (for testing)")
     parser.add_argument("--verbose", action="store_true", help="Enable debug logs")
+    parser.add_argument("--read-size", type=int, default=64 * 1024, help="Public socket read size in bytes (4 KiB - 1 MiB)")
+    parser.add_argument("--coalesce-ms", type=float, default=0.0, help="Wait up to N ms to merge small writes into one frame (0 = off)")
+    parser.add_argument("--crypto-offload-threshold", type=int, default=256 * 1024, help="Run compression/AEAD in a thread pool for frames >= N bytes (0 = off)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes sharing the ports via SO_REUSEPORT (Linux)")
+    parser.add_argument("--crypto-workers", type=int, default=0, help="Thread count for crypto offloading (0 = default)")
+    parser.add_argument("--ticket-lifetime", type=int, default=3600, help="Session resumption ticket lifetime in seconds (0 = disable resumption)")
+    parser.add_argument("--allow-plaintext", action="store_true", help="Let clients open plaintext tunnels (no AEAD/LZ4 on data channels, trusted LAN only)")
+    parser.add_argument("--max-pending", type=int, default=256, help="Max public connections per tunnel waiting for a data channel (excess is dropped)")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve Prometheus metrics on this port (0 = off, workers use port + worker id)")
+    parser.add_argument("--metrics-host", type=str, default="127.0.0.1", help="Bind address for the metrics endpoint")
+    parser.add_argument("--data-heartbeat", type=float, default=15.0, help="Heartbeat interval in seconds for data/mux channels; silent channels are closed after 3 intervals (0 = off)")
+    parser.add_argument("--log-sample", type=int, default=1, help="Log only every Nth per-connection event (counters still see all, 1 = log all)")
+    parser.add_argument("--loop-watchdog-ms", type=float, default=0.0, help="Record event loop lag and callbacks slower than N ms (0 = off)")
+    parser.add_argument("--event-loop", choices=["auto", "asyncio", "uvloop"], default="asyncio", help="Event loop implementation (uvloop falls back to asyncio if unavailable)")
+    parser.add_argument("--bench-loop", action="store_true", help="Benchmark FrameCodec throughput on each available event loop and exit")
     args = parser.parse_args()
 
     # Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
@@ -24,9 +39,19 @@ def main():
     log_level = logging.DEBUG if args.verbose else logging.INFO
     # Ensure logs are written to stdout so shell redirection captures them.
     logging.basicConfig(level=log_level, format="%(asctime)s [%(levelname)s] %(message)s", stream=sys.stdout)
+
+    if args.bench_loop:
+        # 호스트별로 어떤 이벤트 루프가 빠른지 확인하기 위한 루프백 마이크로 벤치마크
+        from mini_tcp_tunnel.shared.loop_bench import bench_event_loops, format_bench_results
+        print(format_bench_results(bench_event_loops()))
+        return
+
     logging.info(f"Starting MiniTCPTunnel Server on port {args.port}...")
 
     from mini_tcp_tunnel.server.core import Server
+    from mini_tcp_tunnel.shared.framing import configure_crypto_offload
+    from mini_tcp_tunnel.shared.tunnel_log import configure_log_sampling
+    from mini_tcp_tunnel.shared.event_loop import run as run_event_loop, resolve_event_loop
     from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
     from mini_tcp_tunnel.server.protocol import add_allowed_client_key
     import nacl.encoding
@@ -65,7 +90,36 @@ def main():
         with open(allowed_keys_file, "w") as f:
             f.write("# Add Client Ed25519 Public Keys here (Hex format), one per line\n")
     
-    server = Server(args.port, id_key)
+    # 큰 프레임의 압축/암복호화를 스레드 풀로 넘겨 여러 코어를 사용한다.
+    configure_crypto_offload(args.crypto_offload_threshold, args.crypto_workers or None)
+    # 연결이 많을 때 연결 단위 로그 포맷팅이 핫 패스를 차지하지 않도록 N개 중 1개만 출력한다.
+    configure_log_sampling(args.log_sample)
+    # uvloop을 요청했지만 설치되어 있지 않으면 기본 asyncio 루프로 대체한다.
+    loop_name = resolve_event_loop(args.event_loop)
+    logging.info(f"Event loop: {loop_name}")
+    if args.workers > 1:
+        # 워커 프로세스 N개가 제어/공용 포트를 나눠 받고, 수퍼바이저가 세션/페어링을 조정한다.
+        from mini_tcp_tunnel.server.cluster import run_cluster
+        logging.info(f"Starting {args.workers} worker processes (SO_REUSEPORT)")
+        run_cluster(
+            args.workers,
+            lambda link: Server(args.port, id_key, read_size=args.read_size, coalesce_ms=args.coalesce_ms, cluster=link,
+                                ticket_lifetime=args.ticket_lifetime,
+                                metrics_port=args.metrics_port, metrics_host=args.metrics_host,
+                                max_pending_per_tunnel=args.max_pending, allow_plaintext=args.allow_plaintext,
+                                loop_watchdog_ms=args.loop_watchdog_ms, data_heartbeat_interval=args.data_heartbeat),
+            timeout=args.timeout,
+            event_loop=loop_name,
+            max_pending_per_tunnel=args.max_pending,
+            ticket_lifetime=args.ticket_lifetime,
+        )
+        return
+
+    server = Server(args.port, id_key, read_size=args.read_size, coalesce_ms=args.coalesce_ms,
+                    ticket_lifetime=args.ticket_lifetime,
+                    metrics_port=args.metrics_port, metrics_host=args.metrics_host,
+                    max_pending_per_tunnel=args.max_pending, allow_plaintext=args.allow_plaintext,
+                    loop_watchdog_ms=args.loop_watchdog_ms, data_heartbeat_interval=args.data_heartbeat)
     
     async def run_server():
         try:
@@ -79,7 +133,7 @@ def main():
         except Exception as e:
             logging.error(f"Server error: {e}")
 
-    asyncio.run(run_server())
+    run_event_loop(run_server, loop_name)
 
 if __name__ == "__main__":
     main()
@@ -1,7 +1,7 @@
 import os
 import json
 import logging
-from typing import List, Optional
+from typing import List, Literal, Optional
 import nacl.signing
 import nacl.encoding
 from pydantic import BaseModel
@@ -15,12 +15,34 @@ class TunnelDefinition(BaseModel):
     local_host: str = "127.0.0.1"
     local_port: int
     auto_start: bool = False
+    # 데이터 프레임 LZ4 압축 정책: "always" / "never" / "auto"
+    # 이미 암호화된 HTTPS나 미디어 트래픽 위주라면 "never"가 CPU를 아낀다.
+    compression: Literal["always", "never", "auto"] = "auto"
+    # 평문 모드: 서버가 --allow-plaintext로 허용하면 데이터 채널에서 AEAD/LZ4를 건너뛰고 커널 복사로 중계한다.
+    # 인증(핸드셰이크/HMAC 토큰)은 그대로지만 트래픽은 암호화되지 않으므로 신뢰할 수 있는 내부망에서만 쓴다.
+    plaintext: bool = False
 
 class ClientConfigModel(BaseModel):
     server_host: str = "127.0.0.1"
     server_port: int = 9000
     server_pub_key: Optional[str] = None
     identity_private_key_hex: Optional[str] = None
+    # 미리 연결해 둘 다중화 데이터 채널 수 (0이면 연결마다 데이터 채널을 새로 만든다)
+    mux_channels: int = 2
+    # 핸드셰이크를 미리 끝내 둘 유휴 데이터 채널 수 (다중화를 쓰지 않을 때 유효)
+    data_pool_size: int = 0
+    # 로컬 소켓에서 한 번에 읽을 크기(bytes, 4 KiB ~ 1 MiB로 보정)
+    read_size: int = 64 * 1024
+    # 작은 쓰기를 한 프레임으로 모으기 위해 기다리는 시간(ms, 0이면 비활성화)
+    coalesce_ms: float = 0.0
+    # 이 크기(bytes) 이상의 프레임은 압축/암복호화를 스레드 풀에서 처리한다. (0이면 비활성화)
+    crypto_offload_threshold: int = 256 * 1024
+    # 데이터 채널/다중화 채널 HEARTBEAT 간격(초). 상대가 간격 3번 동안 아무 프레임도 보내지 않으면 채널을 끊는다. (0이면 비활성화)
+    data_heartbeat_interval: float = 15.0
+    # 연결 단위 로그를 N개 중 1개만 출력한다. (이벤트 카운터는 항상 모두 집계, 1이면 모두 출력)
+    log_sample: int = 1
+    # 이벤트 루프 진단: 이 시간(ms) 이상 걸린 콜백을 기록하고 루프 지연을 주기적으로 로그로 남긴다. (0이면 비활성화)
+    loop_watchdog_ms: float = 0.0
     tunnels: List[TunnelDefinition] = []
 
 class ConfigManager:
@@ -12,8 +12,18 @@ from ..shared.constants import (
     MsgType,
     HANDSHAKE_HELLO_LEN,
     MAX_HANDSHAKE_LEN,
+    RESUME_NONCE_LEN,
+    RESUME_EPH_LEN,
+    RESUME_SERVER_HELLO_LEN,
+    RESUME_BINDER_LEN,
     HMAC_KEY_LEN,
     HMAC_TOKEN_LEN,
+    DEFAULT_MUX_CHANNELS,
+    DEFAULT_READ_SIZE,
+    DEFAULT_COALESCE_MS,
+    DEFAULT_DATA_HEARTBEAT_INTERVAL,
+    TUNNEL_FLAG_PLAINTEXT,
+    CONN_FLAG_PLAINTEXT,
 )
 from ..shared.crypto_utils import (
     CryptoContext,
@@ -21,21 +31,42 @@ from ..shared.crypto_utils import (
     derive_session_keys
 )
 from ..shared.framing import FrameCodec
+from ..shared.compression import CompressionPolicy, parse_compression_mode
+from ..shared.stream_io import clamp_read_size, read_coalesced, write_eof, join_pipes
+from ..shared.mux import MuxChannel, MuxStream
+from ..shared.raw_relay import relay_streams
+from ..shared.loop_watchdog import LoopWatchdog, task_category
+from ..shared.tunnel_log import TunnelLog, TunnelEvent, event_counts
+from ..shared.liveness import LivenessWheel, abort_transport
+from ..shared.resumption import (
+    ClientTicket, client_binder, server_binder, build_resume_hello_body, derive_resume_keys,
+)
+from .data_pool import DataChannelPool
 from cryptography.hazmat.primitives.asymmetric import x25519
 from cryptography.hazmat.primitives import serialization
 
 class ClientHandshake:
     def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, 
                  client_identity_key: nacl.signing.SigningKey,
-                 expected_server_pub_key: Optional[bytes] = None):
+                 expected_server_pub_key: Optional[bytes] = None,
+                 ticket: Optional[ClientTicket] = None):
         self.reader = reader
         self.writer = writer
         self.client_identity_key = client_identity_key
         self.expected_server_pub_key = expected_server_pub_key # For strict pinning
+        # 이전 제어 세션에서 받은 재개 티켓 (있으면 1-RTT 재개를 먼저 시도한다)
+        self.ticket = ticket
+        self.resumed = False
+        self.ticket_rejected = False
         self.logger = logging.getLogger("ClientHandshake")
 
     async def perform_handshake(self) -> Optional[FrameCodec]:
         try:
+            if self.ticket and self.ticket.is_valid():
+                codec = await self._resume()
+                # 서버가 티켓을 거절한 경우에만 같은 연결에서 전체 핸드셰이크로 넘어간다.
+                if codec or not self.ticket_rejected:
+                    return codec
             # 핸드셰이크 시작 시점을 로그로 남겨 연결 흐름을 추적한다.
             self.logger.debug("클라이언트 핸드셰이크 시작")
             # --- GENERATE CLIENT HELLO ---
@@ -94,7 +125,7 @@ class ClientHandshake:
             server_sig = server_hello_bytes[79:143] # 64 bytes
 
             if ver != PROTOCOL_VERSION:
-                self.logger.warning("Server version mismatch")
+                self.logger.warning(f"Server version mismatch: ver={ver}, expected={PROTOCOL_VERSION}")
                 return None
             if role != Role.SERVER:
                 self.logger.warning("Invalid server role")
@@ -131,8 +162,8 @@ class ClientHandshake:
             key_c2s, key_s2c, nonce_base_c2s, nonce_base_s2c = derive_session_keys(shared_secret, salt, info)
 
             # Client: Sends C2S, Receives S2C
-            write_ctx = CryptoContext(key_c2s, nonce_base_c2s, role_is_sender=True)
-            read_ctx = CryptoContext(key_s2c, nonce_base_s2c, role_is_sender=False)
+            write_ctx = CryptoContext(key_c2s, nonce_base_c2s)
+            read_ctx = CryptoContext(key_s2c, nonce_base_s2c)
             
             codec = FrameCodec(self.reader, self.writer, read_ctx=read_ctx, write_ctx=write_ctx)
             return codec
@@ -141,24 +172,85 @@ class ClientHandshake:
             self.logger.error(f"Client Handshake failed: {e}")
             return None
 
+    async def _resume(self) -> Optional[FrameCodec]:
+        """
+        티켓으로 세션을 재개한다. 서명 없이 재개 비밀과 X25519 공유 비밀, 양쪽 nonce로 새 키를 유도한다.
+        서버가 길이 0으로 응답하면 ticket_rejected를 켜고 None을 반환한다.
+        """
+        client_eph_priv = generate_ephemeral_key()
+        client_eph_pub_bytes = client_eph_priv.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        client_nonce = nacl.utils.random(RESUME_NONCE_LEN)
+        body = build_resume_hello_body(self.ticket.ticket, client_nonce, client_eph_pub_bytes)
+        hello = body + client_binder(self.ticket.secret, body)
+        self.writer.write(struct.pack(">I", len(hello)) + hello)
+        await self.writer.drain()
+
+        try:
+            resp_len = struct.unpack(">I", await self.reader.readexactly(4))[0]
+            if resp_len == 0:
+                self.logger.info("Session ticket rejected. Falling back to full handshake.")
+                self.ticket_rejected = True
+                return None
+            if resp_len != RESUME_SERVER_HELLO_LEN:
+                self.logger.error(f"Invalid resume response length: {resp_len}")
+                return None
+            resp = await self.reader.readexactly(resp_len)
+        except asyncio.IncompleteReadError:
+            self.logger.error("Handshake conn closed")
+            return None
+
+        server_body = resp[:-RESUME_BINDER_LEN]
+        ver = struct.unpack(">H", server_body[0:2])[0]
+        if ver != PROTOCOL_VERSION or server_body[2] != Role.SERVER:
+            self.logger.warning("Invalid resume response header")
+            return None
+        # 재개 비밀은 핀닝된 서버와의 인증된 세션에서만 받았으므로 binder가 곧 서버 인증이다.
+        if not hmac.compare_digest(resp[-RESUME_BINDER_LEN:], server_binder(self.ticket.secret, hello, server_body)):
+            self.logger.error("Bad resume binder from server")
+            return None
+        server_nonce = server_body[3:3 + RESUME_NONCE_LEN]
+        server_eph_pub_bytes = server_body[3 + RESUME_NONCE_LEN:3 + RESUME_NONCE_LEN + RESUME_EPH_LEN]
+
+        dh_shared = client_eph_priv.exchange(x25519.X25519PublicKey.from_public_bytes(server_eph_pub_bytes))
+        key_c2s, key_s2c, nonce_base_c2s, nonce_base_s2c = derive_resume_keys(
+            self.ticket.secret, dh_shared, client_nonce, server_nonce)
+        write_ctx = CryptoContext(key_c2s, nonce_base_c2s)
+        read_ctx = CryptoContext(key_s2c, nonce_base_s2c)
+        self.resumed = True
+        self.logger.debug("클라이언트 세션 재개 성공")
+        return FrameCodec(self.reader, self.writer, read_ctx=read_ctx, write_ctx=write_ctx)
+
 class TunnelConfig:
-    def __init__(self, tid: str, remote_port: int, local_host: str, local_port: int, enabled: bool = True):
+    def __init__(self, tid: str, remote_port: int, local_host: str, local_port: int, enabled: bool = True,
+                 compression: str = "auto", plaintext: bool = False):
         self.tid = tid
         self.remote_port = remote_port
         self.local_host = local_host
         self.local_port = local_port
         self.status = "Stopped"
         self.enabled = enabled
+        # 데이터 프레임 압축 정책: "always" / "never" / "auto"
+        self.compression = parse_compression_mode(compression)
+        # 평문 모드 요청: 서버가 허용하면 데이터 채널에서 AEAD/LZ4를 건너뛴다. (신뢰할 수 있는 내부망 전용)
+        self.plaintext = plaintext
 
     def __eq__(self, other):
         if not isinstance(other, TunnelConfig): return False
         return (self.tid == other.tid and 
                 self.remote_port == other.remote_port and 
                 self.local_host == other.local_host and 
-                self.local_port == other.local_port)
+                self.local_port == other.local_port and
+                self.compression == other.compression and
+                self.plaintext == other.plaintext)
 
 class ControlClient:
-    def __init__(self, server_host: str, server_port: int, identity_key: nacl.signing.SigningKey, server_key: Optional[bytes] = None):
+    def __init__(self, server_host: str, server_port: int, identity_key: nacl.signing.SigningKey, server_key: Optional[bytes] = None,
+                 mux_channels: int = DEFAULT_MUX_CHANNELS, data_pool_size: int = 0,
+                 read_size: int = DEFAULT_READ_SIZE, coalesce_ms: float = DEFAULT_COALESCE_MS,
+                 loop_watchdog_ms: float = 0.0, data_heartbeat_interval: float = DEFAULT_DATA_HEARTBEAT_INTERVAL):
         self.server_host = server_host
         self.server_port = server_port
         self.identity_key = identity_key
@@ -168,8 +260,12 @@ class ControlClient:
         self.is_connected = False
         self.tunnels: Dict[str, TunnelConfig] = {} # id -> config
         self.logger = logging.getLogger("ControlClient")
+        # 연결마다 찍히는 로그는 레벨 확인/샘플링을 거치고 이벤트 카운터로 집계한다.
+        self.events = TunnelLog(self.logger)
         # 제어 세션에서 수신한 HMAC 키(데이터 채널 바인딩에 사용)
         self.session_hmac_key: Optional[bytes] = None
+        # 서버가 발급한 세션 재개 티켓. 제어 세션이 끊겨도 유효 시간 동안 재연결/데이터 채널에 사용한다.
+        self.session_ticket: Optional[ClientTicket] = None
         
         # Callbacks for UI updates
         self.on_status_change: Optional[Callable[[str], None]] = None
@@ -188,7 +284,34 @@ class ControlClient:
         self.HEARTBEAT_TIMEOUT = 30 
 
         self.running_tunnels: Dict[str, TunnelConfig] = {} # Currently active on server
+
+        # 로컬 소켓 읽기 크기와 작은 쓰기 병합 대기 시간 (대용량 전송 시 프레임 수를 줄인다)
+        self.read_size = clamp_read_size(read_size)
+        self.coalesce_ms = max(0.0, coalesce_ms)
+
+        # 스트림 다중화: 미리 인증해 둔 데이터 채널 위로 외부 연결을 StreamID로 실어 보낸다.
+        # 0이면 외부 연결마다 데이터 채널을 새로 만드는 기존 방식만 사용한다.
+        self.mux_channel_count = mux_channels
+        self.mux_tasks: List[asyncio.Task] = []
+        self.mux_channels: Dict[str, MuxChannel] = {}
+
+        # 다중화를 쓰지 않을 때(또는 다중화 채널이 모두 끊겼을 때) 사용할
+        # 핸드셰이크 완료 상태의 유휴 데이터 채널 풀
+        self.data_pool = DataChannelPool(self._open_data_codec, data_pool_size)
+        # 이벤트 루프는 태스크를 약한 참조로만 보관하므로, 분리 실행한 태스크가
+        # 실행 도중 GC로 사라지지 않도록 완료될 때까지 참조를 유지한다.
+        self._background_tasks = set()
+        # 이벤트 루프 지연/느린 콜백 진단 (loop_watchdog_ms 이상 걸린 콜백을 기록, 0이면 비활성화)
+        self.loop_watchdog = LoopWatchdog("client", loop_watchdog_ms) if loop_watchdog_ms > 0 else None
+        # 데이터 채널/다중화 채널의 HEARTBEAT와 무응답 채널 정리를 타이머 바퀴 하나로 처리한다. (0이면 비활성화)
+        self.liveness = LivenessWheel("client", data_heartbeat_interval) if data_heartbeat_interval > 0 else None
         
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
     def add_tunnel(self, config: TunnelConfig):
         # Just store in a list? 
         # ControlClient stores 'tunnels' as the "Goal State"? 
@@ -201,6 +324,10 @@ class ControlClient:
         """Starts the connection manager."""
         if self.should_reconnect: return # Already trying
         self.should_reconnect = True
+        if self.loop_watchdog:
+            self.loop_watchdog.start()
+        if self.liveness:
+            self.liveness.start()
         self.connection_task = asyncio.create_task(self.connection_loop())
 
     async def sync_tunnels(self, desired_configs: List[TunnelConfig]):
@@ -248,11 +375,12 @@ class ControlClient:
             # 연결 상태가 없을 때는 요청이 무시됨을 기록한다.
             self.logger.warning(f"OpenTunnel 요청 무시됨(연결 없음): {tunnel.tid}")
             return
-        # 프로토콜 페이로드 구성: remote_port + tunnel_id 길이 + tunnel_id
+        # 프로토콜 페이로드 구성: remote_port + tunnel_id 길이 + tunnel_id + 압축 정책(1) + flags(1)
         tid_bytes = tunnel.tid.encode('utf-8')
         payload = struct.pack(">I", tunnel.remote_port) + \
                   struct.pack(">I", len(tid_bytes)) + \
-                  tid_bytes
+                  tid_bytes + \
+                  bytes([tunnel.compression, TUNNEL_FLAG_PLAINTEXT if tunnel.plaintext else 0])
         
         # 동시 전송 충돌을 막기 위해 write_lock으로 보호해 전송한다.
         async with self.write_lock:
@@ -303,12 +431,18 @@ class ControlClient:
             self.connection_task = None
 
         await self._close_connection()
+        if self.liveness:
+            await self.liveness.stop()
+        if self.loop_watchdog:
+            await self.loop_watchdog.stop()
         if self.on_status_change: self.on_status_change("Disconnected")
 
     async def _close_connection(self):
         self.is_connected = False
         # 제어 세션이 끊기면 데이터 채널 바인딩 키도 폐기한다.
         self.session_hmac_key = None
+        await self._stop_mux_channels()
+        await self.data_pool.stop()
         if self.heartbeat_task:
             self.heartbeat_task.cancel()
             try:
@@ -321,6 +455,12 @@ class ControlClient:
             await self.codec.close()
             self.codec = None
 
+        # 서버는 제어 세션이 끊기면 공용 리스너를 모두 닫으므로, 재연결 후 sync_tunnels가 다시 열도록 비운다.
+        for tid, tunnel in list(self.running_tunnels.items()):
+            tunnel.status = "Stopped"
+            if self.on_tunnel_status_change: self.on_tunnel_status_change(tid, "Stopped")
+        self.running_tunnels.clear()
+
     async def connection_loop(self):
         self.logger.info("Connection Manager Started")
         while self.should_reconnect:
@@ -362,8 +502,7 @@ class ControlClient:
             # 연결 시점 로깅은 방화벽/라우팅 문제 확인에 유용하다.
             self.logger.debug("TCP 연결 성립, 핸드셰이크 진행")
             
-            hs = ClientHandshake(reader, writer, self.identity_key, self.server_key)
-            self.codec = await hs.perform_handshake()
+            self.codec = await self._client_handshake(reader, writer)
             
             if self.codec:
                 self.is_connected = True
@@ -373,7 +512,12 @@ class ControlClient:
                 
                 # Start Tasks
                 self.heartbeat_task = asyncio.create_task(self.heartbeat_loop())
-                asyncio.create_task(self.loop())
+                self._spawn(self.loop())
+
+                # 서버는 첫 프레임을 보고 제어 세션을 등록하므로, 열 터널이 없어도
+                # 바로 AUTH_OK(HMAC 키/재개 티켓)를 받도록 하트비트를 먼저 보낸다.
+                async with self.write_lock:
+                    await self.codec.write_frame(bytes([MsgType.HEARTBEAT, 0]) + struct.pack(">I", 0))
                 
                 # Sync Tunnels (Apply current config)
                 await self.sync_tunnels(list(self.tunnels.values()))
@@ -457,6 +601,8 @@ class ControlClient:
             await self.handle_tunnel_status(payload)
         elif msg_type == MsgType.AUTH_OK:
             await self.handle_auth_ok(payload)
+        elif msg_type == MsgType.SESSION_TICKET:
+            self.handle_session_ticket(payload)
         elif msg_type == MsgType.HEARTBEAT:
             # Just Pong receiving. Activity already updated.
             # self.logger.debug("Received Heartbeat Echo")
@@ -475,6 +621,18 @@ class ControlClient:
         self.session_hmac_key = payload
         # 보안 상 키 값을 로그에 남기지 않고 수신 완료만 기록한다.
         self.logger.info("HMAC 세션 키 수신 완료")
+        # HMAC 키가 있어야 다중화 채널을 등록할 수 있으므로 이 시점에 시작한다.
+        self._start_mux_channels()
+        self.data_pool.start()
+
+    def handle_session_ticket(self, payload: bytes):
+        """서버가 발급한 재개 티켓을 보관한다. (키 값은 로그에 남기지 않는다)"""
+        ticket = ClientTicket.from_payload(payload)
+        if not ticket:
+            self.logger.error(f"SESSION_TICKET payload length invalid: {len(payload)}")
+            return
+        self.session_ticket = ticket
+        self.logger.info("세션 재개 티켓 수신 완료")
 
     async def handle_tunnel_status(self, payload: bytes):
         """
@@ -516,84 +674,248 @@ class ControlClient:
         except Exception as e:
             self.logger.error(f"TunnelStatus parse error: {e}")
 
+    @staticmethod
+    def _parse_conn_payload(payload: bytes):
+        """
+        INCOMING_CONN / STREAM_OPEN 페이로드를 파싱해 (tunnel_id, conn_id, flags)를 반환한다.
+        페이로드 형식: | tunnel_id_len(4) | tunnel_id | conn_id_len(4) | conn_id | [flags(1)] |
+        """
+        p1_len = struct.unpack(">I", payload[0:4])[0]
+        tid = payload[4:4+p1_len].decode('utf-8')
+        offset = 4+p1_len
+        p2_len = struct.unpack(">I", payload[offset:offset+4])[0]
+        conn_id = payload[offset+4:offset+4+p2_len].decode('utf-8')
+        rest = payload[offset+4+p2_len:]
+        return tid, conn_id, (rest[0] if rest else 0)
+
+    def _make_ready_payload(self, conn_id: str) -> Optional[bytes]:
+        """
+        DATA_CONN_READY / MUX_CHANNEL_READY 공통 페이로드를 만든다.
+        payload 포맷: | token_len(4) | token | conn_id_len(4) | conn_id |
+        """
+        if not self.session_hmac_key:
+            # 제어 세션에서 HMAC 키를 받지 못했다면 데이터 채널은 즉시 중단한다.
+            self.logger.error("HMAC 세션 키가 없어 데이터 채널을 생성할 수 없습니다.")
+            return None
+        conn_id_bytes = conn_id.encode('utf-8')
+        token = hmac.new(self.session_hmac_key, conn_id_bytes, hashlib.sha256).digest()
+        if len(token) != HMAC_TOKEN_LEN:
+            self.logger.error("HMAC 토큰 길이가 예상과 다릅니다.")
+            return None
+        return struct.pack(">I", len(token)) + token + \
+               struct.pack(">I", len(conn_id_bytes)) + conn_id_bytes
+
+    async def _client_handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Optional[FrameCodec]:
+        """보관 중인 티켓이 있으면 재개를, 없거나 거절되면 전체 핸드셰이크를 수행한다."""
+        hs = ClientHandshake(reader, writer, self.identity_key, self.server_key, self.session_ticket)
+        with task_category("handshake"):
+            codec = await hs.perform_handshake()
+        if hs.ticket_rejected and self.session_ticket is hs.ticket:
+            # 만료/서버 키 변경 등으로 거절된 티켓은 버리고 다음 AUTH_OK에서 새로 받는다.
+            self.session_ticket = None
+        if hs.resumed:
+            self.logger.debug("Handshake resumed with session ticket")
+        return codec
+
+    async def _open_data_codec(self) -> Optional[FrameCodec]:
+        """서버로 새 데이터 채널을 연결하고 핸드셰이크까지 마친 코덱을 반환한다."""
+        s_reader, s_writer = await asyncio.open_connection(self.server_host, self.server_port)
+        codec = await self._client_handshake(s_reader, s_writer)
+        if not codec:
+            s_writer.close()
+        return codec
+
+    def get_data_pool_stats(self) -> Dict[str, int]:
+        """데이터 채널 풀의 hit/miss 카운터를 반환한다."""
+        return self.data_pool.get_stats()
+
+    def get_event_counts(self) -> Dict[str, int]:
+        """연결/프레임 단위 이벤트 카운터 (프로세스 공용, 로그 샘플링과 무관하게 모두 집계)."""
+        return event_counts()
+
+    def get_liveness_stats(self) -> Optional[dict]:
+        """데이터 채널 생존 확인 집계(감시 중인 채널 수, 보낸 HEARTBEAT 수, 무응답으로 끊은 채널 수)."""
+        return self.liveness.snapshot() if self.liveness else None
+
+    def get_loop_stats(self) -> Optional[dict]:
+        """루프 워치독 집계(지연 분위수, 느린 콜백, 분류별 시간). 워치독을 켜지 않았으면 None."""
+        return self.loop_watchdog.snapshot() if self.loop_watchdog else None
+
     async def handle_incoming_conn(self, payload: bytes):
-        # Payload: | len(4) | tid | len(4) | conn_id |
+        # Payload: | len(4) | tid | len(4) | conn_id | [flags(1)] |
         try:
-            p1_len = struct.unpack(">I", payload[0:4])[0]
-            tid = payload[4:4+p1_len].decode('utf-8')
-            offset = 4+p1_len
-            p2_len = struct.unpack(">I", payload[offset:offset+4])[0]
-            conn_id = payload[offset+4:offset+4+p2_len].decode('utf-8')
+            tid, conn_id, flags = self._parse_conn_payload(payload)
             
-            self.logger.info(f"Incoming connection for tunnel {tid}, conn_id={conn_id}")
+            self.events.sampled(TunnelEvent.INCOMING_CONN_RECEIVED, logging.INFO,
+                                "Incoming connection for tunnel %s, conn_id=%s", tid, conn_id)
             
             tunnel = self.tunnels.get(tid)
             if not tunnel:
                 self.logger.warning(f"Unknown tunnel id {tid}")
                 return
 
-            asyncio.create_task(self.spawn_data_channel(tunnel, conn_id))
+            self._spawn(self.spawn_data_channel(tunnel, conn_id, bool(flags & CONN_FLAG_PLAINTEXT)))
             # 데이터 채널 생성 요청을 기록한다.
-            self.logger.debug(f"Data channel spawn requested: tunnel_id={tid}, conn_id={conn_id}")
+            self.events.sampled(TunnelEvent.DATA_CHANNEL_SPAWNED, logging.DEBUG,
+                                "Data channel spawn requested: tunnel_id=%s, conn_id=%s", tid, conn_id)
             
         except Exception as e:
             self.logger.error(f"Parse incoming conn error: {e}")
 
-    async def spawn_data_channel(self, tunnel: TunnelConfig, conn_id: str):
+    async def spawn_data_channel(self, tunnel: TunnelConfig, conn_id: str, plaintext: bool = False):
         try:
-            # 1. Connect to Server (Data Channel)
-            self.logger.debug(f"Data channel 연결 시작: conn_id={conn_id}")
-            s_reader, s_writer = await asyncio.open_connection(self.server_host, self.server_port)
-            
-            # 2. Handshake for Data Channel
-            hs = ClientHandshake(s_reader, s_writer, self.identity_key, self.server_key)
-            codec = await hs.perform_handshake()
-            if not codec:
-                self.logger.error("Data channel handshake failed")
-                return
-            self.logger.debug(f"Data channel handshake 완료: conn_id={conn_id}")
+            # 1. Claim a pre-warmed channel, or Connect to Server (Data Channel) + Handshake
+            codec = self.data_pool.acquire() if self.data_pool.size > 0 else None
+            pooled = codec is not None
+            if codec:
+                # 풀 통계 dict는 디버그 로그가 켜져 있을 때만 만든다.
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug("Data channel pool hit: conn_id=%s, stats=%s", conn_id, self.data_pool.get_stats())
+            else:
+                self.logger.debug("Data channel 연결 시작: conn_id=%s", conn_id)
+                codec = await self._open_data_codec()
+                if not codec:
+                    self.logger.error("Data channel handshake failed")
+                    return
+                self.logger.debug("Data channel handshake 완료: conn_id=%s", conn_id)
             
-            # 3. Send DATA_CONN_READY
-            if not self.session_hmac_key:
-                # 제어 세션에서 HMAC 키를 받지 못했다면 데이터 채널은 즉시 중단한다.
-                self.logger.error("HMAC 세션 키가 없어 데이터 채널을 생성할 수 없습니다.")
-                await codec.close()
-                return
-            conn_id_bytes = conn_id.encode('utf-8')
-            token = hmac.new(self.session_hmac_key, conn_id_bytes, hashlib.sha256).digest()
-            if len(token) != HMAC_TOKEN_LEN:
-                self.logger.error("HMAC 토큰 길이가 예상과 다릅니다.")
+            # 2. Send DATA_CONN_READY
+            payload = self._make_ready_payload(conn_id)
+            if payload is None:
                 await codec.close()
                 return
-            # payload 포맷: | token_len(4) | token | conn_id_len(4) | conn_id |
-            payload = struct.pack(">I", len(token)) + token + \
-                      struct.pack(">I", len(conn_id_bytes)) + conn_id_bytes
             header = bytes([MsgType.DATA_CONN_READY, 0]) + struct.pack(">I", 0)
-            await codec.write_frame(header + payload)
-            # 데이터 채널 준비 완료 통지 로그
-            self.logger.debug(f"DATA_CONN_READY 전송: conn_id={conn_id}")
-            
-            # 4. Connect to Local Target
-            self.logger.info(f"Connecting to local target {tunnel.local_host}:{tunnel.local_port}")
             try:
-                l_reader, l_writer = await asyncio.open_connection(tunnel.local_host, tunnel.local_port)
-            except Exception as e:
-                self.logger.error(f"Failed to connect local: {e}")
-                await codec.close()
-                return
-            self.logger.info(f"Local target 연결 성공: {tunnel.local_host}:{tunnel.local_port}")
+                await codec.write_frame(header + payload)
+            except (ConnectionError, OSError) as e:
+                if not pooled:
+                    raise
+                # 풀에서 쉬는 동안 NAT/중간 장비가 끊은 채널일 수 있다. 버리고 새 채널로 한 번만 다시 시도한다.
+                self.logger.warning(f"Pooled data channel is dead ({e}), reconnecting: conn_id={conn_id}")
+                self.data_pool.discard_stale(codec)
+                codec = await self._open_data_codec()
+                if not codec:
+                    self.logger.error("Data channel handshake failed")
+                    return
+                await codec.write_frame(header + payload)
+            # 데이터 채널 준비 완료 통지 로그
+            self.logger.debug("DATA_CONN_READY 전송: conn_id=%s", conn_id)
             
-            # 5. Bridge
-            self.logger.debug(f"브리지 시작: conn_id={conn_id}")
-            await self.bridge_data(codec, l_reader, l_writer)
-            self.logger.debug(f"브리지 종료: conn_id={conn_id}")
+            # 3. Connect to Local Target + Bridge
+            # 평문 연결이면 서버도 DATA_CONN_READY 이후를 원시 바이트로 다루므로 여기서부터 프레임을 쓰지 않는다.
+            await self._bridge_to_local(tunnel, codec, conn_id, plaintext)
             
         except Exception as e:
             self.logger.error(f"Spawn data channel error: {e}")
 
-    async def bridge_data(self, server_codec: FrameCodec, local_r: asyncio.StreamReader, local_w: asyncio.StreamWriter):
-        # 데이터 채널 브리지 함수 진입 로그
-        self.logger.debug("bridge_data 진입")
+    async def _bridge_to_local(self, tunnel: TunnelConfig, codec, conn_id: str, plaintext: bool = False):
+        """로컬 대상에 연결한 뒤 데이터 채널(또는 다중화 스트림)과 브리지한다."""
+        self.logger.debug("Connecting to local target %s:%d", tunnel.local_host, tunnel.local_port)
+        try:
+            l_reader, l_writer = await asyncio.open_connection(tunnel.local_host, tunnel.local_port)
+        except Exception as e:
+            self.logger.error(f"Failed to connect local: {e}")
+            await codec.close()
+            return
+        self.events.sampled(TunnelEvent.LOCAL_CONNECTED, logging.INFO,
+                            "Local target 연결 성공: %s:%d", tunnel.local_host, tunnel.local_port)
+
+        self.events.sampled(TunnelEvent.BRIDGE_STARTED, logging.DEBUG,
+                            "브리지 시작: conn_id=%s, plaintext=%s", conn_id, plaintext)
+        if plaintext:
+            await self.bridge_plaintext(codec, l_reader, l_writer)
+        else:
+            await self.bridge_data(codec, l_reader, l_writer, CompressionPolicy(tunnel.compression))
+        self.events.sampled(TunnelEvent.BRIDGE_FINISHED, logging.DEBUG, "브리지 종료: conn_id=%s", conn_id)
+
+    def _start_mux_channels(self):
+        if self.mux_channel_count <= 0 or self.mux_tasks:
+            return
+        for index in range(self.mux_channel_count):
+            self.mux_tasks.append(asyncio.create_task(self.mux_channel_loop(f"mux-{index}")))
+
+    async def _stop_mux_channels(self):
+        tasks, self.mux_tasks = self.mux_tasks, []
+        for task in tasks:
+            task.cancel()
+        for channel in list(self.mux_channels.values()):
+            await channel.close()
+        self.mux_channels.clear()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def mux_channel_loop(self, channel_id: str):
+        """
+        다중화 데이터 채널 하나를 유지한다.
+        채널이 끊기면 제어 세션이 살아 있는 동안 다시 연결한다.
+        """
+        while self.is_connected and self.session_hmac_key:
+            channel = None
+            try:
+                codec = await self._open_data_codec()
+                if not codec:
+                    self.logger.error(f"Mux channel handshake failed: {channel_id}")
+                else:
+                    payload = self._make_ready_payload(channel_id)
+                    if payload is None:
+                        await codec.close()
+                        return
+                    header = bytes([MsgType.MUX_CHANNEL_READY, 0]) + struct.pack(">I", 0)
+                    await codec.write_frame(header + payload)
+                    channel = MuxChannel(codec, channel_id, on_stream_open=self.handle_stream_open,
+                                         liveness=self.liveness)
+                    self.mux_channels[channel_id] = channel
+                    self.logger.info(f"Mux channel ready: {channel_id}")
+                    await channel.run()
+                    self.logger.info(f"Mux channel closed: {channel_id}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Mux channel error ({channel_id}): {e}")
+            finally:
+                if channel and self.mux_channels.get(channel_id) is channel:
+                    del self.mux_channels[channel_id]
+            # 재연결 폭주를 막기 위해 잠시 쉰다.
+            await asyncio.sleep(1)
+
+    async def handle_stream_open(self, stream: MuxStream, payload: bytes):
+        """서버가 다중화 채널 위에 연 스트림을 로컬 대상과 연결한다."""
+        try:
+            tid, conn_id, _ = self._parse_conn_payload(payload)
+        except Exception as e:
+            self.logger.error(f"Parse stream open error: {e}")
+            await stream.close()
+            return
+        self.events.sampled(TunnelEvent.STREAM_OPENED, logging.INFO,
+                            "Incoming stream for tunnel %s, conn_id=%s, stream_id=%d", tid, conn_id, stream.stream_id)
+        tunnel = self.tunnels.get(tid)
+        if not tunnel:
+            self.logger.warning(f"Unknown tunnel id {tid}")
+            await stream.close()
+            return
+        try:
+            await self._bridge_to_local(tunnel, stream, conn_id)
+        except Exception as e:
+            self.logger.error(f"Stream bridge error: {e}")
+            await stream.close()
+
+    async def bridge_plaintext(self, server_codec: FrameCodec, local_r: asyncio.StreamReader,
+                               local_w: asyncio.StreamWriter):
+        """
+        평문 터널 브리지: 데이터 채널과 로컬 소켓을 프레임 없이 커널 splice(가능하면)로 직접 잇는다.
+        반종료는 DATA_EOF 대신 TCP 송신 종료로 그대로 전달된다.
+        """
+        try:
+            if not await relay_streams(server_codec.reader, server_codec.writer, local_r, local_w):
+                self.events.sampled(TunnelEvent.BRIDGE_ABORTED, logging.DEBUG, "평문 중계 비정상 종료")
+        except Exception:
+            self.logger.exception("평문 중계 예외")
+        finally:
+            local_w.close()
+            await server_codec.close()
+
+    async def bridge_data(self, server_codec: FrameCodec, local_r: asyncio.StreamReader, local_w: asyncio.StreamWriter,
+                          compression: Optional[CompressionPolicy] = None):
         # 디버깅을 위해 송수신 바이트 통계를 수집한다.
         # 너무 많은 로그를 피하기 위해 "첫 패킷"과 "종료 시 요약"만 기록한다.
         stats = {
@@ -602,18 +924,43 @@ class ControlClient:
             "local_to_server_bytes": 0,
             "local_to_server_packets": 0,
         }
-        async def pipe_server_to_local():
+        # 1:1 데이터 채널은 타이머 바퀴에 등록해 유휴 중에도 HEARTBEAT로 생존을 확인한다.
+        # (다중화 스트림은 채널 단위로 확인하므로 여기서 등록하지 않는다)
+        alive = None
+        if self.liveness and isinstance(server_codec, FrameCodec):
+            async def send_heartbeat():
+                if alive.tx_open:
+                    await server_codec.write_message(MsgType.HEARTBEAT, 0, b"")
+            alive = self.liveness.register("data_channel", send_heartbeat, abort_transport(server_codec.writer))
+
+        async def pipe_server_to_local() -> bool:
             try:
                 while True:
                     try:
                         data = await server_codec.read_frame()
                     except Exception as e:
+                        if alive and alive.reaped:
+                            # 생존 확인에서 응답이 없어 끊은 채널이다. (이미 경고 로그를 남겼다)
+                            return False
                         # 서버→로컬 경로에서 복호화/압축 해제 예외를 기록한다.
                         self.logger.exception(f"서버→로컬 read_frame 예외: {e}")
-                        break
-                    if not data: break
-                    if len(data) == 0: continue
-                    
+                        return False
+                    # 빈 프레임은 데이터 채널(또는 다중화 스트림)이 끊겼다는 뜻이다.
+                    if not data: return False
+                    if alive:
+                        alive.seen()
+
+                    if data[0] == MsgType.DATA_EOF:
+                        # 공용 클라이언트가 송신을 마쳤다. 로컬 서비스에도 반종료를 전달해 응답을 마무리하게 한다.
+                        if alive:
+                            alive.rx_open = False
+                        write_eof(local_w)
+                        self.events.sampled(TunnelEvent.EOF_FORWARDED, logging.DEBUG, "서버→로컬 EOF 전달")
+                        return True
+                    if data[0] == MsgType.HEARTBEAT:
+                        if alive:
+                            alive.heartbeat_seen()
+                        continue
                     if len(data) > 6:
                          # Plaintext checks (Type, Flags, StreamID)
                          # We assume Type(1)+Flags(1)+StreamID(4) = 6 bytes header
@@ -622,64 +969,58 @@ class ControlClient:
                          stats["server_to_local_packets"] += 1
                          stats["server_to_local_bytes"] += payload_len
                          if stats["server_to_local_packets"] == 1:
-                             self.logger.debug(f"첫 서버→로컬 데이터: {payload_len} bytes")
-                         local_w.write(data[6:])
+                             self.events.sampled(TunnelEvent.FIRST_DATA, logging.DEBUG,
+                                                 "첫 서버→로컬 데이터: %d bytes", payload_len)
+                         # 헤더를 잘라낼 때 복사하지 않도록 memoryview로 넘긴다.
+                         local_w.write(memoryview(data)[6:])
                          await local_w.drain()
             except Exception:
                 # 서버→로컬 파이프 예외는 로컬 응답이 전달되지 않는 원인이 될 수 있다.
                 self.logger.exception("서버→로컬 파이프 예외")
+                return False
         
-        async def pipe_local_to_server():
+        async def pipe_local_to_server() -> bool:
             try:
                 while True:
-                    data = await local_r.read(4096)
+                    data = await read_coalesced(local_r, self.read_size, self.coalesce_ms)
                     if not data: break
                     stats["local_to_server_packets"] += 1
                     stats["local_to_server_bytes"] += len(data)
                     if stats["local_to_server_packets"] == 1:
-                        self.logger.debug(f"첫 로컬→서버 데이터: {len(data)} bytes")
-                    # Wrap with DATA Type
-                    header = bytes([MsgType.DATA, 0]) + struct.pack(">I", 0)
+                        self.events.sampled(TunnelEvent.FIRST_DATA, logging.DEBUG,
+                                            "첫 로컬→서버 데이터: %d bytes", len(data))
+                    # Wrap with DATA Type (코덱이 헤더를 복사 없이 붙인다)
                     # FrameCodec 내부에서 이미 write_lock을 사용하므로 여기서는 중복 잠금 금지.
                     # 중복 잠금은 데이터 채널에서 데드락을 만들 수 있다.
                     try:
-                        await server_codec.write_frame(header + data)
+                        await server_codec.write_message(MsgType.DATA, 0, data, compression=compression)
                     except Exception as e:
                         # 로컬→서버 전송 실패는 터널 응답이 사라지는 원인이 된다.
                         self.logger.exception(f"로컬→서버 write_frame 예외: {e}")
-                        break
+                        return False
+                # 로컬 서비스가 응답을 다 보냈다. 서버가 공용 소켓에 반종료를 전달한다.
+                if alive:
+                    alive.tx_open = False
+                await server_codec.write_message(MsgType.DATA_EOF, 0, b"")
+                self.events.sampled(TunnelEvent.EOF_FORWARDED, logging.DEBUG, "로컬→서버 EOF 전달")
+                return True
             except Exception:
                 # 로컬→서버 파이프 예외 로그
                 self.logger.exception("로컬→서버 파이프 예외")
+                return False
 
         task_server_to_local = asyncio.create_task(pipe_server_to_local())
         task_local_to_server = asyncio.create_task(pipe_local_to_server())
         
-        # 주의: 로컬 서비스가 응답 후 먼저 종료되는 경우가 있다.
-        # 이때 다른 방향의 데이터를 끊지 않도록 반대쪽을 잠시 더 기다린다.
-        done, pending = await asyncio.wait(
-            [task_server_to_local, task_local_to_server],
-            return_when=asyncio.FIRST_COMPLETED
-        )
-        if task_local_to_server in done and task_server_to_local not in done:
-            self.logger.debug("로컬→서버 종료, 서버→로컬 종료 대기 시작")
-            try:
-                await asyncio.wait_for(task_server_to_local, timeout=10.0)
-            except asyncio.TimeoutError:
-                self.logger.warning("서버→로컬 종료 대기 시간 초과, 강제 종료")
-                task_server_to_local.cancel()
-        elif task_server_to_local in done and task_local_to_server not in done:
-            self.logger.debug("서버→로컬 종료, 로컬→서버 종료 대기 시작")
-            try:
-                await asyncio.wait_for(task_local_to_server, timeout=10.0)
-            except asyncio.TimeoutError:
-                self.logger.warning("로컬→서버 종료 대기 시간 초과, 강제 종료")
-                task_local_to_server.cancel()
+        # 로컬 서비스가 응답 후 먼저 종료하거나 공용 클라이언트가 요청 후 송신을 닫아도
+        # 반종료는 DATA_EOF로 전달되므로, 두 방향이 모두 끝날 때까지 시간 제한 없이 기다린다.
+        try:
+            if not await join_pipes(task_server_to_local, task_local_to_server):
+                self.events.sampled(TunnelEvent.BRIDGE_ABORTED, logging.DEBUG, "브리지 비정상 종료, 반대 방향 파이프 정리")
+        finally:
+            if alive:
+                alive.close()
 
-        # 남아있는 태스크를 정리한다.
-        await asyncio.gather(task_server_to_local, task_local_to_server, return_exceptions=True)
-        # 브리지 종료 시점 로그
-        self.logger.debug("bridge_data 종료")
         # 브리지 종료 시 통계 요약 로그
         self.logger.debug(
             "브리지 통계: server->local packets=%d bytes=%d, local->server packets=%d bytes=%d",
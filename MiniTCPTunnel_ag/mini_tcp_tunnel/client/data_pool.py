@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from ..shared.constants import DATA_POOL_MAX_IDLE
+from ..shared.framing import FrameCodec
+
+# 핸드셰이크까지 마친 데이터 채널 코덱을 만드는 함수
+CodecFactory = Callable[[], Awaitable[Optional[FrameCodec]]]
+
+
+class DataChannelPool:
+    """
+    핸드셰이크를 미리 끝낸 유휴 데이터 채널을 보관한다.
+    INCOMING_CONN 수신 시 즉시 꺼내 DATA_CONN_READY만 보내면 되므로
+    TCP 연결 + 핸드셰이크 왕복 시간이 첫 바이트 지연에서 빠진다.
+    풀은 백그라운드에서 목표 개수까지 다시 채워진다.
+    max_idle보다 오래 쉰 채널은 이미 끊겼을 수 있으므로 꺼내 주지 않고 버린 뒤 새로 채운다.
+    """
+    def __init__(self, open_codec: CodecFactory, size: int, retry_delay: float = 1.0,
+                 max_idle: float = DATA_POOL_MAX_IDLE):
+        self.open_codec = open_codec
+        self.size = size
+        self.retry_delay = retry_delay
+        self.max_idle = max_idle
+        # (코덱, 풀에 들어온 시각). 앞쪽이 가장 오래된 채널이다.
+        self.idle: Deque[Tuple[FrameCodec, float]] = deque()
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        # 유휴 시간 초과로 버린 채널 수, 꺼낸 뒤 첫 쓰기에 실패해 버린 채널 수
+        self.expired = 0
+        self.stale = 0
+        self._opening = 0
+        self._wakeup = asyncio.Event()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._close_tasks = set()
+        self.logger = logging.getLogger("DataChannelPool")
+
+    def start(self):
+        if self.size <= 0 or self._refill_task:
+            return
+        self._wakeup.set()
+        self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def stop(self):
+        task, self._refill_task = self._refill_task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        while self.idle:
+            await self.idle.popleft()[0].close()
+        if self._close_tasks:
+            await asyncio.gather(*self._close_tasks, return_exceptions=True)
+            self._close_tasks.clear()
+        if self.hits or self.misses:
+            self.logger.info(f"Data channel pool stopped: {self.get_stats()}")
+
+    def acquire(self) -> Optional[FrameCodec]:
+        """유휴 채널을 하나 꺼낸다. 없으면 None을 반환하고 miss로 집계한다."""
+        self._expire()
+        while self.idle:
+            codec, _ = self.idle.popleft()
+            # 대기 중에 서버가 끊은 채널은 버린다.
+            if codec.reader.at_eof() or codec.writer.is_closing():
+                self.discarded += 1
+                self._close(codec)
+                continue
+            self.hits += 1
+            self._wakeup.set()
+            return codec
+        self.misses += 1
+        self._wakeup.set()
+        return None
+
+    def discard_stale(self, codec: FrameCodec):
+        """꺼내 간 채널이 첫 쓰기에서 실패했을 때 호출한다. 채널을 닫고 집계한 뒤 풀을 다시 채운다."""
+        self.stale += 1
+        self._close(codec)
+        self._wakeup.set()
+
+    def _close(self, codec: FrameCodec):
+        task = asyncio.create_task(codec.close())
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    def _expire(self) -> bool:
+        """max_idle보다 오래 쉰 채널을 앞쪽부터 버린다. 버린 게 있으면 True."""
+        deadline = time.monotonic() - self.max_idle
+        expired = False
+        while self.idle and self.idle[0][1] < deadline:
+            self.expired += 1
+            self._close(self.idle.popleft()[0])
+            expired = True
+        return expired
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": len(self.idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+            "expired": self.expired,
+            "stale": self.stale,
+        }
+
+    async def _open_one(self) -> bool:
+        self._opening += 1
+        try:
+            codec = await self.open_codec()
+        except Exception as e:
+            codec = None
+            self.logger.warning(f"Data channel pool refill failed: {e}")
+        finally:
+            self._opening -= 1
+        if codec is None:
+            return False
+        self.idle.append((codec, time.monotonic()))
+        return True
+
+    async def _refill_loop(self):
+        while True:
+            # 꺼내 가는 채널이 없어도 오래된 채널을 주기적으로 새 채널로 바꿔 둔다.
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_idle / 2)
+            except asyncio.TimeoutError:
+                if not self._expire():
+                    continue
+            self._wakeup.clear()
+            needed = self.size - len(self.idle) - self._opening
+            if needed <= 0:
+                continue
+            # 연속 접속 폭주 후에도 빨리 회복하도록 부족한 만큼 동시에 연결한다.
+            results = await asyncio.gather(*(self._open_one() for _ in range(needed)))
+            self.logger.debug(f"Data channel pool refilled: idle={len(self.idle)}/{self.size}")
+            if not all(results):
+                # 서버가 응답하지 않을 때 재시도 폭주를 막는다.
+                await asyncio.sleep(self.retry_delay)
+            # 채우는 동안 꺼내 간 채널이 있으면 다시 채운다.
+            if len(self.idle) + self._opening < self.size:
+                self._wakeup.set()
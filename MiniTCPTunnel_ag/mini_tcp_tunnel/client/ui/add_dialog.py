@@ -1,8 +1,10 @@
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QLineEdit, 
-    QDialogButtonBox, QMessageBox, QCheckBox
+    QDialogButtonBox, QMessageBox, QCheckBox, QComboBox
 )
 
+COMPRESSION_CHOICES = ["auto", "always", "never"]
+
 class AddTunnelDialog(QDialog):
     def __init__(self, parent=None, current_data=None):
         super().__init__(parent)
@@ -22,6 +24,8 @@ class AddTunnelDialog(QDialog):
         local_host_val = self.current_data['local_host'] if self.current_data else "127.0.0.1"
         local_port_val = str(self.current_data['local_port']) if self.current_data else ""
         auto_start_val = bool(self.current_data.get('auto_start')) if self.current_data else False
+        compression_val = self.current_data.get('compression', "auto") if self.current_data else "auto"
+        plaintext_val = bool(self.current_data.get('plaintext')) if self.current_data else False
 
         self.inp_id = QLineEdit(id_val)
         self.inp_id.setPlaceholderText("e.g. web-server-1")
@@ -38,11 +42,22 @@ class AddTunnelDialog(QDialog):
         self.chk_auto_start = QCheckBox("Auto Start")
         self.chk_auto_start.setChecked(auto_start_val)
 
+        # 압축 정책 (auto: 압축이 안 되는 트래픽은 자동으로 건너뜀)
+        self.cmb_compression = QComboBox()
+        self.cmb_compression.addItems(COMPRESSION_CHOICES)
+        self.cmb_compression.setCurrentText(compression_val)
+
+        # 평문 모드 (서버가 허용해야 적용됨. 데이터가 암호화되지 않으므로 내부망 전용)
+        self.chk_plaintext = QCheckBox("Plaintext (trusted LAN only)")
+        self.chk_plaintext.setChecked(plaintext_val)
+
         form.addRow("Tunnel ID:", self.inp_id)
         form.addRow("Remote Port:", self.inp_remote)
         form.addRow("Local Host:", self.inp_local_host)
         form.addRow("Local Port:", self.inp_local_port)
         form.addRow("Auto Start:", self.chk_auto_start)
+        form.addRow("Compression:", self.cmb_compression)
+        form.addRow("Plaintext:", self.chk_plaintext)
         
         layout.addLayout(form)
 
@@ -57,7 +72,9 @@ class AddTunnelDialog(QDialog):
             "remote_port": int(self.inp_remote.text().strip()),
             "local_host": self.inp_local_host.text().strip(),
             "local_port": int(self.inp_local_port.text().strip()),
-            "auto_start": self.chk_auto_start.isChecked()
+            "auto_start": self.chk_auto_start.isChecked(),
+            "compression": self.cmb_compression.currentText(),
+            "plaintext": self.chk_plaintext.isChecked()
         }
     
     def accept(self):
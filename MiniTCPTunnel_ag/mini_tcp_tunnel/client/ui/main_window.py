@@ -216,7 +216,8 @@ class MainWindow(QMainWindow):
         #     이 리스트는 서버에 적용할 목표 상태(열기/닫기)를 판단하는 기준이 된다.
         configs = []
         for vm in self.app_state.tunnels:
-            cfg = TunnelConfig(vm.tid, vm.remote_port, vm.local_host, vm.local_port, enabled=vm.enabled)
+            cfg = TunnelConfig(vm.tid, vm.remote_port, vm.local_host, vm.local_port, enabled=vm.enabled,
+                               compression=vm.compression, plaintext=vm.plaintext)
             configs.append(cfg)
             # ControlClient 쪽 레지스트리(알고 있는 터널 목록)를 갱신한다.
             # 서버에서 INCOMING_CONN을 받을 때 이 레지스트리를 참조한다.
@@ -258,7 +259,9 @@ class MainWindow(QMainWindow):
             "remote_port": vm.remote_port,
             "local_host": vm.local_host,
             "local_port": vm.local_port,
-            "auto_start": vm.enabled
+            "auto_start": vm.enabled,
+            "compression": vm.compression,
+            "plaintext": vm.plaintext
         }
         
         dlg = AddTunnelDialog(self, current_data=data)
@@ -285,7 +288,9 @@ class MainWindow(QMainWindow):
                     new_data['remote_port'],
                     new_data['local_host'],
                     new_data['local_port'],
-                    enabled=new_data.get('auto_start', False)
+                    enabled=new_data.get('auto_start', False),
+                    compression=new_data.get('compression', "auto"),
+                    plaintext=new_data.get('plaintext', False)
                 )
                 self.app_state.tunnels.append(new_vm)
                 self.refresh_tunnels() # Adds new card
@@ -306,6 +311,8 @@ class MainWindow(QMainWindow):
                 vm.local_host = new_data['local_host']
                 vm.local_port = new_data['local_port']
                 vm.enabled = new_data.get('auto_start', False)
+                vm.compression = new_data.get('compression', "auto")
+                vm.plaintext = new_data.get('plaintext', False)
                 # Card update (text)
                 if tid in self.cards:
                     # Update labels manually or refresh?
@@ -334,7 +341,9 @@ class MainWindow(QMainWindow):
                 remote_port=vm.remote_port,
                 local_host=vm.local_host,
                 local_port=vm.local_port,
-                auto_start=vm.enabled  # Use enabled flag for auto_start
+                auto_start=vm.enabled,  # Use enabled flag for auto_start
+                compression=vm.compression,
+                plaintext=vm.plaintext
             )
             new_defs.append(t_def)
         
@@ -422,7 +431,9 @@ class MainWindow(QMainWindow):
                 data['remote_port'],
                 data['local_host'],
                 data['local_port'],
-                enabled=data.get('auto_start', False)
+                enabled=data.get('auto_start', False),
+                compression=data.get('compression', "auto"),
+                plaintext=data.get('plaintext', False)
             )
             self.app_state.tunnels.append(vm)
             self.refresh_tunnels()
@@ -452,7 +463,8 @@ class MainWindow(QMainWindow):
         if not vm: return
         
         if vm.status == "Stopped":
-            cfg = TunnelConfig(vm.tid, vm.remote_port, vm.local_host, vm.local_port)
+            cfg = TunnelConfig(vm.tid, vm.remote_port, vm.local_host, vm.local_port, compression=vm.compression,
+                               plaintext=vm.plaintext)
             self.client.add_tunnel(cfg)
             if self.client.is_connected:
                 asyncio.create_task(self.client.request_open_tunnel(cfg))
@@ -461,7 +473,8 @@ class MainWindow(QMainWindow):
             asyncio.create_task(self.stop_tunnel(vm))
 
     async def stop_tunnel(self, vm):
-        cfg = TunnelConfig(vm.tid, vm.remote_port, vm.local_host, vm.local_port)
+        cfg = TunnelConfig(vm.tid, vm.remote_port, vm.local_host, vm.local_port, compression=vm.compression,
+                           plaintext=vm.plaintext)
         if self.client.is_connected:
             await self.client.request_close_tunnel(cfg)
         else:
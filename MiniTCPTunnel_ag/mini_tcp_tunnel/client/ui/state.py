@@ -1,7 +1,8 @@
 from datetime import datetime
 
 class TunnelViewModel:
-    def __init__(self, tid, remote_port, local_host, local_port, enabled: bool = True):
+    def __init__(self, tid, remote_port, local_host, local_port, enabled: bool = True, compression: str = "auto",
+                 plaintext: bool = False):
         self.tid = tid
         self.remote_port = remote_port
         self.local_host = local_host
@@ -9,6 +10,8 @@ class TunnelViewModel:
         self.status = "Stopped"
         self.connections = 0
         self.enabled = enabled
+        self.compression = compression
+        self.plaintext = plaintext
 
 class LogModel:
     def __init__(self, msg, level="INFO"):
@@ -0,0 +1,570 @@
+"""
+다중 프로세스(워커) 서버 모드.
+
+- 워커 N개가 SO_REUSEPORT로 제어 포트와 공용 포트를 함께 바인딩해 연결을 나눠 받는다.
+- 수퍼바이저 프로세스의 브로커가 클라이언트별 제어 세션, 터널 목록, 워커별 다중화 채널 수를 관리한다.
+- 세션 재개 티켓 키도 브로커가 만들어 주기적으로 교체하고 모든 워커에 배포한다.
+- 공용 연결을 처리할 다중화 채널이 없는 워커는 원시 소켓의 파일 디스크립터를
+  Unix SEQPACKET 소켓으로 브로커에 넘기고, 브로커가 처리할 워커에 다시 넘겨준다.
+  (다중화 채널이 있는 워커로 전달하거나, 데이터 채널을 받은 워커가 conn_id로 회수한다)
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from ..shared.constants import MsgType, CompressionMode, DEFAULT_MAX_PENDING_PER_TUNNEL, DEFAULT_TICKET_LIFETIME
+from ..shared.event_loop import LOOP_ASYNCIO, run as run_event_loop
+from ..shared.resumption import TicketKeys
+from .core import ConnectionPairer, ControlSession, PublicListener, Server
+
+# IPC 메시지 최대 크기 (JSON 제어 메시지만 오가므로 작게 유지한다)
+IPC_MAX_MSG = 64 * 1024
+# 데이터 채널이 회수해 가지 않은 공용 소켓을 브로커가 보관하는 시간
+PENDING_CONN_TIMEOUT = 10.0
+
+
+def cluster_supported() -> bool:
+    return hasattr(socket, "SO_REUSEPORT") and hasattr(socket, "send_fds") and hasattr(socket, "SOCK_SEQPACKET")
+
+
+def create_reuseport_socket(port: int, host: str = '0.0.0.0') -> socket.socket:
+    """여러 워커가 같은 포트를 나눠 받을 수 있도록 SO_REUSEPORT 리스닝 소켓을 만든다."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+        sock.listen(socket.SOMAXCONN)
+        sock.setblocking(False)
+    except Exception:
+        sock.close()
+        raise
+    return sock
+
+
+class IpcChannel:
+    """Unix SEQPACKET 소켓 위에서 JSON 메시지와 파일 디스크립터(선택)를 주고받는다."""
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.sock.setblocking(False)
+
+    async def _wait(self, add, remove):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        add(self.sock.fileno(), lambda: fut.done() or fut.set_result(None))
+        try:
+            await fut
+        finally:
+            remove(self.sock.fileno())
+
+    async def send(self, msg: dict, fd: Optional[int] = None):
+        loop = asyncio.get_running_loop()
+        data = json.dumps(msg).encode('utf-8')
+        fds = [fd] if fd is not None else []
+        while True:
+            try:
+                socket.send_fds(self.sock, [data], fds)
+                return
+            except BlockingIOError:
+                await self._wait(loop.add_writer, loop.remove_writer)
+
+    async def recv(self) -> Tuple[dict, Optional[int]]:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                data, fds, _, _ = socket.recv_fds(self.sock, IPC_MAX_MSG, 1)
+                break
+            except BlockingIOError:
+                await self._wait(loop.add_reader, loop.remove_reader)
+        if not data:
+            raise ConnectionResetError("IPC channel closed")
+        return json.loads(data.decode('utf-8')), (fds[0] if fds else None)
+
+    def close(self):
+        self.sock.close()
+
+
+class ClusterBroker:
+    """
+    수퍼바이저 프로세스에서 실행되며 워커 간 공유 상태를 관리한다.
+    워커 내부의 ControlSession/ConnectionPairer를 대신하는 프로세스 간 조정자 역할이다.
+    클라이언트(identity 키 hex)마다 세션 소유 워커, 터널 목록, 워커별 다중화 채널 수를 따로 둔다.
+    """
+    def __init__(self, channels: List[IpcChannel], max_pending_per_tunnel: int = DEFAULT_MAX_PENDING_PER_TUNNEL,
+                 ticket_lifetime: int = DEFAULT_TICKET_LIFETIME):
+        self.channels = channels
+        self.alive = [True] * len(channels)
+        # client_key(hex) -> {"owner": 제어 세션 워커, "hmac_key": hex}
+        self.sessions: Dict[str, dict] = {}
+        # (client_key, tunnel_id) -> {"port", "compression"}
+        self.tunnels: Dict[Tuple[str, str], dict] = {}
+        # client_key -> 워커별 다중화 채널 수
+        self.mux_counts: Dict[str, List[int]] = {}
+        # conn_id -> (공용 소켓 fd, client_key, tunnel_id, 만료 타이머)
+        self.pending: Dict[str, Tuple[int, str, str, asyncio.TimerHandle]] = {}
+        # 워커 내부 ConnectionPairer와 같은 터널별 대기 상한 (넘으면 공용 소켓을 바로 닫는다)
+        self.max_pending_per_tunnel = max_pending_per_tunnel
+        self.pending_per_tunnel: Dict[Tuple[str, str], int] = {}
+        # 워커들이 공유하는 재개 티켓 키. lifetime마다 교체해 모든 워커에 다시 배포한다. (0이면 재개 비활성화)
+        self.ticket_keys = TicketKeys(ticket_lifetime) if ticket_lifetime > 0 else None
+        self._next_route = 0
+        self.logger = logging.getLogger("ClusterBroker")
+
+    async def run(self):
+        tasks = [self._serve(i) for i in range(len(self.channels))]
+        if self.ticket_keys:
+            await self._broadcast_ticket_keys()
+            tasks.append(self._rotate_ticket_keys())
+        await asyncio.gather(*tasks)
+
+    async def _broadcast_ticket_keys(self):
+        await self._broadcast({"op": "ticket_keys", "keys": [key.hex() for key in self.ticket_keys.export()]})
+
+    async def _rotate_ticket_keys(self):
+        while True:
+            await asyncio.sleep(self.ticket_keys.lifetime)
+            self.ticket_keys.rotate()
+            await self._broadcast_ticket_keys()
+
+    async def _serve(self, worker: int):
+        channel = self.channels[worker]
+        try:
+            while True:
+                msg, fd = await channel.recv()
+                try:
+                    await self.handle(worker, msg, fd)
+                except Exception as e:
+                    # fd는 각 처리기가 소유권을 가지고 닫는다.
+                    self.logger.error(f"Broker failed to handle {msg.get('op')} from worker {worker}: {e}")
+        except (ConnectionError, OSError) as e:
+            self.logger.warning(f"Worker {worker} disconnected: {e}")
+        finally:
+            await self._worker_lost(worker)
+
+    async def _send(self, worker: int, msg: dict, fd: Optional[int] = None) -> bool:
+        if not self.alive[worker]:
+            return False
+        try:
+            await self.channels[worker].send(msg, fd)
+            return True
+        except OSError as e:
+            self.logger.warning(f"Failed to send {msg.get('op')} to worker {worker}: {e}")
+            return False
+
+    async def _broadcast(self, msg: dict, exclude: Optional[int] = None):
+        for worker in range(len(self.channels)):
+            if worker != exclude:
+                await self._send(worker, msg)
+
+    async def handle(self, worker: int, msg: dict, fd: Optional[int]):
+        op = msg.get("op")
+        client = msg.get("client_key")
+        if op == "register_session":
+            ok = client not in self.sessions
+            if ok:
+                self.sessions[client] = {"owner": worker, "hmac_key": msg["hmac_key"]}
+                self.mux_counts[client] = [0] * len(self.channels)
+                self.logger.info(f"Control session for client {client[:16]} owned by worker {worker}")
+                await self._broadcast({"op": "session", "client_key": client, "hmac_key": msg["hmac_key"]},
+                                      exclude=worker)
+            await self._send(worker, {"op": "reply", "req": msg["req"], "ok": ok})
+        elif op == "release_session":
+            session = self.sessions.get(client)
+            if session and session["owner"] == worker and session["hmac_key"] == msg["hmac_key"]:
+                await self._end_session(client, exclude=worker)
+        elif op == "tunnel_open":
+            plaintext = msg.get("plaintext", False)
+            self.tunnels[(client, msg["tunnel_id"])] = {"port": msg["port"], "compression": msg["compression"],
+                                                        "plaintext": plaintext}
+            await self._broadcast({"op": "listen", "client_key": client, "tunnel_id": msg["tunnel_id"],
+                                   "port": msg["port"], "compression": msg["compression"],
+                                   "plaintext": plaintext}, exclude=worker)
+        elif op == "tunnel_close":
+            self.tunnels.pop((client, msg["tunnel_id"]), None)
+            await self._broadcast({"op": "unlisten", "client_key": client, "tunnel_id": msg["tunnel_id"]},
+                                  exclude=worker)
+        elif op == "mux_count":
+            if client in self.mux_counts:
+                self.mux_counts[client][worker] = msg["count"]
+        elif op == "public_conn":
+            await self._route_public_conn(worker, client, msg["tunnel_id"], fd)
+        elif op == "claim_conn":
+            entry = self.pending.get(msg["conn_id"])
+            # 다른 클라이언트의 데이터 채널은 이 conn_id를 회수할 수 없다.
+            if entry is None or entry[1] != client:
+                await self._send(worker, {"op": "reply", "req": msg["req"], "ok": False})
+                return
+            del self.pending[msg["conn_id"]]
+            conn_fd, _, tunnel_id, timer = entry
+            timer.cancel()
+            self._release_pending(client, tunnel_id)
+            await self._send(worker, {"op": "reply", "req": msg["req"], "ok": True, "tunnel_id": tunnel_id}, conn_fd)
+            os.close(conn_fd)
+        else:
+            self.logger.warning(f"Unknown IPC op from worker {worker}: {op}")
+            if fd is not None:
+                os.close(fd)
+
+    async def _route_public_conn(self, origin: int, client: str, tunnel_id: str, fd: Optional[int]):
+        if fd is None:
+            return
+        try:
+            session = self.sessions.get(client)
+            if session is None:
+                return
+            # 1. 이 클라이언트의 다중화 채널을 가진 워커가 있으면 라운드 로빈으로 넘겨 스트림으로 처리한다.
+            #    (평문 터널은 다중화를 쓰지 않으므로 항상 데이터 채널 페어링으로 간다)
+            counts = self.mux_counts[client]
+            tunnel = self.tunnels.get((client, tunnel_id), {})
+            targets = [w for w in range(len(self.channels)) if w != origin and self.alive[w] and counts[w] > 0
+                       and not tunnel.get("plaintext")]
+            if targets:
+                target = targets[self._next_route % len(targets)]
+                self._next_route += 1
+                await self._send(target, {"op": "route_conn", "client_key": client, "tunnel_id": tunnel_id}, fd)
+                return
+            # 2. 없으면 제어 세션 워커가 INCOMING_CONN을 보내고, 데이터 채널을 받은 워커가 conn_id로 회수한다.
+            key = (client, tunnel_id)
+            count = self.pending_per_tunnel.get(key, 0)
+            if count >= self.max_pending_per_tunnel:
+                self.logger.warning(f"Pending pairing limit reached for tunnel {tunnel_id}, dropping connection")
+                return
+            self.pending_per_tunnel[key] = count + 1
+            conn_id = str(uuid4())[:8]
+            timer = asyncio.get_running_loop().call_later(PENDING_CONN_TIMEOUT, self._expire, conn_id)
+            self.pending[conn_id] = (os.dup(fd), client, tunnel_id, timer)
+            await self._send(session["owner"], {"op": "incoming_conn", "client_key": client,
+                                                "tunnel_id": tunnel_id, "conn_id": conn_id})
+        finally:
+            # 다른 프로세스로 넘긴 뒤에는 브로커의 사본을 닫는다.
+            os.close(fd)
+
+    def _release_pending(self, client: str, tunnel_id: str):
+        key = (client, tunnel_id)
+        count = self.pending_per_tunnel.get(key, 0) - 1
+        if count > 0:
+            self.pending_per_tunnel[key] = count
+        else:
+            self.pending_per_tunnel.pop(key, None)
+
+    def _expire(self, conn_id: str):
+        entry = self.pending.pop(conn_id, None)
+        if entry:
+            self.logger.error(f"Timeout waiting for data channel conn_id={conn_id}")
+            self._release_pending(entry[1], entry[2])
+            os.close(entry[0])
+
+    async def _end_session(self, client: str, exclude: Optional[int] = None):
+        session = self.sessions.pop(client, None)
+        if session is None:
+            return
+        self.logger.info(f"Control session for client {client[:16]} released (worker {session['owner']})")
+        self.mux_counts.pop(client, None)
+        for key in [k for k in self.tunnels if k[0] == client]:
+            del self.tunnels[key]
+        for conn_id in [cid for cid, entry in self.pending.items() if entry[1] == client]:
+            conn_fd, _, tunnel_id, timer = self.pending.pop(conn_id)
+            timer.cancel()
+            self._release_pending(client, tunnel_id)
+            os.close(conn_fd)
+        await self._broadcast({"op": "session_closed", "client_key": client}, exclude=exclude)
+
+    async def _worker_lost(self, worker: int):
+        if not self.alive[worker]:
+            return
+        self.alive[worker] = False
+        for counts in self.mux_counts.values():
+            counts[worker] = 0
+        for client in [c for c, s in self.sessions.items() if s["owner"] == worker]:
+            await self._end_session(client, exclude=worker)
+
+
+class RemoteSession(ControlSession):
+    """
+    다른 워커가 소유한 제어 세션의 로컬 대리자.
+    이 워커에 붙은 다중화 채널과 공용 리스너만 관리하며 제어 채널 코덱은 없다.
+    """
+    def __init__(self, server: Server, client_key: bytes, session_hmac_key: bytes):
+        super().__init__(None, ConnectionPairer(server.max_pending_per_tunnel), server, client_key, session_hmac_key)
+        self.logger = logging.getLogger("RemoteSession")
+
+    async def send_message(self, msg_type: MsgType, payload: bytes = b""):
+        raise ConnectionError("Control channel is owned by another worker")
+
+    async def cleanup(self):
+        self.is_active = False
+        for t in self.tunnels.values():
+            await t.stop()
+        self.tunnels.clear()
+        for channel in list(self.mux_channels):
+            await channel.close()
+        self.mux_channels.clear()
+
+
+class ClusterLink:
+    """
+    워커 프로세스에서 브로커와 통신한다.
+    Server는 이 객체를 통해 세션/터널/다중화 채널 상태를 공유하고 공용 소켓을 주고받는다.
+    """
+    def __init__(self, channel: IpcChannel, worker_id: int):
+        self.channel = channel
+        self.worker_id = worker_id
+        self.server: Optional[Server] = None
+        self._requests: Dict[int, asyncio.Future] = {}
+        self._next_req = 0
+        self._recv_task: Optional[asyncio.Task] = None
+        self._tasks = set()
+        self.logger = logging.getLogger(f"ClusterLink({worker_id})")
+
+    def start(self, server: Server):
+        self.server = server
+        if not self._recv_task:
+            self._recv_task = asyncio.create_task(self._recv_loop())
+
+    def create_listen_socket(self, port: int) -> socket.socket:
+        return create_reuseport_socket(port)
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _request(self, msg: dict, fd: Optional[int] = None) -> Tuple[dict, Optional[int]]:
+        self._next_req += 1
+        req = self._next_req
+        fut = asyncio.get_running_loop().create_future()
+        self._requests[req] = fut
+        try:
+            await self.channel.send({**msg, "req": req}, fd)
+            return await fut
+        finally:
+            self._requests.pop(req, None)
+
+    async def _notify(self, msg: dict, fd: Optional[int] = None):
+        try:
+            await self.channel.send(msg, fd)
+        except OSError as e:
+            self.logger.error(f"Failed to notify broker ({msg.get('op')}): {e}")
+
+    # --- Server에서 호출하는 API ---
+
+    async def register_session(self, client_key: bytes, session_hmac_key: bytes) -> bool:
+        reply, _ = await self._request({"op": "register_session", "client_key": client_key.hex(),
+                                        "hmac_key": session_hmac_key.hex()})
+        return bool(reply.get("ok"))
+
+    async def release_session(self, client_key: bytes, session_hmac_key: bytes):
+        await self._notify({"op": "release_session", "client_key": client_key.hex(),
+                            "hmac_key": session_hmac_key.hex()})
+
+    async def announce_tunnel(self, client_key: bytes, tunnel_id: str, port: int, compression: CompressionMode,
+                              plaintext: bool = False):
+        await self._notify({"op": "tunnel_open", "client_key": client_key.hex(), "tunnel_id": tunnel_id,
+                            "port": port, "compression": int(compression), "plaintext": plaintext})
+
+    async def withdraw_tunnel(self, client_key: bytes, tunnel_id: str):
+        await self._notify({"op": "tunnel_close", "client_key": client_key.hex(), "tunnel_id": tunnel_id})
+
+    async def report_mux_channels(self, client_key: bytes, count: int):
+        await self._notify({"op": "mux_count", "client_key": client_key.hex(), "count": count})
+
+    async def hand_off_public(self, client_key: bytes, tunnel_id: str, conn: socket.socket):
+        """다중화 채널이 없는 워커가 받은 공용 소켓을 브로커에 넘긴다."""
+        try:
+            await self._notify({"op": "public_conn", "client_key": client_key.hex(), "tunnel_id": tunnel_id},
+                               conn.fileno())
+        finally:
+            conn.close()
+
+    async def bridge_claimed_conn(self, client_key: bytes, conn_id: str, codec):
+        """데이터 채널이 가리키는 공용 소켓을 브로커에서 회수해 이 워커에서 브리지한다."""
+        reply, fd = await self._request({"op": "claim_conn", "client_key": client_key.hex(), "conn_id": conn_id})
+        if not reply.get("ok") or fd is None:
+            self.logger.warning(f"No pending public connection for conn_id={conn_id}")
+            await codec.close()
+            return
+        session = self.server.sessions.get(client_key)
+        listener = session.tunnels.get(reply["tunnel_id"]) if session else None
+        conn = socket.socket(fileno=fd)
+        if not listener:
+            conn.close()
+            await codec.close()
+            return
+        reader, writer = await asyncio.open_connection(sock=conn)
+        try:
+            listener.logger.info(f"Bridging conn_id={conn_id} public <-> data channel (worker {self.worker_id})")
+            await listener.bridge(reader, writer, codec, conn_id, "data_channel")
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    # --- 브로커가 보낸 메시지 처리 ---
+
+    async def _recv_loop(self):
+        while True:
+            try:
+                msg, fd = await self.channel.recv()
+            except (ConnectionError, OSError) as e:
+                self.logger.error(f"Broker connection lost: {e}")
+                return
+            op = msg.get("op")
+            if op == "reply":
+                fut = self._requests.get(msg.get("req"))
+                if fut and not fut.done():
+                    fut.set_result((msg, fd))
+                elif fd is not None:
+                    os.close(fd)
+                continue
+            # 상태 변경은 도착 순서대로 적용해야 하므로 순차 처리하고, 연결 처리는 분리 실행한다.
+            try:
+                client_key = bytes.fromhex(msg.get("client_key", ""))
+                if op == "route_conn":
+                    self._spawn(self._on_route_conn(client_key, msg["tunnel_id"], fd))
+                elif op == "incoming_conn":
+                    self._spawn(self._on_incoming_conn(client_key, msg["tunnel_id"], msg["conn_id"]))
+                elif op == "session":
+                    await self._on_session(client_key, bytes.fromhex(msg["hmac_key"]))
+                elif op == "session_closed":
+                    await self._on_session_closed(client_key)
+                elif op == "listen":
+                    await self._on_listen(client_key, msg["tunnel_id"], msg["port"], CompressionMode(msg["compression"]),
+                                          msg.get("plaintext", False))
+                elif op == "unlisten":
+                    await self._on_unlisten(client_key, msg["tunnel_id"])
+                elif op == "ticket_keys":
+                    self._on_ticket_keys([bytes.fromhex(key) for key in msg["keys"]])
+                else:
+                    self.logger.warning(f"Unknown IPC op from broker: {op}")
+            except Exception as e:
+                self.logger.error(f"Failed to apply broker message {op}: {e}")
+
+    async def _on_session(self, client_key: bytes, session_hmac_key: bytes):
+        # 이 루프가 브로커 응답도 전달하므로 여기서 응답을 기다리는 작업을 하면 안 된다.
+        server = self.server
+        server.sessions[client_key] = RemoteSession(server, client_key, session_hmac_key)
+
+    async def _on_session_closed(self, client_key: bytes):
+        session = self.server.sessions.pop(client_key, None)
+        if session:
+            await session.cleanup()
+
+    def _on_ticket_keys(self, keys: List[bytes]):
+        if self.server.ticket_keys:
+            self.server.ticket_keys.install(keys)
+
+    async def _on_listen(self, client_key: bytes, tunnel_id: str, port: int, compression: CompressionMode,
+                         plaintext: bool = False):
+        session = self.server.sessions.get(client_key)
+        if not session:
+            return
+        old = session.tunnels.pop(tunnel_id, None)
+        if old:
+            await old.stop()
+        listener = PublicListener(tunnel_id, port, session, session.pairer, compression, plaintext)
+        await listener.start()
+        session.tunnels[tunnel_id] = listener
+
+    async def _on_unlisten(self, client_key: bytes, tunnel_id: str):
+        session = self.server.sessions.get(client_key)
+        listener = session.tunnels.pop(tunnel_id, None) if session else None
+        if listener:
+            await listener.stop()
+
+    async def _on_route_conn(self, client_key: bytes, tunnel_id: str, fd: Optional[int]):
+        if fd is None:
+            return
+        conn = socket.socket(fileno=fd)
+        session = self.server.sessions.get(client_key)
+        listener = session.tunnels.get(tunnel_id) if session else None
+        if not listener:
+            conn.close()
+            return
+        reader, writer = await asyncio.open_connection(sock=conn)
+        await listener.handle_conn(reader, writer)
+
+    async def _on_incoming_conn(self, client_key: bytes, tunnel_id: str, conn_id: str):
+        session = self.server.sessions.get(client_key)
+        if not session or isinstance(session, RemoteSession):
+            return
+        tid_bytes = tunnel_id.encode('utf-8')
+        cid_bytes = conn_id.encode('utf-8')
+        payload = len(tid_bytes).to_bytes(4, "big") + tid_bytes + len(cid_bytes).to_bytes(4, "big") + cid_bytes
+        listener = session.tunnels.get(tunnel_id)
+        if listener:
+            payload = listener.incoming_conn_payload(payload)
+        try:
+            await session.send_message(MsgType.INCOMING_CONN, payload)
+        except Exception as e:
+            self.logger.error(f"Failed to forward INCOMING_CONN conn_id={conn_id}: {e}")
+
+
+def run_cluster(workers: int, server_factory: Callable[[ClusterLink], Server], timeout: float = 0,
+                event_loop: str = LOOP_ASYNCIO, max_pending_per_tunnel: int = DEFAULT_MAX_PENDING_PER_TUNNEL,
+                ticket_lifetime: int = DEFAULT_TICKET_LIFETIME):
+    """
+    워커 프로세스 N개를 띄우고 수퍼바이저에서 브로커를 실행한다.
+    server_factory는 각 워커에서 ClusterLink를 받아 Server를 만든다.
+    event_loop는 워커가 사용할 루프 구현이다. (브로커는 가벼우므로 기본 루프를 쓴다)
+    max_pending_per_tunnel은 브로커가 보관하는 페어링 대기 공용 소켓의 터널별 상한이다.
+    ticket_lifetime은 브로커가 배포하는 재개 티켓 키의 교체 주기다. (워커의 Server와 같은 값을 준다)
+    """
+    if not cluster_supported():
+        raise RuntimeError("Worker mode requires SO_REUSEPORT and Unix fd passing (Linux)")
+    logger = logging.getLogger("Cluster")
+    ctx = multiprocessing.get_context("fork")
+    pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET) for _ in range(workers)]
+    procs = []
+    for worker_id, (_, child_sock) in enumerate(pairs):
+        proc = ctx.Process(target=_worker_main, args=(worker_id, pairs, server_factory, event_loop), daemon=True)
+        proc.start()
+        procs.append(proc)
+        logger.info(f"Started worker {worker_id} (pid={proc.pid})")
+    for parent_sock, child_sock in pairs:
+        child_sock.close()
+    # SIGTERM으로 종료될 때도 아래 finally에서 워커를 정리하도록 한다.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    async def run_broker():
+        broker = ClusterBroker([IpcChannel(parent_sock) for parent_sock, _ in pairs], max_pending_per_tunnel,
+                               ticket_lifetime)
+        if timeout > 0:
+            await asyncio.wait_for(broker.run(), timeout=timeout)
+        else:
+            await broker.run()
+
+    try:
+        asyncio.run(run_broker())
+    except asyncio.TimeoutError:
+        logger.info("Cluster timeout reached. Shutting down.")
+    finally:
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+        for proc in procs:
+            proc.join(timeout=5)
+
+
+def _worker_main(worker_id: int, pairs, server_factory: Callable[[ClusterLink], Server], event_loop: str):
+    # 자신의 채널만 남기고 나머지 소켓 사본은 닫는다.
+    for index, (parent_sock, child_sock) in enumerate(pairs):
+        parent_sock.close()
+        if index != worker_id:
+            child_sock.close()
+    child_sock = pairs[worker_id][1]
+
+    async def run_worker():
+        link = ClusterLink(IpcChannel(child_sock), worker_id)
+        server = server_factory(link)
+        await server.listen()
+
+    try:
+        run_event_loop(run_worker, event_loop)
+    except KeyboardInterrupt:
+        pass
@@ -4,8 +4,10 @@ import struct
 import base64
 import hmac
 import hashlib
+import heapq
 import secrets
-from typing import Dict, Optional, Set
+import time
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 
 from ..shared.constants import (
@@ -14,63 +16,173 @@ from ..shared.constants import (
     HMAC_KEY_LEN,
     HMAC_TOKEN_LEN,
     MAX_CONN_ID_LEN,
+    CompressionMode,
+    DEFAULT_READ_SIZE,
+    DEFAULT_COALESCE_MS,
+    DEFAULT_TICKET_LIFETIME,
+    DEFAULT_MAX_PENDING_PER_TUNNEL,
+    PAIRING_TIMEOUT,
+    DEFAULT_DATA_HEARTBEAT_INTERVAL,
+    TUNNEL_FLAG_PLAINTEXT,
+    CONN_FLAG_PLAINTEXT,
 )
 from ..shared.framing import FrameCodec
+from ..shared.compression import CompressionPolicy
+from ..shared.stream_io import clamp_read_size, read_coalesced, write_eof, join_pipes
+from ..shared.mux import MuxChannel
+from ..shared.raw_relay import relay_streams
+from ..shared.loop_watchdog import LoopWatchdog, task_category
+from ..shared.tunnel_log import TunnelLog, TunnelEvent
+from ..shared.liveness import LivenessWheel, abort_transport
+from ..shared.resumption import TicketKeys
+from .metrics import ServerMetrics
 from .protocol import ServerHandshake, ALLOWED_CLIENT_KEYS, add_allowed_client_key
 import nacl.signing
 
+def client_id(client_key: bytes) -> str:
+    """클라이언트 identity 공개키의 짧은 hex 표기 (지표 라벨/로그용)"""
+    return client_key.hex()[:16]
+
 class ConnectionPairer:
     """
     Matches an incoming public connection (conn_id) with a client data channel.
+
+    대기 항목은 터널별 상한(max_pending_per_tunnel)을 넘지 못하며, 넘으면 prepare가 즉시 None을 반환한다.
+    만료는 연결마다 타이머를 두지 않고 (마감 시각, conn_id) 힙과 타이머 하나로 처리한다.
     """
-    def __init__(self):
-        # conn_id -> Future[FrameCodec (the data channel)]
-        self.pending: Dict[str, asyncio.Future] = {}
+    def __init__(self, max_pending_per_tunnel: int = DEFAULT_MAX_PENDING_PER_TUNNEL,
+                 timeout: float = PAIRING_TIMEOUT):
+        self.max_pending_per_tunnel = max_pending_per_tunnel
+        self.timeout = timeout
+        # conn_id -> (tunnel_id, Future[FrameCodec (the data channel)])
+        self.pending: Dict[str, Tuple[str, asyncio.Future]] = {}
+        # tunnel_id -> 대기 중인 conn_id 수
+        self.pending_per_tunnel: Dict[str, int] = {}
+        # (마감 시각, conn_id) 최소 힙. 매칭/취소된 항목은 꺼낼 때 건너뛴다(지연 삭제).
+        self._deadlines: List[Tuple[float, str]] = []
+        self._expiry_timer: Optional[asyncio.TimerHandle] = None
         # 디버깅을 위해 페어링 상태를 추적하는 전용 로거를 사용한다.
         self.logger = logging.getLogger("ConnectionPairer")
+        # 연결마다 찍히는 로그는 레벨 확인/샘플링을 거치고 이벤트 카운터로 집계한다.
+        self.events = TunnelLog(self.logger)
 
-    def prepare(self, conn_id: str) -> asyncio.Future:
+    def prepare(self, conn_id: str, tunnel_id: str = "") -> Optional[asyncio.Future]:
+        """
+        conn_id의 대기 Future를 등록한다. 터널의 대기 수가 상한에 도달했으면 None을 반환한다.
+        Future는 만료 시 asyncio.TimeoutError로 끝난다.
+        """
+        count = self.pending_per_tunnel.get(tunnel_id, 0)
+        if count >= self.max_pending_per_tunnel:
+            self.logger.warning(f"[페어링] 대기 상한 초과로 거절 tunnel_id={tunnel_id}, pending={count}")
+            return None
         loop = asyncio.get_running_loop()
         f = loop.create_future()
-        self.pending[conn_id] = f
+        self.pending[conn_id] = (tunnel_id, f)
+        self.pending_per_tunnel[tunnel_id] = count + 1
+        deadline = loop.time() + self.timeout
+        heapq.heappush(self._deadlines, (deadline, conn_id))
+        if self._expiry_timer is None:
+            self._expiry_timer = loop.call_at(deadline, self._expire_due)
         # 대기 등록 시점에 현재 대기 수를 기록해 누락 여부를 확인한다.
-        self.logger.debug(f"[페어링] 대기 등록 conn_id={conn_id}, pending={len(self.pending)}")
+        self.events.sampled(TunnelEvent.PAIRING_PREPARED, logging.DEBUG,
+                            "[페어링] 대기 등록 conn_id=%s, pending=%d", conn_id, len(self.pending))
         return f
 
-    def fulfill(self, conn_id: str, codec: FrameCodec):
-        if conn_id in self.pending:
-            self.pending[conn_id].set_result(codec)
-            del self.pending[conn_id]
-            # 정상 매칭 시점 로그: 데이터 채널 수신 확인용
-            self.logger.debug(f"[페어링] 매칭 완료 conn_id={conn_id}, pending={len(self.pending)}")
+    def _remove(self, conn_id: str) -> Optional[asyncio.Future]:
+        entry = self.pending.pop(conn_id, None)
+        if entry is None:
+            return None
+        tunnel_id, f = entry
+        count = self.pending_per_tunnel[tunnel_id] - 1
+        if count:
+            self.pending_per_tunnel[tunnel_id] = count
         else:
-            self.logger.warning(f"[페어링] 매칭 실패(만료/미등록) conn_id={conn_id}")
-            asyncio.create_task(codec.close())
+            del self.pending_per_tunnel[tunnel_id]
+        # 매칭이 빨라 힙에 지난 항목만 쌓이는 경우를 대비해 가끔 다시 만든다.
+        if len(self._deadlines) > 2 * len(self.pending) + 64:
+            self._deadlines = [(d, cid) for d, cid in self._deadlines if cid in self.pending]
+            heapq.heapify(self._deadlines)
+        return f
+
+    def _expire_due(self):
+        loop = asyncio.get_running_loop()
+        self._expiry_timer = None
+        now = loop.time()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, conn_id = heapq.heappop(self._deadlines)
+            f = self._remove(conn_id)
+            if f is not None and not f.done():
+                f.set_exception(asyncio.TimeoutError())
+        if self._deadlines:
+            self._expiry_timer = loop.call_at(self._deadlines[0][0], self._expire_due)
+
+    def fulfill(self, conn_id: str, codec: FrameCodec) -> bool:
+        """
+        데이터 채널을 대기 중인 연결에 넘긴다.
+        만료/미등록 conn_id면 False를 반환하며, 이때 codec을 닫는 것은 호출자 몫이다.
+        """
+        f = self._remove(conn_id)
+        if f is not None and not f.done():
+            f.set_result(codec)
+            # 정상 매칭 시점 로그: 데이터 채널 수신 확인용
+            self.events.sampled(TunnelEvent.PAIRING_MATCHED, logging.DEBUG,
+                                "[페어링] 매칭 완료 conn_id=%s, pending=%d", conn_id, len(self.pending))
+            return True
+        self.logger.warning(f"[페어링] 매칭 실패(만료/미등록) conn_id={conn_id}")
+        return False
 
     def cancel(self, conn_id: str):
-        if conn_id in self.pending:
-            self.pending[conn_id].cancel()
-            del self.pending[conn_id]
+        f = self._remove(conn_id)
+        if f is not None:
+            f.cancel()
             # 타임아웃 등으로 취소되는 케이스를 추적한다.
-            self.logger.debug(f"[페어링] 대기 취소 conn_id={conn_id}, pending={len(self.pending)}")
+            self.events.sampled(TunnelEvent.PAIRING_CANCELLED, logging.DEBUG,
+                                "[페어링] 대기 취소 conn_id=%s, pending=%d", conn_id, len(self.pending))
 
 class PublicListener:
     """
     Listens on a public port and notifies the control session when a connection arrives.
     """
-    def __init__(self, tunnel_id: str, local_port: int, control_session: 'ControlSession', pairer: ConnectionPairer):
+    def __init__(self, tunnel_id: str, local_port: int, control_session: 'ControlSession', pairer: ConnectionPairer,
+                 compression: CompressionMode = CompressionMode.AUTO, plaintext: bool = False):
         self.tunnel_id = tunnel_id
         self.local_port = local_port
+        # 공용→클라이언트 방향 프레임의 압축 정책 (클라이언트가 터널별로 지정)
+        self.compression = compression
+        # 평문 터널: 다중화 채널을 쓰지 않고, 인증된 데이터 채널을 원시 바이트 중계로 전환한다.
+        self.plaintext = plaintext
         self.control_session = control_session
         self.pairer = pairer
         self.server: Optional[asyncio.Server] = None
+        # 워커 모드에서는 원시 소켓을 직접 accept해 필요하면 다른 워커로 넘긴다.
+        self.accept_sock = None
+        self.accept_task: Optional[asyncio.Task] = None
+        self._conn_tasks = set()
         self.logger = logging.getLogger(f"PublicListener({local_port})")
+        self.events = TunnelLog(self.logger)
 
     async def start(self):
-        self.server = await asyncio.start_server(self.handle_conn, '0.0.0.0', self.local_port)
+        cluster = self.control_session.server.cluster
+        if cluster:
+            self.accept_sock = cluster.create_listen_socket(self.local_port)
+            self.accept_task = asyncio.create_task(self._accept_loop())
+        else:
+            self.server = await asyncio.start_server(self.handle_conn, '0.0.0.0', self.local_port)
+        self.control_session.server.metrics.tunnel(self.tunnel_id, self.control_session.client_id)
         self.logger.info(f"Tunnel {self.tunnel_id} listening on 0.0.0.0:{self.local_port}")
 
     async def stop(self):
+        # 닫힌 터널의 지표는 남은 브리지가 끝나면 지운다. (터널/클라이언트가 바뀌어도 시계열이 쌓이지 않게)
+        self.control_session.server.metrics.remove_tunnel(self.tunnel_id, self.control_session.client_id)
+        if self.accept_task:
+            task, self.accept_task = self.accept_task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            self.accept_sock.close()
+            self.logger.info(f"Stopped listener on {self.local_port}")
         if self.server:
             srv = self.server
             self.server = None # Prevent double stop
@@ -78,163 +190,263 @@ class PublicListener:
             await srv.wait_closed()
             self.logger.info(f"Stopped listener on {self.local_port}")
 
+    async def _accept_loop(self):
+        """
+        워커 모드 전용 accept 루프.
+        StreamReader가 데이터를 미리 읽기 전에 처리 위치를 정해야 소켓을 다른 워커로 넘길 수 있다.
+        """
+        loop = asyncio.get_running_loop()
+        cluster = self.control_session.server.cluster
+        while True:
+            conn, _ = await loop.sock_accept(self.accept_sock)
+            if not self.plaintext and self.control_session.pick_mux_channel():
+                task = asyncio.create_task(self._handle_raw_conn(conn))
+            else:
+                # 이 워커에 다중화 채널이 없으면 브로커를 통해 처리할 워커로 넘긴다.
+                task = asyncio.create_task(cluster.hand_off_public(self.control_session.client_key, self.tunnel_id, conn))
+            self._conn_tasks.add(task)
+            task.add_done_callback(self._conn_tasks.discard)
+
+    async def _handle_raw_conn(self, conn):
+        reader, writer = await asyncio.open_connection(sock=conn)
+        await self.handle_conn(reader, writer)
+
     async def handle_conn(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         conn_id = str(uuid4())[:8] # Short ID for debug readability
         peer = writer.get_extra_info('peername')
-        self.logger.info(f"New public connection from {peer}, conn_id={conn_id}")
+        self.events.sampled(TunnelEvent.PUBLIC_ACCEPTED, logging.INFO,
+                            "New public connection from %s, conn_id=%s", peer, conn_id)
+
+        # Msg: | tunnel_id_len(4) | tunnel_id | conn_id_len(4) | conn_id |
+        # INCOMING_CONN과 STREAM_OPEN이 같은 페이로드 형식을 사용한다.
+        tid_bytes = self.tunnel_id.encode('utf-8')
+        cid_bytes = conn_id.encode('utf-8')
+        payload = struct.pack(">I", len(tid_bytes)) + tid_bytes + \
+                  struct.pack(">I", len(cid_bytes)) + cid_bytes
+
+        # 다중화 채널이 준비되어 있으면 핸드셰이크 없이 스트림을 연다. (평문 터널은 항상 1:1 데이터 채널)
+        mux_channel = None if self.plaintext else self.control_session.pick_mux_channel()
+        metrics = self.control_session.server.metrics
+        client = self.control_session.client_id
+        if mux_channel:
+            try:
+                started = time.monotonic()
+                stream = await mux_channel.open_stream(payload)
+                metrics.observe_pairing_wait(self.tunnel_id, "mux", time.monotonic() - started, client)
+                self.events.sampled(TunnelEvent.BRIDGE_STARTED, logging.INFO,
+                                    "Bridging conn_id=%s public <-> mux stream %s/%d",
+                                    conn_id, mux_channel.name, stream.stream_id)
+                await self.bridge(reader, writer, stream, conn_id, "mux")
+                self.events.sampled(TunnelEvent.BRIDGE_FINISHED, logging.DEBUG, "Bridge finished conn_id=%s", conn_id)
+            except Exception as e:
+                self.logger.error(f"Error handling public conn {conn_id} over mux: {e}")
+            finally:
+                self.logger.debug("Closing public socket conn_id=%s", conn_id)
+                writer.close()
+                await writer.wait_closed()
+            return
 
-        # 1. Prepare pairing
-        future = self.pairer.prepare(conn_id)
+        # 1. Prepare pairing (대기 상한에 도달한 터널은 INCOMING_CONN을 보내지 않고 바로 끊는다)
+        future = self.pairer.prepare(conn_id, self.tunnel_id)
+        if future is None:
+            metrics.reject_pairing(self.tunnel_id, client)
+            writer.close()
+            return
+        started = time.monotonic()
 
         # 2. Notify Client via Control Channel
-        # Msg: INCOMING_CONN | tunnel_id_len(4) | tunnel_id | conn_id_len(4) | conn_id
         try:
-            tid_bytes = self.tunnel_id.encode('utf-8')
-            cid_bytes = conn_id.encode('utf-8')
-            payload = struct.pack(">I", len(tid_bytes)) + tid_bytes + \
-                      struct.pack(">I", len(cid_bytes)) + cid_bytes
-            
-            await self.control_session.send_message(MsgType.INCOMING_CONN, payload)
+            await self.control_session.send_message(MsgType.INCOMING_CONN, self.incoming_conn_payload(payload))
             # 제어 채널로 INCOMING_CONN 통지 완료를 기록한다.
-            self.logger.debug(f"INCOMING_CONN sent: tunnel_id={self.tunnel_id}, conn_id={conn_id}")
+            self.events.sampled(TunnelEvent.INCOMING_CONN_SENT, logging.DEBUG,
+                                "INCOMING_CONN sent: tunnel_id=%s, conn_id=%s", self.tunnel_id, conn_id)
 
-            # 3. Wait for Data Channel from Client (timeout 10s)
-            data_codec: FrameCodec = await asyncio.wait_for(future, timeout=10.0)
+            # 3. Wait for Data Channel from Client (만료는 pairer가 TimeoutError로 알린다)
+            data_codec: FrameCodec = await future
+            metrics.observe_pairing_wait(self.tunnel_id, "data_channel", time.monotonic() - started, client)
             
             # 4. Bridge Traffic
-            self.logger.info(f"Bridging conn_id={conn_id} public <-> data channel")
-            await self.bridge(reader, writer, data_codec)
+            self.events.sampled(TunnelEvent.BRIDGE_STARTED, logging.INFO,
+                                "Bridging conn_id=%s public <-> data channel", conn_id)
+            await self.bridge(reader, writer, data_codec, conn_id, "data_channel")
             # 브리지가 정상 종료되면 흐름 종료를 기록한다.
-            self.logger.debug(f"Bridge finished conn_id={conn_id}")
+            self.events.sampled(TunnelEvent.BRIDGE_FINISHED, logging.DEBUG, "Bridge finished conn_id=%s", conn_id)
 
         except asyncio.TimeoutError:
+            metrics.expire_pairing(self.tunnel_id, client)
             self.logger.error(f"Timeout waiting for data channel conn_id={conn_id}")
-            self.pairer.cancel(conn_id)
         except Exception as e:
             self.logger.error(f"Error handling public conn {conn_id}: {e}")
         finally:
+            # 전송 실패나 리스너 종료로 빠져나온 경우에도 대기 항목을 남기지 않는다.
+            self.pairer.cancel(conn_id)
             # 소켓 종료 단계는 실패 원인 조사에 중요하므로 남긴다.
-            self.logger.debug(f"Closing public socket conn_id={conn_id}")
+            self.logger.debug("Closing public socket conn_id=%s", conn_id)
             writer.close()
             await writer.wait_closed()
 
-    async def bridge(self, public_r: asyncio.StreamReader, public_w: asyncio.StreamWriter, data_codec: FrameCodec):
+    def incoming_conn_payload(self, conn_payload: bytes) -> bytes:
+        """INCOMING_CONN 페이로드: STREAM_OPEN과 같은 형식 뒤에 선택 필드 flags(1)를 붙인다."""
+        return conn_payload + bytes([CONN_FLAG_PLAINTEXT]) if self.plaintext else conn_payload
+
+    async def bridge(self, public_r: asyncio.StreamReader, public_w: asyncio.StreamWriter, data_codec: FrameCodec,
+                     conn_id: str = "", path: str = "data_channel"):
         # Bridge loop: Public Raw <-> Data Codec (Encrypted/Compressed)
-        # 디버깅을 위해 송수신 바이트 통계를 수집한다.
-        # 너무 많은 로그를 피하기 위해 "첫 패킷"과 "종료 시 요약"만 기록한다.
-        stats = {
-            "public_to_client_bytes": 0,
-            "public_to_client_packets": 0,
-            "client_to_public_bytes": 0,
-            "client_to_public_packets": 0,
-        }
-        
-        async def pipe_public_to_client():
+        # 압축 정책은 상태(백오프)를 가지므로 연결마다 새로 만든다.
+        compression = CompressionPolicy(self.compression)
+        server = self.control_session.server
+        read_size, coalesce_ms = server.read_size, server.coalesce_ms
+        plaintext = self.plaintext and isinstance(data_codec, FrameCodec)
+        # 방향별 바이트/프레임 카운터. 지표 엔드포인트가 활성 연결의 값을 실시간으로 집계한다.
+        # 로그는 너무 많아지지 않도록 "첫 패킷"과 "종료 시 요약"만 기록한다.
+        stats = server.metrics.open_connection(self.tunnel_id, conn_id, "plaintext" if plaintext else path,
+                                               None if plaintext else compression, self.control_session.client_id)
+        try:
+            if plaintext:
+                await self._bridge_plaintext(public_r, public_w, data_codec, stats)
+            else:
+                await self._bridge_loops(public_r, public_w, data_codec, compression, read_size, coalesce_ms, stats)
+        finally:
+            server.metrics.close_connection(stats)
+        await data_codec.close()
+
+    async def _bridge_plaintext(self, public_r, public_w, data_codec: FrameCodec, stats):
+        """
+        평문 터널: DATA_CONN_READY 이후 데이터 채널에는 프레임 없이 원시 바이트만 흐른다.
+        두 소켓을 이벤트 루프에서 떼어 내 splice(가능하면)로 중계하고, 반종료는 TCP로 그대로 전달한다.
+        """
+        def count_public_to_client(n: int):
+            stats.public_to_client_frames += 1
+            stats.public_to_client_bytes += n
+
+        def count_client_to_public(n: int):
+            stats.client_to_public_frames += 1
+            stats.client_to_public_bytes += n
+
+        if not await relay_streams(public_r, public_w, data_codec.reader, data_codec.writer,
+                                   count_public_to_client, count_client_to_public):
+            self.events.sampled(TunnelEvent.BRIDGE_ABORTED, logging.INFO, "평문 중계 비정상 종료")
+        self.logger.debug(
+            "평문 중계 통계: public->client bytes=%d, client->public bytes=%d",
+            stats.public_to_client_bytes,
+            stats.client_to_public_bytes,
+        )
+
+    async def _bridge_loops(self, public_r, public_w, data_codec, compression, read_size, coalesce_ms, stats):
+        """
+        양방향 파이프를 실행한다. 한쪽 방향이 EOF로 끝나면 DATA_EOF로 반대편에 반종료를 전달하고,
+        두 방향이 모두 끝나면 바로 정리한다. (연결 오류로 끝난 경우에만 반대 방향을 강제 종료)
+        """
+        # 1:1 데이터 채널은 서버의 타이머 바퀴에 등록해 유휴 중에도 HEARTBEAT로 생존을 확인한다.
+        # (다중화 스트림은 채널 단위로 확인하므로 여기서 등록하지 않는다)
+        liveness = self.control_session.server.liveness
+        alive = None
+        if liveness and isinstance(data_codec, FrameCodec):
+            async def send_heartbeat():
+                if alive.tx_open:
+                    await data_codec.write_message(MsgType.HEARTBEAT, 0, b"")
+            alive = liveness.register("data_channel", send_heartbeat, abort_transport(data_codec.writer))
+
+        async def pipe_public_to_client() -> bool:
             try:
                 while True:
-                    data = await public_r.read(4096)
+                    data = await read_coalesced(public_r, read_size, coalesce_ms)
                     if not data: break
                     # 공용 포트 -> 데이터 채널 방향 트래픽 통계
-                    stats["public_to_client_packets"] += 1
-                    stats["public_to_client_bytes"] += len(data)
-                    if stats["public_to_client_packets"] == 1:
-                        self.logger.debug(f"첫 공용→클라이언트 데이터: {len(data)} bytes")
-                    # Prepend Protocol Header: | Type(1) | Flags(1) | StreamID(4) |
-                    header = bytes([MsgType.DATA, 0]) + struct.pack(">I", 0)
-                    await data_codec.write_frame(header + data)
+                    stats.public_to_client_frames += 1
+                    stats.public_to_client_bytes += len(data)
+                    if stats.public_to_client_frames == 1:
+                        self.events.sampled(TunnelEvent.FIRST_DATA, logging.DEBUG,
+                                            "첫 공용→클라이언트 데이터: %d bytes", len(data))
+                    # Protocol Header: | Type(1) | Flags(1) | StreamID(4) | (코덱이 복사 없이 붙인다)
+                    await data_codec.write_message(MsgType.DATA, 0, data, compression=compression)
+                # 공용 클라이언트가 송신을 마쳤다. 응답은 계속 받을 수 있도록 반종료만 전달한다.
+                if alive:
+                    alive.tx_open = False
+                await data_codec.write_message(MsgType.DATA_EOF, 0, b"")
+                self.events.sampled(TunnelEvent.EOF_FORWARDED, logging.DEBUG, "공용→클라이언트 EOF 전달")
+                return True
             except Exception as e:
                 # 공용→클라이언트 경로에서 발생한 예외를 기록한다.
                 # 여기서 예외가 나면 서버->클라이언트 데이터 전달이 끊길 수 있다.
                 self.logger.exception(f"공용→클라이언트 파이프 예외: {e}")
+                return False
         
-        async def pipe_client_to_public():
+        async def pipe_client_to_public() -> bool:
             try:
                 while True:
                     # Reads frame (Decrypted/Decompressed)
                     try:
                         data = await data_codec.read_frame()
                     except Exception as e:
+                        if alive and alive.reaped:
+                            # 생존 확인에서 응답이 없어 끊은 채널이다. (이미 경고 로그를 남겼다)
+                            return False
                         # read_frame에서 길이 초과 등 비정상 데이터가 감지되면 공격 시도일 수 있다.
                         # 예외를 기록하고 해당 연결만 종료해 서버 전체가 멈추지 않게 한다.
                         if isinstance(e, ValueError):
                             self.logger.warning(f"SECURITY: Invalid data frame on data channel: {e}")
                         else:
                             self.logger.exception(f"클라이언트→공용 read_frame 예외: {e}")
-                        break
-                    if not data: break # End of stream check? Length 0?
-                    # Special check: Length 0 frame might be heartbeat or keepalive?
-                    # FrameCodec returns plain bytes.
-                    if len(data) == 0: continue
-                    
-                    # Wait, if we use MsgType for DATA, we need to strip it?
-                    # In this architecture: Data Channel sends RAW frames of data?
-                    # Plan 4.3 says "Frame Payload: Type | Flags | StreamID | Payload"
-                    # BUT for Data Channel, if it's 1-to-1, do we need Type?
-                    # If we use FrameCodec strictly as "Transport Layer", then inside is the Protocol.
-                    # MsgType.DATA used?
-                    # If we stick to "Protocol", then:
-                    #   packet = read_frame()
-                    #   type = packet[0]
-                    #   if type == DATA: write(packet[body])
-                    # Let's check parse logic below.
-                    
-                    if len(data) > 0 and data[0] == MsgType.DATA:
-                        # Strip Type(1)+Flags(1)+StreamID(4) ?
-                        # The Plan 4.3 defines headers.
-                        # | type(1) | flags(1) | stream_id(4) | payload... |
-                        # Data channel is 1-to-1, so StreamID might be 0.
-                        # Let's assume header len is 1+1+4 = 6.
+                        return False
+                    # 빈 프레임은 데이터 채널(또는 다중화 스트림)이 끊겼다는 뜻이다.
+                    if not data: return False
+                    if alive:
+                        alive.seen()
+
+                    # 데이터 채널 프레임: | type(1) | flags(1) | stream_id(4) | payload... |
+                    # 1:1 채널에서는 StreamID가 0이고, 다중화 스트림은 채널이 이미 분배해 준다.
+                    if data[0] == MsgType.DATA:
                         if len(data) > 6:
                             payload_len = len(data) - 6
-                            stats["client_to_public_packets"] += 1
-                            stats["client_to_public_bytes"] += payload_len
-                            if stats["client_to_public_packets"] == 1:
-                                self.logger.debug(f"첫 클라이언트→공용 데이터: {payload_len} bytes")
-                            public_w.write(data[6:])
+                            stats.client_to_public_frames += 1
+                            stats.client_to_public_bytes += payload_len
+                            if stats.client_to_public_frames == 1:
+                                self.events.sampled(TunnelEvent.FIRST_DATA, logging.DEBUG,
+                                                    "첫 클라이언트→공용 데이터: %d bytes", payload_len)
+                            # 헤더를 잘라낼 때 복사하지 않도록 memoryview로 넘긴다.
+                            public_w.write(memoryview(data)[6:])
                             await public_w.drain()
-                    elif len(data) > 0 and data[0] == MsgType.CLOSE_TUNNEL:
-                         break
+                    elif data[0] == MsgType.DATA_EOF:
+                        # 로컬 서비스가 응답을 다 보냈다. 공용 소켓도 송신 방향만 닫는다.
+                        if alive:
+                            alive.rx_open = False
+                        write_eof(public_w)
+                        self.events.sampled(TunnelEvent.EOF_FORWARDED, logging.DEBUG, "클라이언트→공용 EOF 전달")
+                        return True
+                    elif data[0] == MsgType.CLOSE_TUNNEL:
+                        return False
+                    elif data[0] == MsgType.HEARTBEAT:
+                        if alive:
+                            alive.heartbeat_seen()
                     else:
                         # 예상하지 못한 타입은 로그로 남겨 디버깅에 활용한다.
                         self.logger.warning(f"클라이언트→공용 미지원 타입 수신: type={data[0]}")
             except Exception as e:
                 # 클라이언트→공용 파이프에서 발생한 예외를 기록한다.
                 self.logger.exception(f"클라이언트→공용 파이프 예외: {e}")
+                return False
 
         task1 = asyncio.create_task(pipe_public_to_client())
         task2 = asyncio.create_task(pipe_client_to_public())
         
-        # 주의: HTTP 클라이언트는 요청 전송 후 write 쪽을 먼저 닫는 경우가 있다.
-        # 그때 공용→클라이언트 파이프가 먼저 종료되면, 응답 경로가 끊겨버린다.
-        # 따라서 한쪽이 끝나도 반대쪽을 잠시 더 기다려 응답을 흘려보낸다.
-        done, pending = await asyncio.wait([task1, task2], return_when=asyncio.FIRST_COMPLETED)
-        if task1 in done and task2 not in done:
-            self.logger.info("공용→클라이언트 종료, 클라이언트→공용 응답 대기 시작")
-            try:
-                await asyncio.wait_for(task2, timeout=10.0)
-            except asyncio.TimeoutError:
-                self.logger.warning("클라이언트→공용 응답 대기 시간 초과, 강제 종료")
-                task2.cancel()
-        elif task2 in done and task1 not in done:
-            self.logger.info("클라이언트→공용 종료, 공용→클라이언트 종료 대기 시작")
-            try:
-                await asyncio.wait_for(task1, timeout=10.0)
-            except asyncio.TimeoutError:
-                self.logger.warning("공용→클라이언트 종료 대기 시간 초과, 강제 종료")
-                task1.cancel()
-        
-        # 남아있는 태스크를 정리한다.
-        await asyncio.gather(task1, task2, return_exceptions=True)
+        # HTTP 클라이언트는 요청 전송 후 write 쪽을 먼저 닫는 경우가 있다.
+        # 반종료는 양쪽 끝까지 전달되므로 응답이 끝나는 시점(DATA_EOF)까지 시간 제한 없이 기다린다.
+        try:
+            if not await join_pipes(task1, task2):
+                self.events.sampled(TunnelEvent.BRIDGE_ABORTED, logging.INFO, "브리지 비정상 종료, 반대 방향 파이프 정리")
+        finally:
+            if alive:
+                alive.close()
         
         # 브리지 종료 시 통계 요약 로그
         self.logger.debug(
             "브리지 통계: public->client packets=%d bytes=%d, client->public packets=%d bytes=%d",
-            stats["public_to_client_packets"],
-            stats["public_to_client_bytes"],
-            stats["client_to_public_packets"],
-            stats["client_to_public_bytes"],
+            stats.public_to_client_frames,
+            stats.public_to_client_bytes,
+            stats.client_to_public_frames,
+            stats.client_to_public_bytes,
         )
-        await data_codec.close()
 
 class ControlSession:
     def __init__(
@@ -246,27 +458,54 @@ class ControlSession:
         session_hmac_key: bytes,
     ):
         self.codec = codec
+        # 이 세션의 외부 연결만 짝짓는 페어러 (터널별 대기 상한도 클라이언트마다 따로 적용된다)
         self.pairer = pairer
-        # 단일 클라이언트 제한 및 세션 바인딩을 위해 서버 레퍼런스를 보관한다.
+        # 세션 등록/해제와 데이터 채널 바인딩을 위해 서버 레퍼런스를 보관한다.
         self.server = server
         self.client_key = client_key
+        # 지표/로그에 쓰는 짧은 클라이언트 식별자
+        self.client_id = client_id(client_key)
         self.session_hmac_key = session_hmac_key
-        # tunnel_id -> PublicListener
+        # tunnel_id -> PublicListener (터널 ID는 클라이언트마다 독립된 이름 공간이다)
         self.tunnels: Dict[str, PublicListener] = {}
+        # 클라이언트가 연결해 둔 다중화 데이터 채널 목록
+        self.mux_channels: List[MuxChannel] = []
         self.logger = logging.getLogger("ControlSession")
         self.is_active = True
 
+    def add_mux_channel(self, channel: MuxChannel):
+        self.mux_channels.append(channel)
+        self.logger.info(f"Mux channel registered: {channel.name} (total={len(self.mux_channels)})")
+
+    def remove_mux_channel(self, channel: MuxChannel):
+        if channel in self.mux_channels:
+            self.mux_channels.remove(channel)
+            self.logger.info(f"Mux channel removed: {channel.name} (total={len(self.mux_channels)})")
+
+    def pick_mux_channel(self) -> Optional[MuxChannel]:
+        """
+        활성 스트림이 가장 적은 다중화 채널을 고른다.
+        사용 가능한 채널이 없으면 None을 반환해 기존 데이터 채널 방식으로 처리한다.
+        """
+        candidates = [c for c in self.mux_channels if c.has_capacity()]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda c: c.active_streams)
+
     async def send_message(self, msg_type: MsgType, payload: bytes = b""):
         # Construct packet: | Type(1) | Flags(1) | StreamID(4) | Payload |
         # Control channel uses StreamID 0 usually.
-        header = bytes([msg_type, 0]) + struct.pack(">I", 0)
-        await self.codec.write_frame(header + payload)
+        await self.codec.write_message(msg_type, 0, payload)
 
     async def send_auth_ok(self):
         """
         제어 채널이 연결되었음을 알리고, 데이터 채널 바인딩에 사용할
         HMAC 세션 키를 클라이언트에 전달한다.
+        재개 티켓은 AUTH_OK보다 먼저 보내, 클라이언트가 AUTH_OK 직후 여는 데이터 채널부터 재개를 쓰게 한다.
         """
+        ticket = self.server.ticket_keys.issue(self.client_key) if self.server.ticket_keys else None
+        if ticket:
+            await self.send_message(MsgType.SESSION_TICKET, ticket)
         await self.send_message(MsgType.AUTH_OK, self.session_hmac_key)
 
     async def send_tunnel_status(self, tunnel_id: str, status: str):
@@ -330,14 +569,22 @@ class ControlSession:
                      pass
 
     async def handle_open_tunnel(self, payload: bytes):
-        # Payload: | remote_port(4) | tunnel_id_len(4) | tunnel_id |
+        # Payload: | remote_port(4) | tunnel_id_len(4) | tunnel_id | [compression(1)] | [flags(1)] |
+        # compression 필드가 없는 구버전 클라이언트 요청은 auto로 처리한다.
         tunnel_id = None
         try:
             remote_port = struct.unpack(">I", payload[0:4])[0]
             tid_len = struct.unpack(">I", payload[4:8])[0]
             tunnel_id = payload[8:8+tid_len].decode('utf-8')
+            extra = payload[8+tid_len:]
+            compression = CompressionMode(extra[0]) if extra else CompressionMode.AUTO
+            plaintext = len(extra) > 1 and bool(extra[1] & TUNNEL_FLAG_PLAINTEXT)
             # 요청 수신 시점에 포트/ID를 기록해 적용 여부를 확인한다.
-            self.logger.info(f"OpenTunnel 요청 수신: tunnel_id={tunnel_id}, port={remote_port}")
+            self.logger.info(f"OpenTunnel 요청 수신: tunnel_id={tunnel_id}, port={remote_port}, compression={compression.name.lower()}, plaintext={plaintext}")
+            if plaintext and not self.server.allow_plaintext:
+                # 서버가 허용하지 않으면 암호화 터널로 연다. (클라이언트는 INCOMING_CONN 플래그로 구분한다)
+                self.logger.warning(f"Plaintext requested for tunnel {tunnel_id} but not allowed; using encrypted data channels")
+                plaintext = False
             
             # Check if exists
             if tunnel_id in self.tunnels:
@@ -345,9 +592,12 @@ class ControlSession:
                 await self.tunnels[tunnel_id].stop()
                 del self.tunnels[tunnel_id]
 
-            listener = PublicListener(tunnel_id, remote_port, self, self.pairer)
+            listener = PublicListener(tunnel_id, remote_port, self, self.pairer, compression, plaintext)
             await listener.start()
             self.tunnels[tunnel_id] = listener
+            if self.server.cluster:
+                # 다른 워커도 같은 포트를 SO_REUSEPORT로 열어 연결을 나눠 받는다.
+                await self.server.cluster.announce_tunnel(self.client_key, tunnel_id, remote_port, compression, plaintext)
             
             # Send STATUS OK? For now just log
             self.logger.info(f"Tunnel opened: {tunnel_id} on port {remote_port}")
@@ -377,6 +627,8 @@ class ControlSession:
             if tunnel_id in self.tunnels:
                 await self.tunnels[tunnel_id].stop()
                 del self.tunnels[tunnel_id]
+                if self.server.cluster:
+                    await self.server.cluster.withdraw_tunnel(self.client_key, tunnel_id)
                 self.logger.info(f"Tunnel closed: {tunnel_id}")
                 # 클라이언트에게 "Stopped" 상태를 통보한다.
                 await self.send_tunnel_status(tunnel_id, "Stopped")
@@ -395,48 +647,100 @@ class ControlSession:
 
     async def cleanup(self):
         self.is_active = False
-        # 제어 세션 종료 시 단일 클라이언트 락을 해제한다.
+        # 제어 세션 종료 시 같은 클라이언트가 다시 접속할 수 있도록 등록을 해제한다.
         await self.server.release_control_session(self.client_key, self.session_hmac_key)
         for t in self.tunnels.values():
             await t.stop()
         self.tunnels.clear()
+        # 세션에 묶인 다중화 채널도 함께 닫는다.
+        for channel in list(self.mux_channels):
+            await channel.close()
+        self.mux_channels.clear()
         await self.codec.close()
 
 class Server:
-    def __init__(self, port: int, identity_key: nacl.signing.SigningKey):
+    def __init__(self, port: int, identity_key: nacl.signing.SigningKey,
+                 read_size: int = DEFAULT_READ_SIZE, coalesce_ms: float = DEFAULT_COALESCE_MS,
+                 cluster=None, ticket_lifetime: int = DEFAULT_TICKET_LIFETIME,
+                 metrics_port: int = 0, metrics_host: str = '127.0.0.1',
+                 max_pending_per_tunnel: int = DEFAULT_MAX_PENDING_PER_TUNNEL, allow_plaintext: bool = False,
+                 loop_watchdog_ms: float = 0.0, data_heartbeat_interval: float = DEFAULT_DATA_HEARTBEAT_INTERVAL):
         self.port = port
         self.identity_key = identity_key
-        self.pairer = ConnectionPairer()
+        # 터널별 트래픽/페어링 대기/핸드셰이크 지표. metrics_port가 0이면 HTTP 엔드포인트는 열지 않는다.
+        self.metrics = ServerMetrics()
+        self.metrics_port = metrics_port
+        self.metrics_host = metrics_host
+        # 세션 재개 티켓 발급/검증기 (ticket_lifetime이 0이면 재개를 쓰지 않는다)
+        # 워커 모드에서는 모든 워커가 같은 티켓을 검증하도록 브로커가 키를 만들어 교체/배포한다.
+        self.ticket_keys = TicketKeys(ticket_lifetime, auto_rotate=cluster is None) if ticket_lifetime > 0 else None
+        # 핸드셰이크 종류별 횟수 (재개 효과 확인용)
+        self.handshake_stats = {"full": 0, "resumed": 0, "ticket_rejected": 0}
+        # 워커 모드(--workers)에서 브로커와 연결된 ClusterLink. 단일 프로세스 모드에서는 None.
+        self.cluster = cluster
+        # 공용 소켓 읽기 크기와 작은 쓰기 병합 대기 시간 (대용량 전송 시 프레임 수를 줄인다)
+        self.read_size = clamp_read_size(read_size)
+        self.coalesce_ms = max(0.0, coalesce_ms)
+        # 페어링 대기 중인 외부 연결 수를 터널별로 제한한다. (공용 포트 폭주 대비, 세션마다 별도 페어러)
+        self.max_pending_per_tunnel = max_pending_per_tunnel
+        # 클라이언트가 요청한 평문 터널(AEAD/LZ4 생략)을 허용할지. 신뢰할 수 있는 내부망에서만 켠다.
+        self.allow_plaintext = allow_plaintext
+        # 이벤트 루프 지연/느린 콜백 진단 (loop_watchdog_ms 이상 걸린 콜백을 기록, 0이면 비활성화)
+        # 집계는 지표 엔드포인트(/metrics, /metrics.json)에도 함께 나온다.
+        self.loop_watchdog = LoopWatchdog("server", loop_watchdog_ms) if loop_watchdog_ms > 0 else None
+        self.metrics.loop_watchdog = self.loop_watchdog
+        # 데이터 채널/다중화 채널의 HEARTBEAT와 무응답 채널 정리를 타이머 바퀴 하나로 처리한다. (0이면 비활성화)
+        self.liveness = LivenessWheel("server", data_heartbeat_interval) if data_heartbeat_interval > 0 else None
+        self.metrics.liveness = self.liveness
         self.logger = logging.getLogger("Server")
-        # 단일 클라이언트 정책: 한 번에 하나의 제어 세션만 허용한다.
-        self.active_client_key: Optional[bytes] = None
-        self.active_session_hmac_key: Optional[bytes] = None
-        self.active_session: Optional[ControlSession] = None
-        self.control_lock = asyncio.Lock()
+        self.events = TunnelLog(self.logger)
+        # 클라이언트 identity 키 -> 제어 세션.
+        # ALLOWED_CLIENT_KEYS의 클라이언트마다 하나의 제어 세션을 두며, 각자 HMAC 키와 터널 이름 공간을 가진다.
+        self.sessions: Dict[bytes, ControlSession] = {}
+        # 등록 중인 클라이언트 키 (워커 모드에서 브로커 응답을 기다리는 동안 같은 키의 중복 등록을 막는다)
+        self._registering: Set[bytes] = set()
+
+    @property
+    def active_session(self) -> Optional[ControlSession]:
+        """클라이언트가 하나뿐인 구성에서 그 제어 세션 (없으면 None)"""
+        return next(iter(self.sessions.values()), None)
 
-    async def register_control_session(self, client_key: bytes) -> Optional[bytes]:
+    def new_session(self, codec: Optional[FrameCodec], client_key: bytes, session_hmac_key: bytes) -> ControlSession:
+        return ControlSession(codec, ConnectionPairer(self.max_pending_per_tunnel), self, client_key, session_hmac_key)
+
+    async def register_control_session(self, codec: FrameCodec, client_key: bytes) -> Optional[ControlSession]:
         """
-        단일 클라이언트 정책을 적용하고, 데이터 채널 바인딩용 HMAC 세션 키를 생성한다.
-        이미 다른 제어 세션이 활성 상태라면 None을 반환해 신규 연결을 거부한다.
+        클라이언트의 제어 세션을 만들고 데이터 채널 바인딩용 HMAC 세션 키를 생성한다.
+        같은 클라이언트의 제어 세션이 이미 활성 상태라면 None을 반환해 신규 연결을 거부한다.
+        (다른 클라이언트의 세션과는 독립적으로 동시에 유지된다)
         """
-        async with self.control_lock:
-            if self.active_client_key is not None:
-                return None
-            self.active_client_key = client_key
+        if client_key in self.sessions or client_key in self._registering:
+            return None
+        # 브로커 응답을 기다리는 동안 잠금을 잡고 있으면, 같은 IPC로 오는 다른 클라이언트의
+        # 세션 통지를 처리하지 못해 교착된다. 잠금 대신 키 단위로 예약만 해 둔다.
+        self._registering.add(client_key)
+        try:
             # 제어 세션별로 난수 기반 HMAC 키를 생성하여 데이터 채널을 바인딩한다.
-            self.active_session_hmac_key = secrets.token_bytes(HMAC_KEY_LEN)
-            return self.active_session_hmac_key
+            session_hmac_key = secrets.token_bytes(HMAC_KEY_LEN)
+            # 워커 모드에서는 다른 워커에 같은 클라이언트의 세션이 있는지 브로커가 최종 판단한다.
+            if self.cluster and not await self.cluster.register_session(client_key, session_hmac_key):
+                return None
+            session = self.new_session(codec, client_key, session_hmac_key)
+            self.sessions[client_key] = session
+            return session
+        finally:
+            self._registering.discard(client_key)
 
     async def release_control_session(self, client_key: bytes, session_hmac_key: bytes):
         """
         제어 세션이 종료될 때 상태를 정리한다.
         다른 세션이 이미 교체된 경우를 대비해 키가 일치할 때만 해제한다.
         """
-        async with self.control_lock:
-            if self.active_client_key == client_key and self.active_session_hmac_key == session_hmac_key:
-                self.active_client_key = None
-                self.active_session_hmac_key = None
-                self.active_session = None
+        session = self.sessions.get(client_key)
+        if session and session.session_hmac_key == session_hmac_key:
+            del self.sessions[client_key]
+            if self.cluster:
+                await self.cluster.release_session(client_key, session_hmac_key)
 
     def verify_data_conn_ready(self, payload: bytes, session_hmac_key: bytes) -> Optional[str]:
         """
@@ -476,19 +780,73 @@ class Server:
             return None
         return conn_id
 
+    async def handle_mux_channel(self, codec: FrameCodec, client_key: bytes, payload: bytes):
+        """
+        MUX_CHANNEL_READY로 등록된 데이터 채널을 제어 세션에 붙이고, 채널이 끊길 때까지 유지한다.
+        payload 포맷은 DATA_CONN_READY와 같으며 conn_id 자리에 channel_id가 들어간다.
+        """
+        session = self.sessions.get(client_key)
+        if not session:
+            self.logger.warning("SECURITY: Mux channel without matching control session ignored.")
+            await codec.close()
+            return
+        channel_id = self.verify_data_conn_ready(payload, session.session_hmac_key)
+        if not channel_id:
+            await codec.close()
+            return
+        channel = MuxChannel(codec, channel_id, liveness=self.liveness)
+        session.add_mux_channel(channel)
+        if self.cluster:
+            await self.cluster.report_mux_channels(client_key, len(session.mux_channels))
+        try:
+            await channel.run()
+        finally:
+            session.remove_mux_channel(channel)
+            if self.cluster and self.sessions.get(client_key) is session:
+                await self.cluster.report_mux_channels(client_key, len(session.mux_channels))
+
     async def listen(self):
-        server = await asyncio.start_server(self.handle_client, '0.0.0.0', self.port)
-        self.logger.info(f"Control Server listening on {self.port}")
-        async with server:
-            await server.serve_forever()
+        if self.loop_watchdog:
+            self.loop_watchdog.start()
+        if self.liveness:
+            self.liveness.start()
+        if self.metrics_port:
+            # 워커 모드에서는 워커마다 지표가 따로 있으므로 metrics_port + worker_id에서 연다.
+            port = self.metrics_port + (self.cluster.worker_id if self.cluster else 0)
+            await self.metrics.start_http(self.metrics_host, port)
+        if self.cluster:
+            # 모든 워커가 같은 제어 포트를 SO_REUSEPORT로 열고 커널이 연결을 분배한다.
+            self.cluster.start(self)
+            server = await asyncio.start_server(self.handle_client, sock=self.cluster.create_listen_socket(self.port))
+            self.logger.info(f"Control Server listening on {self.port} (worker {self.cluster.worker_id})")
+        else:
+            server = await asyncio.start_server(self.handle_client, '0.0.0.0', self.port)
+            self.logger.info(f"Control Server listening on {self.port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.metrics.stop_http()
+            if self.liveness:
+                await self.liveness.stop()
+            if self.loop_watchdog:
+                await self.loop_watchdog.stop()
 
     async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         peer = writer.get_extra_info('peername')
-        self.logger.info(f"Connecting from {peer}")
+        self.events.sampled(TunnelEvent.CLIENT_CONNECTED, logging.INFO, "Connecting from %s", peer)
         
         # 1. Handshake
-        hs = ServerHandshake(reader, writer, self.identity_key)
-        hs_result = await hs.perform_handshake()
+        hs = ServerHandshake(reader, writer, self.identity_key, self.ticket_keys)
+        started = time.monotonic()
+        with task_category("handshake"):
+            hs_result = await hs.perform_handshake()
+        self.metrics.observe_handshake(
+            ("resumed" if hs.resumed else "full") if hs_result else "failed", time.monotonic() - started)
+        if hs.ticket_rejected:
+            self.handshake_stats["ticket_rejected"] += 1
+        if hs_result:
+            self.handshake_stats["resumed" if hs.resumed else "full"] += 1
         
         if not hs_result:
             self.logger.warning("Handshake failed. Closing.")
@@ -514,29 +872,34 @@ class Server:
                 
             msg_type = first_frame_bytes[0]
             # 첫 프레임 타입 로깅은 제어/데이터 채널 구분에 유용하다.
-            self.logger.debug(f"첫 프레임 수신: msg_type={msg_type}")
+            self.events.sampled(TunnelEvent.FIRST_FRAME, logging.DEBUG, "첫 프레임 수신: msg_type=%s", msg_type)
             
             if msg_type == MsgType.DATA_CONN_READY:
-                # 데이터 채널은 이미 승인된 제어 세션의 HMAC 토큰으로만 허용한다.
-                if not self.active_client_key or not self.active_session_hmac_key:
+                # 데이터 채널은 같은 클라이언트 키로 승인된 제어 세션의 HMAC 토큰으로만 허용한다.
+                # 다른 클라이언트의 conn_id는 그 세션의 페어러에만 있으므로 가로챌 수 없다.
+                session = self.sessions.get(client_key)
+                if not session:
                     # 활성 제어 세션이 없는데 데이터 채널이 오면 비정상 시도로 간주한다.
-                    self.logger.warning("SECURITY: No active control session. Data channel ignored.")
-                    await codec.close()
-                    return
-                if client_key != self.active_client_key:
-                    # 다른 클라이언트 키로 데이터 채널이 접속하면 차단한다.
-                    self.logger.warning("SECURITY: Data channel from different client ignored.")
+                    self.logger.warning("SECURITY: No active control session for client. Data channel ignored.")
                     await codec.close()
                     return
                 payload = first_frame_bytes[6:]
-                conn_id = self.verify_data_conn_ready(payload, self.active_session_hmac_key)
+                conn_id = self.verify_data_conn_ready(payload, session.session_hmac_key)
                 if not conn_id:
                     await codec.close()
                     return
-                self.logger.info(f"Data Connection Ready for {conn_id}")
-                self.pairer.fulfill(conn_id, codec)
+                self.events.sampled(TunnelEvent.DATA_CONN_READY, logging.INFO,
+                                    "Data Connection Ready for %s (client %s)", conn_id, session.client_id)
+                if self.cluster:
+                    # 워커 모드에서는 공용 소켓이 브로커에 보관되어 있으므로 회수해 이 워커에서 브리지한다.
+                    await self.cluster.bridge_claimed_conn(client_key, conn_id, codec)
+                elif not session.pairer.fulfill(conn_id, codec):
+                    await codec.close()
                 # Do NOT close codec here; it is handed off.
-                
+
+            elif msg_type == MsgType.MUX_CHANNEL_READY:
+                await self.handle_mux_channel(codec, client_key, first_frame_bytes[6:])
+
             else:
                 # Assume Control Session (Main)
                 # We need to process this first frame inside the session too?
@@ -545,13 +908,12 @@ class Server:
                 # The first frame AFTER handshake is what we are looking at.
                 # It could be 'OpenTunnel' or 'Heartbeat'.
                 
-                session_hmac_key = await self.register_control_session(client_key)
-                if not session_hmac_key:
-                    self.logger.warning("Another control session is active. Connection ignored.")
+                session = await self.register_control_session(codec, client_key)
+                if not session:
+                    self.logger.warning(f"Control session for client {client_id(client_key)} is already active. Connection ignored.")
                     await codec.close()
                     return
-                session = ControlSession(codec, self.pairer, self, client_key, session_hmac_key)
-                self.active_session = session
+                self.logger.info(f"Control session started: client {session.client_id} (sessions={len(self.sessions)})")
                 try:
                     # 제어 채널이 연결되면 HMAC 키를 먼저 전달한다.
                     await session.send_auth_ok()
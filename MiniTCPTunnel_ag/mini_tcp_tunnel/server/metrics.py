@@ -0,0 +1,389 @@
+import asyncio
+import bisect
+import json
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from ..shared.tunnel_log import event_counts
+
+# 페어링 대기/핸드셰이크 시간 히스토그램 버킷(초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "minitcptunnel"
+DIRECTIONS = ("public_to_client", "client_to_public")
+
+
+def _escape_label(value: str) -> str:
+    # 터널 ID는 사용자가 정하는 문자열이므로 Prometheus 라벨 규칙에 맞게 이스케이프한다.
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(str(v))}"' for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram 형식으로 출력한다)"""
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def render(self, name: str, **labels) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(**labels, le='+Inf')} {self.count}")
+        lines.append(f"{name}_sum{_labels(**labels)} {self.sum:.6f}")
+        lines.append(f"{name}_count{_labels(**labels)} {self.count}")
+        return lines
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "sum": round(self.sum, 6),
+                "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts))}
+
+
+class ConnectionMetrics:
+    """
+    브리지 하나(외부 연결 하나)의 실시간 카운터.
+    브리지 루프는 이 객체의 필드만 증가시키고, 집계는 스크레이프 시점에 한다.
+    """
+    def __init__(self, tunnel_id: str, conn_id: str, path: str, compression=None, client: str = ""):
+        self.tunnel_id = tunnel_id
+        # 터널 ID는 클라이언트마다 따로 정하므로 (client, tunnel_id)로 구분한다.
+        self.client = client
+        self.conn_id = conn_id
+        # "mux"(다중화 스트림) 또는 "data_channel"(연결별 데이터 채널)
+        self.path = path
+        # 공용→클라이언트 방향 CompressionPolicy (압축률 집계용)
+        self.compression = compression
+        self.started = time.monotonic()
+        self.public_to_client_bytes = 0
+        self.public_to_client_frames = 0
+        self.client_to_public_bytes = 0
+        self.client_to_public_frames = 0
+
+    def compression_bytes(self):
+        if self.compression is None:
+            return 0, 0
+        return self.compression.input_bytes, self.compression.output_bytes
+
+    def snapshot(self) -> dict:
+        return {
+            "client": self.client,
+            "tunnel_id": self.tunnel_id,
+            "conn_id": self.conn_id,
+            "path": self.path,
+            "age_seconds": round(time.monotonic() - self.started, 3),
+            "public_to_client_bytes": self.public_to_client_bytes,
+            "public_to_client_frames": self.public_to_client_frames,
+            "client_to_public_bytes": self.client_to_public_bytes,
+            "client_to_public_frames": self.client_to_public_frames,
+        }
+
+
+class TunnelMetrics:
+    """터널 하나의 누적 카운터. 종료된 브리지의 값은 합산해 두고 활성 브리지는 조회 시 더한다."""
+    def __init__(self, tunnel_id: str, client: str = ""):
+        self.tunnel_id = tunnel_id
+        self.client = client
+        self.active: Set[ConnectionMetrics] = set()
+        self.bridges_total = 0
+        self.closed_bytes = {d: 0 for d in DIRECTIONS}
+        self.closed_frames = {d: 0 for d in DIRECTIONS}
+        self.closed_compression_in = 0
+        self.closed_compression_out = 0
+        # path("mux"/"data_channel") -> 외부 연결이 클라이언트 쪽 채널과 이어지기까지의 대기 시간
+        self.pairing_wait: Dict[str, Histogram] = {}
+        # 페어링 대기 상한에 걸려 바로 끊은 외부 연결 수
+        self.pairing_rejected = 0
+        # 데이터 채널이 페어링 시간(10초) 안에 오지 않아 끊은 외부 연결 수
+        self.pairing_expired = 0
+        # 리스너가 멈춘 터널. 남은 브리지가 모두 끝나면 ServerMetrics에서 지운다.
+        self.retired = False
+
+    def totals(self):
+        bytes_ = dict(self.closed_bytes)
+        frames = dict(self.closed_frames)
+        comp_in, comp_out = self.closed_compression_in, self.closed_compression_out
+        for conn in self.active:
+            bytes_["public_to_client"] += conn.public_to_client_bytes
+            bytes_["client_to_public"] += conn.client_to_public_bytes
+            frames["public_to_client"] += conn.public_to_client_frames
+            frames["client_to_public"] += conn.client_to_public_frames
+            c_in, c_out = conn.compression_bytes()
+            comp_in += c_in
+            comp_out += c_out
+        return bytes_, frames, comp_in, comp_out
+
+    def snapshot(self) -> dict:
+        bytes_, frames, comp_in, comp_out = self.totals()
+        return {
+            "active_bridges": len(self.active),
+            "bridges_total": self.bridges_total,
+            "bytes": bytes_,
+            "frames": frames,
+            "compression_input_bytes": comp_in,
+            "compression_output_bytes": comp_out,
+            "compression_ratio": round(comp_out / comp_in, 4) if comp_in else 1.0,
+            "pairing_wait_seconds": {path: h.snapshot() for path, h in self.pairing_wait.items()},
+            "pairing_rejected": self.pairing_rejected,
+            "pairing_expired": self.pairing_expired,
+        }
+
+
+class ServerMetrics:
+    """서버 전체 지표: (클라이언트, 터널)별 트래픽/브리지/페어링 대기, 핸드셰이크 시간"""
+    def __init__(self):
+        # (client, tunnel_id) -> TunnelMetrics. client는 클라이언트 identity 키의 짧은 hex 표기다.
+        self.tunnels: Dict[Tuple[str, str], TunnelMetrics] = {}
+        # kind("full"/"resumed"/"failed") -> 핸드셰이크 소요 시간
+        self.handshake_duration: Dict[str, Histogram] = {}
+        # Server가 루프 워치독을 켜면 연결한다. (지연/느린 콜백/분류별 루프 시간)
+        self.loop_watchdog = None
+        # Server의 데이터 채널 생존 확인 타이머 바퀴 (HEARTBEAT 수, 무응답으로 끊은 채널 수)
+        self.liveness = None
+        self.logger = logging.getLogger("Metrics")
+        self._http_server: Optional[asyncio.AbstractServer] = None
+
+    def tunnel(self, tunnel_id: str, client: str = "") -> TunnelMetrics:
+        """리스너가 열릴 때 터널 지표를 만든다. 정리 대기 중이던 같은 터널은 그대로 다시 쓴다."""
+        metrics = self.tunnels.get((client, tunnel_id))
+        if metrics is None:
+            metrics = self.tunnels[(client, tunnel_id)] = TunnelMetrics(tunnel_id, client)
+        metrics.retired = False
+        return metrics
+
+    def remove_tunnel(self, tunnel_id: str, client: str = ""):
+        """
+        리스너가 멈춘 터널(터널 닫기/제어 세션 종료)의 지표를 지운다.
+        활성 브리지가 남아 있으면 마지막 브리지가 끝날 때 지워, 동적 터널/클라이언트가 바뀌어도 시계열이 쌓이지 않는다.
+        """
+        metrics = self.tunnels.get((client, tunnel_id))
+        if metrics is not None:
+            metrics.retired = True
+            self._prune(metrics)
+
+    def _prune(self, metrics: TunnelMetrics):
+        if metrics.retired and not metrics.active:
+            self.tunnels.pop((metrics.client, metrics.tunnel_id), None)
+
+    def open_connection(self, tunnel_id: str, conn_id: str, path: str, compression=None,
+                        client: str = "") -> ConnectionMetrics:
+        conn = ConnectionMetrics(tunnel_id, conn_id, path, compression, client)
+        # 이미 지운 터널에 뒤늦게 붙은 브리지는 집계하지 않는다.
+        tunnel = self.tunnels.get((client, tunnel_id))
+        if tunnel is not None:
+            tunnel.active.add(conn)
+            tunnel.bridges_total += 1
+        return conn
+
+    def close_connection(self, conn: ConnectionMetrics):
+        tunnel = self.tunnels.get((conn.client, conn.tunnel_id))
+        if tunnel is None or conn not in tunnel.active:
+            return
+        tunnel.active.discard(conn)
+        tunnel.closed_bytes["public_to_client"] += conn.public_to_client_bytes
+        tunnel.closed_bytes["client_to_public"] += conn.client_to_public_bytes
+        tunnel.closed_frames["public_to_client"] += conn.public_to_client_frames
+        tunnel.closed_frames["client_to_public"] += conn.client_to_public_frames
+        c_in, c_out = conn.compression_bytes()
+        tunnel.closed_compression_in += c_in
+        tunnel.closed_compression_out += c_out
+        self._prune(tunnel)
+
+    def observe_pairing_wait(self, tunnel_id: str, path: str, seconds: float, client: str = ""):
+        tunnel = self.tunnels.get((client, tunnel_id))
+        if tunnel is None:
+            return
+        histogram = tunnel.pairing_wait.get(path)
+        if histogram is None:
+            histogram = tunnel.pairing_wait[path] = Histogram()
+        histogram.observe(seconds)
+
+    def reject_pairing(self, tunnel_id: str, client: str = ""):
+        tunnel = self.tunnels.get((client, tunnel_id))
+        if tunnel is not None:
+            tunnel.pairing_rejected += 1
+
+    def expire_pairing(self, tunnel_id: str, client: str = ""):
+        tunnel = self.tunnels.get((client, tunnel_id))
+        if tunnel is not None:
+            tunnel.pairing_expired += 1
+
+    def observe_handshake(self, kind: str, seconds: float):
+        histogram = self.handshake_duration.get(kind)
+        if histogram is None:
+            histogram = self.handshake_duration[kind] = Histogram()
+        histogram.observe(seconds)
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "clients": self._snapshot_clients(),
+            "handshake_duration_seconds": {kind: h.snapshot() for kind, h in self.handshake_duration.items()},
+            "events": event_counts(),
+        }
+        if self.liveness:
+            snapshot["liveness"] = self.liveness.snapshot()
+        if self.loop_watchdog:
+            snapshot["event_loop"] = self.loop_watchdog.snapshot()
+        return snapshot
+
+    def _snapshot_clients(self) -> Dict[str, Dict[str, dict]]:
+        clients: Dict[str, Dict[str, dict]] = {}
+        for (client, tid), t in self.tunnels.items():
+            clients.setdefault(client, {})[tid] = t.snapshot()
+        return clients
+
+    def connections(self) -> List[dict]:
+        return [conn.snapshot() for t in self.tunnels.values() for conn in t.active]
+
+    def render_prometheus(self) -> str:
+        p = METRIC_PREFIX
+        lines = [
+            f"# HELP {p}_bytes_total Payload bytes bridged per tunnel and direction.",
+            f"# TYPE {p}_bytes_total counter",
+        ]
+        totals = {key: t.totals() for key, t in self.tunnels.items()}
+        for (client, tid), (bytes_, _, _, _) in totals.items():
+            for direction in DIRECTIONS:
+                lines.append(f"{p}_bytes_total{_labels(client=client, tunnel=tid, direction=direction)} {bytes_[direction]}")
+        lines += [f"# HELP {p}_frames_total Data frames bridged per tunnel and direction.",
+                  f"# TYPE {p}_frames_total counter"]
+        for (client, tid), (_, frames, _, _) in totals.items():
+            for direction in DIRECTIONS:
+                lines.append(f"{p}_frames_total{_labels(client=client, tunnel=tid, direction=direction)} {frames[direction]}")
+        lines += [f"# HELP {p}_active_bridges Currently open public connections per tunnel.",
+                  f"# TYPE {p}_active_bridges gauge"]
+        for (client, tid), t in self.tunnels.items():
+            lines.append(f"{p}_active_bridges{_labels(client=client, tunnel=tid)} {len(t.active)}")
+        lines += [f"# HELP {p}_bridges_total Public connections bridged per tunnel.",
+                  f"# TYPE {p}_bridges_total counter"]
+        for (client, tid), t in self.tunnels.items():
+            lines.append(f"{p}_bridges_total{_labels(client=client, tunnel=tid)} {t.bridges_total}")
+        lines += [f"# HELP {p}_compression_input_bytes_total Bytes offered to the frame compressor (public to client).",
+                  f"# TYPE {p}_compression_input_bytes_total counter"]
+        for (client, tid), (_, _, comp_in, _) in totals.items():
+            lines.append(f"{p}_compression_input_bytes_total{_labels(client=client, tunnel=tid)} {comp_in}")
+        lines += [f"# HELP {p}_compression_output_bytes_total Bytes sent after compression (public to client).",
+                  f"# TYPE {p}_compression_output_bytes_total counter"]
+        for (client, tid), (_, _, _, comp_out) in totals.items():
+            lines.append(f"{p}_compression_output_bytes_total{_labels(client=client, tunnel=tid)} {comp_out}")
+        lines += [f"# HELP {p}_compression_ratio Output/input bytes of the frame compressor (1.0 = no gain).",
+                  f"# TYPE {p}_compression_ratio gauge"]
+        for (client, tid), (_, _, comp_in, comp_out) in totals.items():
+            ratio = comp_out / comp_in if comp_in else 1.0
+            lines.append(f"{p}_compression_ratio{_labels(client=client, tunnel=tid)} {ratio:.4f}")
+        lines += [f"# HELP {p}_pairing_wait_seconds Time until a public connection is attached to a client channel.",
+                  f"# TYPE {p}_pairing_wait_seconds histogram"]
+        for (client, tid), t in self.tunnels.items():
+            for path, histogram in t.pairing_wait.items():
+                lines += histogram.render(f"{p}_pairing_wait_seconds", client=client, tunnel=tid, path=path)
+        lines += [f"# HELP {p}_pairing_rejected_total Public connections dropped because the pending pairing limit was reached.",
+                  f"# TYPE {p}_pairing_rejected_total counter"]
+        for (client, tid), t in self.tunnels.items():
+            lines.append(f"{p}_pairing_rejected_total{_labels(client=client, tunnel=tid)} {t.pairing_rejected}")
+        lines += [f"# HELP {p}_pairing_expired_total Public connections dropped because no data channel arrived in time.",
+                  f"# TYPE {p}_pairing_expired_total counter"]
+        for (client, tid), t in self.tunnels.items():
+            lines.append(f"{p}_pairing_expired_total{_labels(client=client, tunnel=tid)} {t.pairing_expired}")
+        lines += [f"# HELP {p}_handshake_duration_seconds Handshake duration by kind.",
+                  f"# TYPE {p}_handshake_duration_seconds histogram"]
+        for kind, histogram in self.handshake_duration.items():
+            lines += histogram.render(f"{p}_handshake_duration_seconds", kind=kind)
+        lines += [f"# HELP {p}_events_total Per-connection tunnel events (counted even when their logs are sampled out).",
+                  f"# TYPE {p}_events_total counter"]
+        for event, count in event_counts().items():
+            lines.append(f"{p}_events_total{_labels(event=event)} {count}")
+        if self.liveness:
+            lines += self._render_liveness(p)
+        if self.loop_watchdog:
+            lines += self._render_loop_watchdog(p)
+        return "\n".join(lines) + "\n"
+
+    def _render_liveness(self, p: str) -> List[str]:
+        s = self.liveness.snapshot()
+        lines = [f"# HELP {p}_liveness_channels Data and mux channels watched by the heartbeat wheel.",
+                 f"# TYPE {p}_liveness_channels gauge",
+                 f"{p}_liveness_channels {s['channels']}",
+                 f"# HELP {p}_liveness_heartbeats_total Heartbeats sent on data and mux channels.",
+                 f"# TYPE {p}_liveness_heartbeats_total counter",
+                 f"{p}_liveness_heartbeats_total {s['heartbeats_sent']}",
+                 f"# HELP {p}_liveness_reaped_total Channels closed because the peer stopped responding.",
+                 f"# TYPE {p}_liveness_reaped_total counter"]
+        for kind in ("data_channel", "mux_channel"):
+            lines.append(f"{p}_liveness_reaped_total{_labels(kind=kind)} {s['reaped'].get(kind, 0)}")
+        return lines
+
+    def _render_loop_watchdog(self, p: str) -> List[str]:
+        s = self.loop_watchdog.snapshot()
+        lines = [f"# HELP {p}_event_loop_lag_seconds Event loop lag over recent samples.",
+                 f"# TYPE {p}_event_loop_lag_seconds gauge"]
+        for quantile, key in (("0.5", "p50_ms"), ("0.99", "p99_ms"), ("1", "max_ms")):
+            lines.append(f"{p}_event_loop_lag_seconds{_labels(quantile=quantile)} {s['lag'][key] / 1000:.6f}")
+        lines += [f"# HELP {p}_event_loop_slow_callbacks_total Callbacks that exceeded the watchdog threshold.",
+                  f"# TYPE {p}_event_loop_slow_callbacks_total counter",
+                  f"{p}_event_loop_slow_callbacks_total {s['callbacks']['slow']}",
+                  f"# HELP {p}_event_loop_seconds_total Event loop time by category (categories may overlap).",
+                  f"# TYPE {p}_event_loop_seconds_total counter",
+                  f"{p}_event_loop_seconds_total{_labels(category='callbacks')} {s['callbacks']['seconds']}"]
+        for category, seconds in s["category_seconds"].items():
+            lines.append(f"{p}_event_loop_seconds_total{_labels(category=category)} {seconds}")
+        return lines
+
+    async def start_http(self, host: str, port: int):
+        """
+        지표 조회용 로컬 HTTP 엔드포인트를 연다.
+        - /metrics: Prometheus 텍스트 형식
+        - /metrics.json: 터널별 집계(JSON)
+        - /connections: 활성 연결별 카운터(JSON)
+        """
+        self._http_server = await asyncio.start_server(self._handle_http, host, port)
+        self.logger.info(f"Metrics endpoint listening on http://{host}:{port}/metrics")
+
+    async def stop_http(self):
+        if self._http_server:
+            server, self._http_server = self._http_server, None
+            server.close()
+            await server.wait_closed()
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+            # 요청 헤더는 사용하지 않으므로 빈 줄까지 읽고 버린다.
+            while True:
+                line = await asyncio.wait_for(reader.readline(), timeout=5.0)
+                if not line or line in (b"\r\n", b"\n"):
+                    break
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) >= 2 else ""
+            if len(parts) < 2 or parts[0] != "GET":
+                status, content_type, body = "405 Method Not Allowed", "text/plain", "method not allowed\n"
+            elif path == "/metrics":
+                status, content_type, body = "200 OK", "text/plain; version=0.0.4", self.render_prometheus()
+            elif path == "/metrics.json":
+                status, content_type, body = "200 OK", "application/json", json.dumps(self.snapshot())
+            elif path == "/connections":
+                status, content_type, body = "200 OK", "application/json", json.dumps(self.connections())
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", "not found\n"
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except Exception as e:
+            self.logger.debug(f"Metrics request error: {e}")
+        finally:
+            writer.close()
@@ -1,16 +1,23 @@
 import asyncio
+import hmac
 import logging
 import struct
 import nacl.signing
 import nacl.encoding
 from typing import Optional, List, Tuple
-from ..shared.constants import PROTOCOL_VERSION, Role, MsgType, HANDSHAKE_HELLO_LEN, MAX_HANDSHAKE_LEN
+from ..shared.constants import (
+    PROTOCOL_VERSION, Role, MsgType, HANDSHAKE_HELLO_LEN, MAX_HANDSHAKE_LEN,
+    RESUME_HELLO_LEN, RESUME_NONCE_LEN, RESUME_EPH_LEN, RESUME_BINDER_LEN,
+)
 from ..shared.crypto_utils import (
     CryptoContext,
     generate_ephemeral_key,
     derive_session_keys
 )
 from ..shared.framing import FrameCodec
+from ..shared.resumption import (
+    TicketKeys, client_binder, server_binder, build_resume_server_body, derive_resume_keys,
+)
 from cryptography.hazmat.primitives.asymmetric import x25519
 from cryptography.hazmat.primitives import serialization
 
@@ -30,10 +37,16 @@ def add_allowed_client_key(pubkey_hex: str):
         logging.error(f"Failed to add key: {e}")
 
 class ServerHandshake:
-    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, server_identity_key: nacl.signing.SigningKey):
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, server_identity_key: nacl.signing.SigningKey,
+                 ticket_keys: Optional[TicketKeys] = None):
         self.reader = reader
         self.writer = writer
         self.server_identity_key = server_identity_key
+        # None이면 세션 재개를 허용하지 않는다. (재개 요청은 거절 후 전체 핸드셰이크로 진행)
+        self.ticket_keys = ticket_keys
+        # 핸드셰이크 결과 통계용: 티켓으로 재개했는지, 티켓이 거절되었는지
+        self.resumed = False
+        self.ticket_rejected = False
         self.logger = logging.getLogger("ServerHandshake")
 
     def _log_security(self, reason: str, detail: Optional[str] = None):
@@ -69,6 +82,24 @@ class ServerHandshake:
             
             len_bytes = await self.reader.readexactly(4)
             msg_len = struct.unpack(">I", len_bytes)[0]
+            if msg_len == RESUME_HELLO_LEN:
+                # 재개 헬로는 길이로 구분한다. 성공하면 서명 검증 없이 바로 코덱을 만든다.
+                resume_hello_bytes = await self.reader.readexactly(msg_len)
+                result = await self._try_resume(resume_hello_bytes)
+                if result:
+                    return result
+                # 거절: 길이 0을 보내면 클라이언트는 같은 연결에서 전체 핸드셰이크를 이어 간다.
+                self.ticket_rejected = True
+                self.writer.write(struct.pack(">I", 0))
+                await self.writer.drain()
+                len_bytes = await self.reader.readexactly(4)
+                msg_len = struct.unpack(">I", len_bytes)[0]
+            if msg_len != HANDSHAKE_HELLO_LEN and 2 <= msg_len <= MAX_HANDSHAKE_LEN:
+                # 다른 버전의 헬로는 길이도 다를 수 있으므로 버전 필드를 먼저 보고 불일치를 알린다.
+                ver = struct.unpack(">H", await self.reader.readexactly(2))[0]
+                if ver != PROTOCOL_VERSION:
+                    self._log_security("Protocol version mismatch", f"ver={ver}, expected={PROTOCOL_VERSION}")
+                    return None
             # 핸드셰이크 메시지는 고정 길이여야 한다.
             # 과대 길이/비정상 길이는 메모리/시간 소모 공격이 될 수 있으므로 즉시 종료한다.
             if msg_len != HANDSHAKE_HELLO_LEN or msg_len > MAX_HANDSHAKE_LEN:
@@ -91,7 +122,7 @@ class ServerHandshake:
             
             if ver != PROTOCOL_VERSION:
                 # 정상 버전 범위를 벗어난 경우 공격 또는 오접속 가능성이 높다.
-                self._log_security("Protocol version mismatch", f"ver={ver}")
+                self._log_security("Protocol version mismatch", f"ver={ver}, expected={PROTOCOL_VERSION}")
                 return None
                 
             if role != Role.CLIENT:
@@ -171,8 +202,8 @@ class ServerHandshake:
             # Let's update CryptoContext to be single direction or FrameCodec to take two.
             # Simplify: FrameCodec takes read_ctx and write_ctx.
             
-            read_ctx = CryptoContext(key_c2s, nonce_base_c2s, role_is_sender=False)
-            write_ctx = CryptoContext(key_s2c, nonce_base_s2c, role_is_sender=True)
+            read_ctx = CryptoContext(key_c2s, nonce_base_c2s)
+            write_ctx = CryptoContext(key_s2c, nonce_base_s2c)
             
             # Create properly configured Codec
             codec = FrameCodec(self.reader, self.writer, read_ctx=read_ctx, write_ctx=write_ctx)
@@ -184,3 +215,55 @@ class ServerHandshake:
         except Exception as e:
             self.logger.error(f"Handshake failed: {e}")
             return None
+
+    async def _try_resume(self, hello: bytes) -> Optional[Tuple[FrameCodec, bytes]]:
+        """
+        재개 헬로를 검증하고 티켓의 재개 비밀과 X25519 공유 비밀로 새 세션 키를 유도한다.
+        | Ver(2) | Role(1) | Nonce(16) | Eph_Key(32) | Ticket | Binder(32) |
+        실패하면 None을 반환하며, 호출자가 거절 응답 후 전체 핸드셰이크로 진행한다.
+        """
+        if not self.ticket_keys:
+            return None
+        ver = struct.unpack(">H", hello[0:2])[0]
+        role = hello[2]
+        if ver != PROTOCOL_VERSION or role != Role.CLIENT:
+            self._log_security("Invalid resume hello header", f"ver={ver}, role={role}")
+            return None
+        body = hello[:-RESUME_BINDER_LEN]
+        binder = hello[-RESUME_BINDER_LEN:]
+        client_nonce = body[3:3 + RESUME_NONCE_LEN]
+        client_eph_pub_bytes = body[3 + RESUME_NONCE_LEN:3 + RESUME_NONCE_LEN + RESUME_EPH_LEN]
+        opened = self.ticket_keys.open(body[3 + RESUME_NONCE_LEN + RESUME_EPH_LEN:])
+        if not opened:
+            # 만료된 티켓도 여기로 오므로 보안 로그가 아닌 일반 로그로 남긴다.
+            self.logger.info("Session ticket rejected (expired or unknown key)")
+            return None
+        client_id_key_bytes, secret = opened
+        if not hmac.compare_digest(binder, client_binder(secret, body)):
+            # 티켓을 가로채 재사용하려는 시도일 수 있다.
+            self._log_security("Bad resume binder")
+            return None
+        # 티켓 발급 후 화이트리스트에서 제거된 클라이언트는 재개할 수 없다.
+        if client_id_key_bytes not in ALLOWED_CLIENT_KEYS:
+            self._log_security("Resumed client identity not in whitelist")
+            return None
+
+        server_eph_priv = generate_ephemeral_key()
+        server_eph_pub_bytes = server_eph_priv.public_key().public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw
+        )
+        server_nonce = nacl.utils.random(RESUME_NONCE_LEN)
+        server_body = build_resume_server_body(server_nonce, server_eph_pub_bytes)
+        server_hello_msg = server_body + server_binder(secret, hello, server_body)
+        self.writer.write(struct.pack(">I", len(server_hello_msg)) + server_hello_msg)
+        await self.writer.drain()
+
+        dh_shared = server_eph_priv.exchange(x25519.X25519PublicKey.from_public_bytes(client_eph_pub_bytes))
+        key_c2s, key_s2c, nonce_base_c2s, nonce_base_s2c = derive_resume_keys(
+            secret, dh_shared, client_nonce, server_nonce)
+        read_ctx = CryptoContext(key_c2s, nonce_base_c2s)
+        write_ctx = CryptoContext(key_s2c, nonce_base_s2c)
+        self.resumed = True
+        self.logger.info("Session resumed with ticket.")
+        return FrameCodec(self.reader, self.writer, read_ctx=read_ctx, write_ctx=write_ctx), client_id_key_bytes
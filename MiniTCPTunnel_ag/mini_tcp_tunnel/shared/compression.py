@@ -0,0 +1,83 @@
+from typing import Optional, Union
+
+from .constants import (
+    CompressionMode, COMPRESSION_MIN_SIZE, COMPRESSION_SAMPLE_SIZE,
+    COMPRESSION_MAX_RATIO, COMPRESSION_BACKOFF_FRAMES,
+)
+from .crypto_utils import compress_data
+
+
+def parse_compression_mode(value: Union[str, int, CompressionMode, None]) -> CompressionMode:
+    """설정 파일의 문자열("always"/"never"/"auto")이나 프로토콜 바이트 값을 모드로 변환한다."""
+    if value is None:
+        return CompressionMode.AUTO
+    if isinstance(value, str):
+        try:
+            return CompressionMode[value.strip().upper()]
+        except KeyError:
+            raise ValueError(f"Unknown compression mode: {value}")
+    return CompressionMode(value)
+
+
+class CompressionPolicy:
+    """
+    프레임마다 LZ4 압축 여부를 결정한다.
+    - never: 압축하지 않는다.
+    - always: 매 프레임 압축을 시도한다. (결과가 원본보다 작을 때만 압축본을 보낸다)
+    - auto: 작은 프레임은 건너뛰고, 큰 프레임은 샘플 압축률로 먼저 판단한다.
+      압축률이 나쁘면(이미 암호화/압축된 HTTPS, 미디어 등) 이후 몇 프레임은 시도 없이 보낸다.
+    상태(백오프 카운터)를 가지므로 브리지 방향마다 별도 인스턴스를 사용한다.
+    """
+    def __init__(self, mode: Union[str, int, CompressionMode, None] = CompressionMode.AUTO,
+                 min_size: int = COMPRESSION_MIN_SIZE, sample_size: int = COMPRESSION_SAMPLE_SIZE,
+                 max_ratio: float = COMPRESSION_MAX_RATIO, backoff_frames: int = COMPRESSION_BACKOFF_FRAMES):
+        self.mode = parse_compression_mode(mode)
+        self.min_size = min_size
+        self.sample_size = sample_size
+        self.max_ratio = max_ratio
+        self.backoff_frames = backoff_frames
+        self._skip_remaining = 0
+        self.compressed_frames = 0
+        self.skipped_frames = 0
+        # 압축률 지표: 정책에 들어온 평문 바이트와 실제로 보낸(압축 또는 원본) 바이트
+        self.input_bytes = 0
+        self.output_bytes = 0
+
+    def _poor_ratio(self, original_len: int, compressed_len: int) -> bool:
+        return compressed_len > original_len * self.max_ratio
+
+    def _skip(self, size: int) -> None:
+        self.skipped_frames += 1
+        self.input_bytes += size
+        self.output_bytes += size
+        return None
+
+    def compress(self, data: bytes) -> Optional[bytes]:
+        """압축본을 반환한다. 압축하지 않고 원본을 보내야 하면 None을 반환한다."""
+        if self.mode == CompressionMode.NEVER:
+            return self._skip(len(data))
+
+        if self.mode == CompressionMode.AUTO:
+            if len(data) < self.min_size:
+                return self._skip(len(data))
+            if self._skip_remaining > 0:
+                self._skip_remaining -= 1
+                return self._skip(len(data))
+            # 큰 프레임은 앞부분만 압축해 보고 압축률이 나쁘면 전체 압축을 생략한다.
+            if len(data) > self.sample_size * 2:
+                sample = memoryview(data)[:self.sample_size]
+                if self._poor_ratio(len(sample), len(compress_data(sample))):
+                    self._skip_remaining = self.backoff_frames
+                    return self._skip(len(data))
+
+        compressed = compress_data(data)
+        if self.mode == CompressionMode.AUTO and self._poor_ratio(len(data), len(compressed)):
+            # 이득이 미미하면 수신측 압축 해제 비용도 아끼기 위해 원본을 보낸다.
+            self._skip_remaining = self.backoff_frames
+            return self._skip(len(data))
+        if len(compressed) >= len(data):
+            return self._skip(len(data))
+        self.compressed_frames += 1
+        self.input_bytes += len(data)
+        self.output_bytes += len(compressed)
+        return compressed
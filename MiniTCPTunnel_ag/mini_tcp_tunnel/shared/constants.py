@@ -1,6 +1,8 @@
 from enum import IntEnum
 
-PROTOCOL_VERSION = 1
+# 프레임/메시지 형식이 바뀌면 올린다. 버전이 다른 피어는 첫 프레임이 아니라 핸드셰이크에서 거절된다.
+# 2: 길이 필드 압축 플래그 + 길이/헤더 AAD, 세션 재개(PSK + DHE), 다중화/DATA_EOF 메시지
+PROTOCOL_VERSION = 2
 DEFAULT_CONTROL_PORT = 9000
 FRAME_HEAD_LEN = 4  # Length (u32)
 FRAME_NONCE_LEN = 12
@@ -12,6 +14,22 @@ TAG_LEN = 16
 HANDSHAKE_HELLO_LEN = 143
 MAX_HANDSHAKE_LEN = 256
 
+# --- 세션 재개(resumption) ---
+# 제어 세션 인증 후 서버가 발급하는 티켓으로, 재연결 시 서명 검증 없이 1-RTT로 새 키를 만든다.
+# 재개에도 X25519 임시 키를 섞으므로(PSK + DHE) 티켓 키가 유출되어도 지난 재개 세션은 안전하다.
+# 티켓: | nonce(12) | AEAD(client_key(32) | resumption_secret(32) | expires_at(8)) |
+RESUMPTION_SECRET_LEN = 32
+SESSION_TICKET_LEN = 12 + 32 + 32 + 8 + 16
+# 재개 헬로: | Ver(2) | Role(1) | Nonce(16) | Eph_Key(32) | Ticket | Binder(32) | (전체 헬로 143과 길이로 구분한다)
+RESUME_NONCE_LEN = 16
+RESUME_EPH_LEN = 32
+RESUME_BINDER_LEN = 32
+RESUME_HELLO_LEN = 2 + 1 + RESUME_NONCE_LEN + RESUME_EPH_LEN + SESSION_TICKET_LEN + RESUME_BINDER_LEN
+# 재개 응답: | Ver(2) | Role(1) | Nonce(16) | Eph_Key(32) | Binder(32) | (길이 0이면 거절 → 같은 연결에서 전체 핸드셰이크)
+RESUME_SERVER_HELLO_LEN = 2 + 1 + RESUME_NONCE_LEN + RESUME_EPH_LEN + RESUME_BINDER_LEN
+# 티켓 유효 시간(초). 0이면 발급하지 않는다.
+DEFAULT_TICKET_LIFETIME = 3600
+
 # 프레임 크기 상한(압축된 암호문 길이 기준)
 # 과도한 길이는 메모리/CPU 소모를 유발하므로 제한한다.
 MAX_FRAME_LEN = 4 * 1024 * 1024  # 4 MiB
@@ -26,19 +44,97 @@ HMAC_TOKEN_LEN = 32
 # 데이터 채널 conn_id 길이 상한(DoS 방어 및 파싱 안전성 확보)
 MAX_CONN_ID_LEN = 64
 
+# --- 공용 연결 페어링 ---
+# 외부 연결이 클라이언트 데이터 채널과 짝지어지기를 기다리는 최대 시간(초)
+PAIRING_TIMEOUT = 10.0
+# 터널별로 동시에 페어링을 기다릴 수 있는 외부 연결 수. 넘으면 바로 끊어
+# 느린 클라이언트 앞에서 공용 포트 폭주가 서버 메모리/이벤트 루프를 소모하지 못하게 한다.
+DEFAULT_MAX_PENDING_PER_TUNNEL = 256
+
+# --- 데이터 채널 생존 확인 ---
+# 데이터 채널/다중화 채널마다 이 간격(초)으로 HEARTBEAT를 보낸다. (0이면 비활성화)
+DEFAULT_DATA_HEARTBEAT_INTERVAL = 15.0
+# 상대가 HEARTBEAT를 보낸 적이 있는 채널에서 이 횟수만큼 간격 동안 아무 프레임도 오지 않으면 끊는다.
+DATA_HEARTBEAT_MISSES = 3
+# 데이터 채널 풀의 유휴 채널 최대 보관 시간(초). 풀 채널은 HEARTBEAT를 보내지 않으므로
+# NAT/중간 장비가 조용히 끊었을 수 있는 오래된 채널은 쓰지 않고 새로 연결한다.
+DATA_POOL_MAX_IDLE = 30.0
+
+# --- 프레임 압축 ---
+# 길이 필드(u32)의 최상위 비트는 "본문이 LZ4로 압축됨" 플래그로 사용한다.
+# 길이 필드 전체를 AEAD의 AAD로 넣으므로 플래그 변조는 복호화 실패로 탐지된다.
+FRAME_FLAG_COMPRESSED = 0x80000000
+FRAME_LEN_MASK = 0x7FFFFFFF
+# 이보다 작은 프레임은 LZ4 프레임 헤더 오버헤드가 더 크므로 압축하지 않는다.
+COMPRESSION_MIN_SIZE = 256
+# auto 모드에서 큰 프레임은 앞부분 샘플만 먼저 압축해 압축률을 추정한다.
+COMPRESSION_SAMPLE_SIZE = 4096
+# 압축 결과가 원본의 이 비율을 넘으면 "압축이 안 되는 데이터"로 본다.
+COMPRESSION_MAX_RATIO = 0.9
+# 압축이 안 되는 데이터를 만나면 이후 N 프레임은 압축 시도 없이 보낸다.
+COMPRESSION_BACKOFF_FRAMES = 32
+
+# --- 암복호화 오프로딩 ---
+# 이 크기 이상의 프레임은 LZ4/AEAD를 스레드 풀에서 실행해 이벤트 루프가 멈추지 않게 한다.
+# (cryptography/lz4는 GIL을 해제하므로 여러 코어를 사용할 수 있다. 0이면 비활성화)
+DEFAULT_CRYPTO_OFFLOAD_THRESHOLD = 256 * 1024
+
+# --- 브리지 읽기 버퍼 ---
+# 공용/로컬 소켓에서 한 번에 읽는 최대 바이트 수 (프레임 하나의 평문 크기 상한이 된다)
+DEFAULT_READ_SIZE = 64 * 1024
+MIN_READ_SIZE = 4 * 1024
+MAX_READ_SIZE = 1024 * 1024
+# 작은 쓰기를 하나의 프레임으로 모으기 위해 추가 데이터를 기다리는 시간(ms, 0이면 비활성화)
+DEFAULT_COALESCE_MS = 0.0
+
+# --- 평문(plaintext) 터널 ---
+# 신뢰할 수 있는 내부망 전용. 서버가 --allow-plaintext로 허용한 터널만 데이터 채널에서 AEAD/LZ4를 건너뛴다.
+# OPEN_TUNNEL 끝의 선택 필드 flags(1): 클라이언트가 평문 모드를 요청한다.
+TUNNEL_FLAG_PLAINTEXT = 0x01
+# INCOMING_CONN 끝의 선택 필드 flags(1): 이 연결의 데이터 채널은 DATA_CONN_READY 이후 원시 바이트 중계로 전환한다.
+CONN_FLAG_PLAINTEXT = 0x01
+# 원시 중계에서 splice/recv 한 번에 옮기는 최대 바이트 수
+RAW_RELAY_CHUNK = 1024 * 1024
+
+# 프로토콜 헤더 길이: | Type(1) | Flags(1) | StreamID(4) |
+MSG_HEADER_LEN = 6
+
+# --- 스트림 다중화 ---
+# 클라이언트가 유지하는 다중화 데이터 채널 기본 개수 (0이면 다중화 비활성화)
+DEFAULT_MUX_CHANNELS = 2
+# 채널 하나에 동시에 열 수 있는 스트림 수 상한 (수신측도 이를 넘는 STREAM_OPEN은 STREAM_CLOSE로 거절한다)
+MAX_STREAMS_PER_CHANNEL = 1024
+# 스트림별 흐름 제어 윈도우: WINDOW_UPDATE를 받기 전까지 보낼 수 있는 DATA 바이트 수
+# 수신측이 스트림마다 버퍼링하는 메모리의 상한이기도 하다.
+STREAM_WINDOW = 256 * 1024
+# 소비한 바이트가 이 값을 넘으면 WINDOW_UPDATE로 윈도우를 돌려준다.
+STREAM_WINDOW_UPDATE_THRESHOLD = STREAM_WINDOW // 2
+
 class MsgType(IntEnum):
     HELLO = 1
     AUTH_OK = 2
     AUTH_FAIL = 3
+    SESSION_TICKET = 4
     OPEN_TUNNEL = 10
     CLOSE_TUNNEL = 11
     TUNNEL_STATUS = 12
     INCOMING_CONN = 20
     DATA_CONN_READY = 21
+    MUX_CHANNEL_READY = 22
+    STREAM_OPEN = 23
+    STREAM_CLOSE = 24
+    WINDOW_UPDATE = 25
     DATA = 30
+    # 이 방향으로 더 보낼 데이터가 없음(TCP half-close). 수신측은 소켓에 write_eof()로 전달한다.
+    DATA_EOF = 31
     HEARTBEAT = 90
     ERROR = 99
 
+class CompressionMode(IntEnum):
+    NEVER = 0
+    ALWAYS = 1
+    AUTO = 2
+
 class Role(IntEnum):
     SERVER = 0
     CLIENT = 1
@@ -9,23 +9,33 @@ import nacl.signing
 import nacl.exceptions
 
 class CryptoContext:
-    def __init__(self, key: bytes, nonce_base: bytes, role_is_sender: bool):
+    def __init__(self, key: bytes, nonce_base: bytes):
         self.aead = ChaCha20Poly1305(key)
         self.nonce_base = nonce_base
         self.counter = 0
 
-    def encrypt(self, plaintext: bytes, aad: bytes = b"") -> bytes:
+    def reserve_nonce(self) -> bytes:
+        """
+        다음 프레임의 nonce를 예약한다.
+        암복호화를 스레드 풀에서 실행할 때도 프레임 순서와 nonce 순서가 어긋나지 않도록,
+        호출자는 프레임 순서를 보장하는 잠금 안에서 예약해야 한다.
+        """
         # Nonce: nonce_base (4) + counter (8 Big Endian)
         nonce = self.nonce_base + struct.pack(">Q", self.counter)
-        ciphertext = self.aead.encrypt(nonce, plaintext, aad)
         self.counter += 1
-        return ciphertext
+        return nonce
+
+    def encrypt_with_nonce(self, nonce: bytes, plaintext: bytes, aad: bytes = b"") -> bytes:
+        return self.aead.encrypt(nonce, plaintext, aad)
+
+    def decrypt_with_nonce(self, nonce: bytes, ciphertext: bytes, aad: bytes = b"") -> bytes:
+        return self.aead.decrypt(nonce, ciphertext, aad)
+
+    def encrypt(self, plaintext: bytes, aad: bytes = b"") -> bytes:
+        return self.encrypt_with_nonce(self.reserve_nonce(), plaintext, aad)
 
     def decrypt(self, ciphertext: bytes, aad: bytes = b"") -> bytes:
-        nonce = self.nonce_base + struct.pack(">Q", self.counter)
-        plaintext = self.aead.decrypt(nonce, ciphertext, aad)
-        self.counter += 1
-        return plaintext
+        return self.decrypt_with_nonce(self.reserve_nonce(), ciphertext, aad)
 
 def generate_identity_key() -> nacl.signing.SigningKey:
     """Generate a new Ed25519 identity key."""
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("EventLoop")
+
+LOOP_AUTO = "auto"
+LOOP_ASYNCIO = "asyncio"
+LOOP_UVLOOP = "uvloop"
+EVENT_LOOP_CHOICES = (LOOP_AUTO, LOOP_ASYNCIO, LOOP_UVLOOP)
+
+try:
+    import uvloop
+except ImportError:
+    # uvloop은 선택 의존성이다. (Windows 미지원, 설치되지 않은 환경에서는 기본 루프를 쓴다)
+    uvloop = None
+
+
+def available_event_loops() -> List[str]:
+    """현재 환경에서 사용할 수 있는 이벤트 루프 구현 목록"""
+    loops = [LOOP_ASYNCIO]
+    if uvloop is not None:
+        loops.append(LOOP_UVLOOP)
+    return loops
+
+
+def resolve_event_loop(name: Optional[str]) -> str:
+    """
+    요청한 루프 이름을 실제로 사용할 구현으로 바꾼다.
+    - auto: uvloop이 있으면 uvloop, 없으면 asyncio
+    - uvloop: 설치되어 있지 않으면 경고를 남기고 asyncio로 대체한다.
+    """
+    name = (name or LOOP_ASYNCIO).strip().lower()
+    if name not in EVENT_LOOP_CHOICES:
+        raise ValueError(f"Unknown event loop: {name}")
+    if name == LOOP_AUTO:
+        return LOOP_UVLOOP if uvloop is not None else LOOP_ASYNCIO
+    if name == LOOP_UVLOOP and uvloop is None:
+        logger.warning("uvloop is not installed. Falling back to the default asyncio loop.")
+        return LOOP_ASYNCIO
+    return name
+
+
+def new_event_loop(name: Optional[str] = LOOP_ASYNCIO) -> asyncio.AbstractEventLoop:
+    """resolve_event_loop 결과에 맞는 새 이벤트 루프를 만든다."""
+    if resolve_event_loop(name) == LOOP_UVLOOP:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
+def run(main: Callable[[], Awaitable[T]], loop_name: Optional[str] = LOOP_ASYNCIO) -> T:
+    """
+    asyncio.run과 같지만 지정한 루프 구현에서 실행한다.
+    main은 코루틴 함수이며, 루프를 만든 뒤에 호출해 코루틴을 생성한다.
+    """
+    resolved = resolve_event_loop(loop_name)
+    with asyncio.Runner(loop_factory=lambda: new_event_loop(resolved)) as runner:
+        return runner.run(main())
@@ -1,19 +1,64 @@
 import struct
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Tuple
-from .constants import FRAME_HEAD_LEN, MsgType, MAX_FRAME_LEN, MAX_PLAINTEXT_LEN
-from .crypto_utils import CryptoContext, compress_data, decompress_data
+from .constants import (
+    FRAME_HEAD_LEN, MsgType, MAX_FRAME_LEN, MAX_PLAINTEXT_LEN,
+    FRAME_FLAG_COMPRESSED, FRAME_LEN_MASK, TAG_LEN, MSG_HEADER_LEN,
+    DEFAULT_CRYPTO_OFFLOAD_THRESHOLD,
+)
+from .crypto_utils import CryptoContext, decompress_data
+from .compression import CompressionPolicy
+from .loop_watchdog import timed
+
+# 매 프레임 포맷 문자열을 다시 해석하지 않도록 미리 컴파일해 둔다.
+FRAME_HEAD = struct.Struct(">I")
+# 프로토콜 헤더: | Type(1) | Flags(1) | StreamID(4) |
+MSG_HEADER = struct.Struct(">BBI")
+
+# 큰 프레임의 압축/암복호화를 실행할 프로세스 공용 스레드 풀 (처음 사용할 때 만든다)
+_offload_threshold = DEFAULT_CRYPTO_OFFLOAD_THRESHOLD
+_offload_workers: Optional[int] = None
+_offload_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure_crypto_offload(threshold: int = DEFAULT_CRYPTO_OFFLOAD_THRESHOLD, workers: Optional[int] = None):
+    """
+    threshold 바이트 이상의 프레임은 LZ4/AEAD를 스레드 풀에서 처리한다. (0이면 항상 이벤트 루프에서 처리)
+    workers는 스레드 수이며 None이면 ThreadPoolExecutor 기본값을 따른다.
+    """
+    global _offload_threshold, _offload_workers, _offload_executor
+    _offload_threshold = max(0, threshold)
+    if workers != _offload_workers and _offload_executor is not None:
+        _offload_executor.shutdown(wait=False)
+        _offload_executor = None
+    _offload_workers = workers
+
+
+def _get_offload_executor() -> ThreadPoolExecutor:
+    global _offload_executor
+    if _offload_executor is None:
+        _offload_executor = ThreadPoolExecutor(max_workers=_offload_workers, thread_name_prefix="frame-crypto")
+    return _offload_executor
+
+
+def _should_offload(size: int) -> bool:
+    return 0 < _offload_threshold <= size
 
 class FrameCodec:
     """
     Handles framing, compression, and encryption.
-    Format: | len (u32 BE) | ciphertext (AEAD) |
+    Format: | flags+len (u32 BE) | ciphertext (AEAD) |
+    길이 필드의 최상위 비트가 켜져 있으면 평문이 LZ4로 압축되어 있다.
     """
-    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, read_ctx: Optional[CryptoContext] = None, write_ctx: Optional[CryptoContext] = None):
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, read_ctx: Optional[CryptoContext] = None, write_ctx: Optional[CryptoContext] = None,
+                 compression: Optional[CompressionPolicy] = None):
         self.reader = reader
         self.writer = writer
         self.read_ctx = read_ctx
         self.write_ctx = write_ctx
+        # 호출자가 프레임별 정책을 넘기지 않으면 이 기본 정책을 사용한다.
+        self.compression = compression or CompressionPolicy()
         self.read_lock = asyncio.Lock()
         self.write_lock = asyncio.Lock()
 
@@ -25,7 +70,8 @@ class FrameCodec:
             except asyncio.IncompleteReadError:
                 raise ConnectionResetError("Connection closed while reading header")
                 
-            length = struct.unpack(">I", head_data)[0]
+            head_word = FRAME_HEAD.unpack(head_data)[0]
+            length = head_word & FRAME_LEN_MASK
             # 비정상적으로 큰 프레임은 즉시 차단한다.
             if length > MAX_FRAME_LEN:
                 raise ValueError(f"Frame too large: {length} > {MAX_FRAME_LEN}")
@@ -37,33 +83,93 @@ class FrameCodec:
                 raise ConnectionResetError("Connection closed while reading body")
 
             if self.read_ctx:
-                # Decrypt -> Decompress
-                compressed = self.read_ctx.decrypt(ciphertext)
-                plaintext = decompress_data(compressed, MAX_PLAINTEXT_LEN)
-                return plaintext
+                # nonce는 read_lock 안에서 프레임 순서대로 예약한다.
+                nonce = self.read_ctx.reserve_nonce()
+                if _should_offload(length):
+                    return await self._offload(self._open_sync, nonce, ciphertext, head_data, head_word)
+                return self._open_sync(nonce, ciphertext, head_data, head_word)
             else:
                 return ciphertext
 
-    async def write_frame(self, data: bytes):
+    def _open_sync(self, nonce: bytes, ciphertext: bytes, head_data: bytes, head_word: int) -> bytes:
+        # Decrypt (헤더를 AAD로 인증) -> 플래그가 있을 때만 Decompress
+        # timed()는 루프 워치독이 켜져 있고 이벤트 루프 스레드에서 실행될 때만 시간을 잰다.
+        with timed("crypto"):
+            body = self.read_ctx.decrypt_with_nonce(nonce, ciphertext, head_data)
+        if head_word & FRAME_FLAG_COMPRESSED:
+            with timed("compression"):
+                return decompress_data(body, MAX_PLAINTEXT_LEN)
+        return body
+
+    def _seal_sync(self, nonce: bytes, plaintext, policy: CompressionPolicy) -> Tuple[bytes, bytes]:
+        with timed("compression"):
+            compressed = policy.compress(plaintext)
+        if compressed is not None:
+            body, flags = compressed, FRAME_FLAG_COMPRESSED
+        else:
+            body, flags = plaintext, 0
+        # AEAD 태그 길이만큼 늘어난 최종 길이로 헤더를 만들고 AAD로 함께 인증한다.
+        header = FRAME_HEAD.pack((len(body) + TAG_LEN) | flags)
+        with timed("crypto"):
+            return header, self.write_ctx.encrypt_with_nonce(nonce, body, header)
+
+    async def _seal(self, plaintext, compression: Optional[CompressionPolicy]) -> Tuple[bytes, bytes]:
+        """평문을 (길이 헤더, 암호문)으로 만든다. 호출자는 write_lock을 잡고 있어야 한다."""
+        # 평문 길이가 과도하면 압축/암호화 전에 차단한다.
+        if len(plaintext) > MAX_PLAINTEXT_LEN:
+            raise ValueError(f"Plaintext too large: {len(plaintext)} > {MAX_PLAINTEXT_LEN}")
+        policy = compression or self.compression
+        # write_lock 안에서 nonce를 예약하고 결과도 잠금 안에서 쓰므로 전송 순서와 nonce 순서가 같다.
+        nonce = self.write_ctx.reserve_nonce()
+        if _should_offload(len(plaintext)):
+            return await self._offload(self._seal_sync, nonce, plaintext, policy)
+        return self._seal_sync(nonce, plaintext, policy)
+
+    async def _offload(self, func, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_offload_executor(), func, *args)
+        except asyncio.CancelledError:
+            # 예약한 nonce가 건너뛰어져 이후 프레임은 상대가 복호화할 수 없으므로 연결을 끊는다.
+            self.writer.close()
+            raise
+
+    async def write_frame(self, data: bytes, compression: Optional[CompressionPolicy] = None):
         async with self.write_lock:
             if self.write_ctx:
-                # 평문 길이가 과도하면 압축/암호화 전에 차단한다.
-                if len(data) > MAX_PLAINTEXT_LEN:
-                    raise ValueError(f"Plaintext too large: {len(data)} > {MAX_PLAINTEXT_LEN}")
-                compressed = compress_data(data)
-                ciphertext = self.write_ctx.encrypt(compressed)
-                payload = ciphertext
+                header, payload = await self._seal(data, compression)
             else:
                 # 비암호화 모드에서도 프레임 길이는 제한한다.
                 if len(data) > MAX_FRAME_LEN:
                     raise ValueError(f"Frame too large: {len(data)} > {MAX_FRAME_LEN}")
                 payload = data
+                header = FRAME_HEAD.pack(len(payload))
 
+            # 헤더와 본문을 이어 붙이지 않고 그대로 전송 버퍼에 넘긴다.
+            self.writer.writelines((header, payload))
+            await self.writer.drain()
 
-            length = len(payload)
-            header = struct.pack(">I", length)
-            
-            self.writer.write(header + payload)
+    async def write_message(self, msg_type: int, stream_id: int, payload, flags: int = 0,
+                            compression: Optional[CompressionPolicy] = None):
+        """
+        프로토콜 헤더(Type/Flags/StreamID)와 payload를 하나의 프레임으로 보낸다.
+        `header + payload` 같은 중간 결합 없이, 미리 할당한 버퍼에 한 번만 복사한 뒤 AEAD에 넘긴다.
+        payload는 bytes/bytearray/memoryview 모두 허용한다.
+        """
+        async with self.write_lock:
+            if self.write_ctx:
+                # AEAD/LZ4는 연속된 평문 버퍼가 필요하므로 여기서 한 번만 복사한다.
+                plaintext = bytearray(MSG_HEADER_LEN + len(payload))
+                MSG_HEADER.pack_into(plaintext, 0, msg_type, flags, stream_id)
+                plaintext[MSG_HEADER_LEN:] = payload
+                header, body = await self._seal(plaintext, compression)
+                self.writer.writelines((header, body))
+            else:
+                length = MSG_HEADER_LEN + len(payload)
+                if length > MAX_FRAME_LEN:
+                    raise ValueError(f"Frame too large: {length} > {MAX_FRAME_LEN}")
+                # 비암호화 모드에서는 복사 없이 헤더/본문을 그대로 넘긴다.
+                self.writer.writelines((FRAME_HEAD.pack(length), MSG_HEADER.pack(msg_type, flags, stream_id), payload))
             await self.writer.drain()
 
     async def close(self):
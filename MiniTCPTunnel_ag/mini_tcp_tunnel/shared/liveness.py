@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import math
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from .constants import DATA_HEARTBEAT_MISSES
+
+HeartbeatSender = Callable[[], Awaitable[None]]
+
+
+class LivenessEntry:
+    """
+    타이머 바퀴에 등록된 채널 하나.
+    수신 경로는 프레임마다 seen()으로 현재 틱만 기록한다. (시계 호출/타이머 재설정 없음)
+    """
+    __slots__ = ("wheel", "kind", "send_heartbeat", "on_dead", "slot", "rx_tick",
+                 "armed", "rx_open", "tx_open", "reaped")
+
+    def __init__(self, wheel: "LivenessWheel", kind: str, send_heartbeat: HeartbeatSender,
+                 on_dead: Callable[[], None], slot: int):
+        self.wheel = wheel
+        self.kind = kind
+        self.send_heartbeat = send_heartbeat
+        self.on_dead = on_dead
+        self.slot = slot
+        self.rx_tick = wheel.ticks
+        # 상대가 HEARTBEAT를 보낸 적이 있어야 무응답을 죽은 것으로 본다. (구버전 상대의 유휴 연결 보호)
+        self.armed = False
+        # 수신 방향이 EOF로 끝나면 더는 프레임이 오지 않으므로 무응답 검사를 멈춘다.
+        self.rx_open = True
+        # 송신 방향에 DATA_EOF를 보낸 뒤에는 HEARTBEAT도 보내지 않는다.
+        self.tx_open = True
+        self.reaped = False
+
+    def seen(self):
+        self.rx_tick = self.wheel.ticks
+
+    def heartbeat_seen(self):
+        self.rx_tick = self.wheel.ticks
+        self.armed = True
+
+    def close(self):
+        self.wheel.unregister(self)
+
+
+class LivenessWheel:
+    """
+    데이터 채널/다중화 채널의 생존 확인을 태스크 하나로 처리하는 타이머 바퀴.
+    채널은 등록 시점의 칸에 들어가 interval마다 한 번 검사된다.
+    - 송신이 열려 있으면 HEARTBEAT를 보낸다. (그 틱에 검사한 채널을 한 번에 모아 보낸다)
+    - 상대가 HEARTBEAT를 보낸 적이 있는데 interval * misses 동안 아무 프레임도 오지 않았으면
+      on_dead로 연결을 끊어 브리지와 공용 소켓이 바로 정리되게 하고, 끊은 수를 kind별로 센다.
+    """
+    def __init__(self, name: str, interval: float, misses: int = DATA_HEARTBEAT_MISSES,
+                 tick: Optional[float] = None):
+        self.name = name
+        self.interval = interval
+        self.tick = tick or min(1.0, interval / 4)
+        # 부동소수 오차로 칸/틱이 하나 늘지 않도록 반올림한 뒤 올림한다.
+        self.slots: List[Set[LivenessEntry]] = [set() for _ in range(max(1, math.ceil(round(interval / self.tick, 6))))]
+        self.timeout_ticks = max(1, math.ceil(round(interval * misses / self.tick, 6)))
+        self.ticks = 0
+        self.heartbeats_sent = 0
+        self.reaped: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._send_tasks = set()
+        self.logger = logging.getLogger(f"Liveness({name})")
+
+    @property
+    def channels(self) -> int:
+        return sum(len(slot) for slot in self.slots)
+
+    def register(self, kind: str, send_heartbeat: HeartbeatSender, on_dead: Callable[[], None]) -> LivenessEntry:
+        slot = self.ticks % len(self.slots)
+        entry = LivenessEntry(self, kind, send_heartbeat, on_dead, slot)
+        self.slots[slot].add(entry)
+        return entry
+
+    def unregister(self, entry: LivenessEntry):
+        self.slots[entry.slot].discard(entry)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        tasks = list(self._send_tasks)
+        if task:
+            tasks.append(task)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.tick)
+            self.ticks += 1
+            due = []
+            reaped = 0
+            for entry in list(self.slots[self.ticks % len(self.slots)]):
+                if entry.rx_open and entry.armed and self.ticks - entry.rx_tick >= self.timeout_ticks:
+                    self._reap(entry)
+                    reaped += 1
+                elif entry.tx_open:
+                    due.append(entry)
+            if reaped:
+                self.logger.warning(f"Reaped {reaped} unresponsive channel(s), total={self.reaped}")
+            if due:
+                task = asyncio.create_task(self._send_batch(due))
+                self._send_tasks.add(task)
+                task.add_done_callback(self._send_tasks.discard)
+
+    def _reap(self, entry: LivenessEntry):
+        self.unregister(entry)
+        entry.reaped = True
+        self.reaped[entry.kind] = self.reaped.get(entry.kind, 0) + 1
+        try:
+            entry.on_dead()
+        except Exception as e:
+            self.logger.error(f"Failed to close dead {entry.kind}: {e}")
+
+    async def _send_batch(self, entries: List[LivenessEntry]):
+        # 송신 버퍼가 막힌 채널이 다음 배치까지 붙잡지 않도록 한 간격 안에 끝나지 않으면 포기한다.
+        # (그런 채널은 상대가 읽지 않는 것이므로 수신 무응답 검사로 정리된다)
+        sends = [entry.send_heartbeat() for entry in entries]
+        try:
+            results = await asyncio.wait_for(asyncio.gather(*sends, return_exceptions=True), self.interval)
+        except asyncio.TimeoutError:
+            return
+        self.heartbeats_sent += sum(1 for r in results if not isinstance(r, BaseException))
+
+    def snapshot(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "timeout_seconds": round(self.timeout_ticks * self.tick, 3),
+            "channels": self.channels,
+            "heartbeats_sent": self.heartbeats_sent,
+            "reaped": dict(self.reaped),
+        }
+
+
+def abort_transport(writer: asyncio.StreamWriter) -> Callable[[], None]:
+    """죽은 채널을 즉시 끊는 on_dead 콜백. (FIN 없이 RST로 끊어 읽기 대기를 바로 깨운다)"""
+    return writer.transport.abort
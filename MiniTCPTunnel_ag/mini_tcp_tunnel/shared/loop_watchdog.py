@@ -0,0 +1,228 @@
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+# 루프 시간을 나눠 집계하는 분류. handshake는 태스크 단위, 나머지는 동기 구간 단위로 측정한다.
+CATEGORIES = ("handshake", "crypto", "compression", "logging")
+# 지연 분위수 계산에 쓰는 최근 샘플 수
+LAG_SAMPLE_WINDOW = 1024
+# 보관하는 느린 콜백 기록 수
+SLOW_CALLBACK_HISTORY = 50
+
+logger = logging.getLogger("LoopWatchdog")
+
+# 현재 태스크가 하고 있는 일의 분류. 태스크는 자기 컨텍스트를 가지므로 await를 넘어 유지된다.
+_task_category: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("loop_category", default=None)
+# 콜백/로깅 훅을 가진 워치독 (프로세스당 하나)
+_active: Optional["LoopWatchdog"] = None
+_original_handle_run = asyncio.events.Handle._run
+_original_logger_log = logging.Logger._log
+
+
+class _NullSection:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SECTION = _NullSection()
+
+
+class _Section:
+    __slots__ = ("watchdog", "category", "started")
+
+    def __init__(self, watchdog: "LoopWatchdog", category: str):
+        self.watchdog = watchdog
+        self.category = category
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.watchdog.category_seconds[self.category] += time.perf_counter() - self.started
+        return False
+
+
+def timed(category: str):
+    """
+    동기 구간(압축/AEAD 등)의 루프 시간을 category로 집계하는 컨텍스트 매니저.
+    워치독이 꺼져 있거나 스레드 풀에서 실행 중이면 아무것도 하지 않는다. (핫 패스용)
+    """
+    watchdog = _active
+    if watchdog is None or watchdog.thread_id != threading.get_ident():
+        return _NULL_SECTION
+    return _Section(watchdog, category)
+
+
+class task_category:
+    """with 블록 동안 현재 태스크가 실행한 콜백 시간을 category로 집계한다. (await를 포함해도 된다)"""
+    __slots__ = ("category", "token")
+
+    def __init__(self, category: str):
+        self.category = category
+
+    def __enter__(self):
+        self.token = _task_category.set(self.category)
+        return self
+
+    def __exit__(self, *exc):
+        _task_category.reset(self.token)
+        return False
+
+
+def _describe_callback(handle) -> str:
+    callback = handle._callback
+    owner = getattr(callback, "__self__", None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        return f"Task {owner.get_name()} {getattr(coro, '__qualname__', repr(coro))}"
+    return getattr(callback, "__qualname__", repr(callback))
+
+
+def _timed_handle_run(handle):
+    watchdog = _active
+    if watchdog is None or handle._loop is not watchdog.loop:
+        return _original_handle_run(handle)
+    category = handle._context.get(_task_category) if handle._context is not None else None
+    started = time.perf_counter()
+    try:
+        return _original_handle_run(handle)
+    finally:
+        watchdog._record_callback(handle, time.perf_counter() - started, category)
+
+
+def _timed_logger_log(self, *args, **kwargs):
+    with timed("logging"):
+        return _original_logger_log(self, *args, **kwargs)
+
+
+def _percentile(ordered, pct: float) -> float:
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LoopWatchdog:
+    """
+    이벤트 루프 지연과 느린 콜백을 기록하는 선택 진단 도구.
+    - 지연: sample_interval마다 깨어나 예정보다 늦은 시간을 기록한다. (모든 루프 구현)
+    - 느린 콜백: asyncio.Handle 실행 시간을 재서 slow_callback_ms를 넘는 콜백을 남긴다.
+      uvloop은 자체 Handle을 쓰므로 콜백/handshake 집계는 기본 asyncio 루프에서만 동작한다.
+    - 분류: handshake(태스크 태그), crypto/compression(FrameCodec 구간), logging(출력되는 로그 레코드 처리)
+    콜백/로깅 훅은 프로세스 전역이므로 먼저 시작한 워치독 하나만 갖고, 나머지는 지연만 샘플링한다.
+    """
+    def __init__(self, name: str = "loop", slow_callback_ms: float = 100.0, sample_interval: float = 0.1,
+                 report_interval: float = 60.0):
+        self.name = name
+        self.slow_callback = slow_callback_ms / 1000.0
+        self.sample_interval = sample_interval
+        self.report_interval = report_interval
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread_id: Optional[int] = None
+        self.owns_hooks = False
+        self.lag_samples = deque(maxlen=LAG_SAMPLE_WINDOW)
+        self.lag_max = 0.0
+        self.callbacks = 0
+        self.callback_seconds = 0.0
+        self.slow_callbacks_total = 0
+        self.slow_callbacks = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self.category_seconds: Dict[str, float] = {category: 0.0 for category in CATEGORIES}
+        self._tasks = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        global _active
+        if self._tasks:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        if _active is None:
+            _active = self
+            self.owns_hooks = True
+            asyncio.events.Handle._run = _timed_handle_run
+            logging.Logger._log = _timed_logger_log
+        else:
+            logger.warning(f"Another loop watchdog ({_active.name}) owns the callback hooks; {self.name} samples lag only")
+        self._tasks.append(asyncio.create_task(self._sample_lag()))
+        if self.report_interval > 0:
+            self._tasks.append(asyncio.create_task(self._report_loop()))
+
+    async def stop(self):
+        global _active
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self.owns_hooks:
+            asyncio.events.Handle._run = _original_handle_run
+            logging.Logger._log = _original_logger_log
+            _active = None
+            self.owns_hooks = False
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.sample_interval)
+            lag = max(0.0, loop.time() - started - self.sample_interval)
+            self.lag_samples.append(lag)
+            if lag > self.lag_max:
+                self.lag_max = lag
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            s = self.snapshot()
+            logger.info(
+                f"[{self.name}] lag p50={s['lag']['p50_ms']}ms p99={s['lag']['p99_ms']}ms max={s['lag']['max_ms']}ms, "
+                f"slow callbacks={s['callbacks']['slow']}, categories(s)={s['category_seconds']}"
+            )
+
+    def _record_callback(self, handle, elapsed: float, category: Optional[str]):
+        self.callbacks += 1
+        self.callback_seconds += elapsed
+        if category is not None:
+            self.category_seconds[category] = self.category_seconds.get(category, 0.0) + elapsed
+        if elapsed >= self.slow_callback:
+            self.slow_callbacks_total += 1
+            description = _describe_callback(handle)
+            self.slow_callbacks.append({
+                "callback": description,
+                "ms": round(elapsed * 1000, 3),
+                "category": category,
+                "at": time.time(),
+            })
+            logger.warning(f"[{self.name}] Slow callback {elapsed * 1000:.1f} ms: {description}")
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.lag_samples)
+        return {
+            "name": self.name,
+            "lag": {
+                "samples": len(ordered),
+                "p50_ms": round(_percentile(ordered, 50) * 1000, 3),
+                "p99_ms": round(_percentile(ordered, 99) * 1000, 3),
+                "max_ms": round(self.lag_max * 1000, 3),
+            },
+            "callbacks": {
+                "count": self.callbacks,
+                "seconds": round(self.callback_seconds, 6),
+                "slow": self.slow_callbacks_total,
+            },
+            "category_seconds": {k: round(v, 6) for k, v in self.category_seconds.items()},
+            "slow_callbacks": list(self.slow_callbacks),
+        }
@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import struct
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from .constants import (
+    MsgType, MSG_HEADER_LEN, MAX_STREAMS_PER_CHANNEL,
+    STREAM_WINDOW, STREAM_WINDOW_UPDATE_THRESHOLD,
+)
+from .framing import FrameCodec, MSG_HEADER
+from .compression import CompressionPolicy
+from .liveness import LivenessWheel, abort_transport
+
+# 원격에서 연 스트림을 처리하는 콜백: (stream, STREAM_OPEN payload)
+StreamOpenHandler = Callable[["MuxStream", bytes], Awaitable[None]]
+
+# WINDOW_UPDATE payload: | increment(4) |
+WINDOW_UPDATE = struct.Struct(">I")
+
+
+class MuxStream:
+    """
+    다중화 채널 위의 논리 스트림.
+    FrameCodec과 같은 read_frame/write_frame/write_message/close 인터페이스를 제공하므로
+    기존 브리지 코드가 1:1 데이터 채널과 동일하게 사용할 수 있다.
+
+    흐름 제어: 각 방향은 STREAM_WINDOW 바이트의 윈도우로 시작한다.
+    송신측은 윈도우를 다 쓰면 WINDOW_UPDATE를 받을 때까지 기다리고,
+    수신측은 브리지가 읽어 간 만큼만 윈도우를 돌려준다.
+    따라서 느린 소비자가 있어도 스트림당 버퍼는 윈도우 크기를 넘지 않고,
+    같은 채널의 다른 스트림도 막히지 않는다.
+    """
+    def __init__(self, channel: "MuxChannel", stream_id: int):
+        self.channel = channel
+        self.stream_id = stream_id
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+        self.remote_closed = False
+        # 송신 가능한 바이트 수 (원격이 WINDOW_UPDATE로 늘려 준다)
+        self.send_window = STREAM_WINDOW
+        self._window_open = asyncio.Event()
+        self._window_open.set()
+        # 원격이 추가로 보낼 수 있는 바이트 수와, 아직 돌려주지 않은 소비량
+        self.recv_window = STREAM_WINDOW
+        self._consumed = 0
+        # inbox에 쌓여 있는 DATA 바이트 수
+        self.buffered = 0
+
+    def feed_frame(self, data: bytes) -> bool:
+        """수신 DATA 프레임을 적재한다. 원격이 윈도우를 초과하면 False를 반환한다."""
+        if self.remote_closed:
+            return True
+        size = len(data) - MSG_HEADER_LEN
+        if size > self.recv_window:
+            return False
+        self.recv_window -= size
+        self.buffered += size
+        self.inbox.put_nowait(data)
+        return True
+
+    def feed_eof(self):
+        # 빈 프레임은 브리지에서 스트림 종료로 해석된다.
+        if not self.remote_closed:
+            self.remote_closed = True
+            self.inbox.put_nowait(b"")
+        # 윈도우를 기다리던 송신자도 깨워 종료를 알게 한다.
+        self._window_open.set()
+
+    def add_send_window(self, increment: int):
+        self.send_window += increment
+        self._window_open.set()
+
+    async def read_frame(self) -> bytes:
+        if self.remote_closed and self.inbox.empty():
+            return b""
+        data = await self.inbox.get()
+        if data:
+            size = len(data) - MSG_HEADER_LEN
+            self.buffered -= size
+            await self._consume(size)
+        return data
+
+    async def _consume(self, size: int):
+        # 윈도우의 절반 이상을 소비했을 때 한 번에 돌려줘 WINDOW_UPDATE 수를 줄인다.
+        self._consumed += size
+        if self._consumed < STREAM_WINDOW_UPDATE_THRESHOLD or self.closed or self.remote_closed:
+            return
+        increment, self._consumed = self._consumed, 0
+        self.recv_window += increment
+        try:
+            await self.channel.send_control(MsgType.WINDOW_UPDATE, self.stream_id, WINDOW_UPDATE.pack(increment))
+        except Exception:
+            # 채널이 끊긴 경우 스트림도 곧 정리되므로 무시한다.
+            pass
+
+    async def write_frame(self, data: bytes, compression: Optional[CompressionPolicy] = None):
+        # 브리지가 만든 헤더의 Type/Flags는 유지하고 StreamID만 실제 스트림 ID로 바꾼다.
+        view = memoryview(data)
+        await self.write_message(data[0], 0, view[MSG_HEADER_LEN:], flags=data[1], compression=compression)
+
+    async def write_message(self, msg_type: int, stream_id: int, payload, flags: int = 0,
+                            compression: Optional[CompressionPolicy] = None):
+        if self.closed:
+            raise ConnectionResetError(f"Stream {self.stream_id} already closed")
+        codec = self.channel.codec
+        # 호출자가 넘긴 StreamID(1:1 채널용 0)는 무시하고 이 스트림의 ID를 사용한다.
+        if msg_type != MsgType.DATA:
+            await codec.write_message(msg_type, self.stream_id, payload, flags=flags, compression=compression)
+            return
+        view = memoryview(payload)
+        while len(view) > 0:
+            # 윈도우가 없으면 원격 소비자가 따라잡을 때까지 기다린다. (브리지의 소켓 읽기도 함께 멈춘다)
+            while self.send_window <= 0:
+                self._window_open.clear()
+                await self._window_open.wait()
+                if self.closed or self.remote_closed:
+                    raise ConnectionResetError(f"Stream {self.stream_id} closed while waiting for window")
+            chunk = view[:self.send_window]
+            self.send_window -= len(chunk)
+            await codec.write_message(msg_type, self.stream_id, chunk, flags=flags, compression=compression)
+            view = view[len(chunk):]
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self._window_open.set()
+        self.channel.streams.pop(self.stream_id, None)
+        if not self.channel.closed:
+            try:
+                await self.channel.send_control(MsgType.STREAM_CLOSE, self.stream_id)
+            except Exception:
+                # 채널이 이미 끊긴 경우 원격도 스트림을 정리하므로 무시한다.
+                pass
+
+
+class MuxChannel:
+    """
+    하나의 인증된 데이터 채널(FrameCodec) 위에서 여러 스트림을 StreamID로 구분해 전달한다.
+    스트림은 서버가 STREAM_OPEN으로 열고, 양쪽 모두 STREAM_CLOSE로 닫을 수 있다.
+    """
+    def __init__(self, codec: FrameCodec, name: str, on_stream_open: Optional[StreamOpenHandler] = None,
+                 liveness: Optional[LivenessWheel] = None):
+        self.codec = codec
+        # 주기적으로 HEARTBEAT를 보내고, 상대가 응답하지 않으면 채널(과 모든 스트림)을 끊는다.
+        self.liveness = liveness
+        self.name = name
+        self.on_stream_open = on_stream_open
+        self.streams: Dict[int, MuxStream] = {}
+        self.closed = False
+        self._next_stream_id = 1
+        self._handler_tasks = set()
+        # 읽기 루프에서 거절한 스트림. STREAM_CLOSE는 별도 태스크가 보내므로 송신이 막혀도 읽기는 계속된다.
+        self._rejects: Deque[int] = deque()
+        self._reject_task: Optional[asyncio.Task] = None
+        self.logger = logging.getLogger(f"MuxChannel({name})")
+
+    @property
+    def active_streams(self) -> int:
+        return len(self.streams)
+
+    def has_capacity(self) -> bool:
+        return not self.closed and len(self.streams) < MAX_STREAMS_PER_CHANNEL
+
+    async def send_control(self, msg_type: MsgType, stream_id: int, payload: bytes = b""):
+        await self.codec.write_message(msg_type, stream_id, payload)
+
+    def _allocate_stream_id(self) -> int:
+        # StreamID 0은 채널 자체 메시지용으로 남겨두고, 사용 중인 ID는 건너뛴다.
+        while True:
+            sid = self._next_stream_id
+            self._next_stream_id = (sid % 0xFFFFFFFF) + 1
+            if sid not in self.streams:
+                return sid
+
+    async def open_stream(self, payload: bytes = b"") -> MuxStream:
+        """로컬에서 새 스트림을 열고 STREAM_OPEN을 원격에 통지한다."""
+        if not self.has_capacity():
+            raise ConnectionError(f"Mux channel {self.name} has no capacity")
+        stream = MuxStream(self, self._allocate_stream_id())
+        self.streams[stream.stream_id] = stream
+        try:
+            await self.send_control(MsgType.STREAM_OPEN, stream.stream_id, payload)
+        except Exception:
+            self.streams.pop(stream.stream_id, None)
+            raise
+        return stream
+
+    async def run(self):
+        """채널이 끊길 때까지 프레임을 읽어 스트림별로 분배한다."""
+        alive = None
+        if self.liveness:
+            alive = self.liveness.register("mux_channel", self._send_heartbeat, abort_transport(self.codec.writer))
+        try:
+            while not self.closed:
+                try:
+                    data = await self.codec.read_frame()
+                except ValueError as e:
+                    self.logger.warning(f"SECURITY: Invalid mux frame: {e}")
+                    break
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                if len(data) < MSG_HEADER_LEN:
+                    continue
+                if alive:
+                    alive.seen()
+                msg_type, _, stream_id = MSG_HEADER.unpack_from(data)
+
+                if msg_type == MsgType.DATA or msg_type == MsgType.DATA_EOF:
+                    # DATA_EOF는 같은 스트림의 DATA 뒤에 순서대로 전달되어야 하므로 inbox로 보낸다.
+                    stream = self.streams.get(stream_id)
+                    if stream and not stream.feed_frame(data):
+                        # 윈도우를 무시하는 원격은 메모리를 무한히 쓰게 만들 수 있으므로 스트림을 끊는다.
+                        self.logger.warning(f"SECURITY: Stream {stream_id} exceeded flow-control window")
+                        self.streams.pop(stream_id, None)
+                        stream.closed = True
+                        stream.feed_eof()
+                        if not self._reject_stream(stream_id):
+                            break
+                elif msg_type == MsgType.WINDOW_UPDATE:
+                    stream = self.streams.get(stream_id)
+                    if stream and len(data) >= MSG_HEADER_LEN + WINDOW_UPDATE.size:
+                        stream.add_send_window(WINDOW_UPDATE.unpack_from(data, MSG_HEADER_LEN)[0])
+                elif msg_type == MsgType.STREAM_OPEN:
+                    if stream_id not in self.streams and len(self.streams) >= MAX_STREAMS_PER_CHANNEL:
+                        # 스트림마다 수신 윈도우만큼 버퍼링하므로, 상한을 넘는 STREAM_OPEN은 바로 닫아 메모리를 묶어 둔다.
+                        self.logger.warning(
+                            f"SECURITY: Stream limit ({MAX_STREAMS_PER_CHANNEL}) reached, rejecting stream {stream_id}"
+                        )
+                        if not self._reject_stream(stream_id):
+                            break
+                        continue
+                    self._accept_stream(stream_id, data[MSG_HEADER_LEN:])
+                elif msg_type == MsgType.STREAM_CLOSE:
+                    stream = self.streams.pop(stream_id, None)
+                    if stream:
+                        # 원격이 이미 닫았으므로 STREAM_CLOSE를 다시 보내지 않는다.
+                        stream.closed = True
+                        stream.feed_eof()
+                elif msg_type == MsgType.HEARTBEAT:
+                    if alive:
+                        alive.heartbeat_seen()
+                else:
+                    self.logger.warning(f"Unexpected mux message type: {msg_type}")
+        finally:
+            if alive:
+                alive.close()
+            await self.close()
+
+    def _reject_stream(self, stream_id: int) -> bool:
+        """
+        STREAM_CLOSE를 보낼 스트림을 쌓아 두고 송신 태스크를 깨운다. (읽기 루프에서 await하지 않는다)
+        상대가 응답을 읽지 않으면서 거절될 스트림을 계속 열면 False를 반환해 채널을 끊게 한다.
+        """
+        if len(self._rejects) >= MAX_STREAMS_PER_CHANNEL:
+            self.logger.warning(f"SECURITY: Too many pending stream rejects ({len(self._rejects)}), closing channel")
+            return False
+        self._rejects.append(stream_id)
+        if self._reject_task is None or self._reject_task.done():
+            self._reject_task = asyncio.create_task(self._send_rejects())
+        return True
+
+    async def _send_rejects(self):
+        while self._rejects and not self.closed:
+            try:
+                await self.send_control(MsgType.STREAM_CLOSE, self._rejects.popleft())
+            except Exception:
+                # 채널이 끊기면 run()이 정리한다.
+                return
+
+    async def _send_heartbeat(self):
+        if not self.closed:
+            await self.send_control(MsgType.HEARTBEAT, 0)
+
+    def _accept_stream(self, stream_id: int, payload: bytes):
+        if self.on_stream_open is None or stream_id in self.streams or stream_id == 0:
+            self.logger.warning(f"Rejected STREAM_OPEN stream_id={stream_id}")
+            return
+        stream = MuxStream(self, stream_id)
+        self.streams[stream_id] = stream
+        task = asyncio.create_task(self.on_stream_open(stream, payload))
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._reject_task:
+            self._reject_task.cancel()
+        self._rejects.clear()
+        # 남아 있는 스트림에는 종료를 통지해 브리지가 정리되도록 한다.
+        for stream in list(self.streams.values()):
+            stream.closed = True
+            stream.feed_eof()
+        self.streams.clear()
+        await self.codec.close()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import socket
+import sys
+from typing import Callable, Optional, Tuple
+
+from .constants import RAW_RELAY_CHUNK
+from .stream_io import join_pipes
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def splice_supported() -> bool:
+    """커널 splice(2)로 소켓 간 복사를 할 수 있는지 (Linux + Python 3.10 이상)."""
+    return sys.platform.startswith("linux") and hasattr(os, "splice")
+
+
+async def detach_stream(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> Tuple[socket.socket, bytes]:
+    """
+    StreamReader/Writer에서 소켓을 떼어 내 (논블로킹 소켓, 이미 읽혀 버퍼에 있던 바이트)를 반환한다.
+    transport는 닫지만 소켓은 dup한 디스크립터로 유지되므로 TCP 연결은 끊기지 않는다.
+    """
+    transport = writer.transport
+    # 아직 커널로 나가지 않은 프레임(예: DATA_CONN_READY)이 원시 바이트보다 늦게 나가면 안 된다.
+    transport.set_write_buffer_limits(high=0)
+    await writer.drain()
+    transport.pause_reading()
+    # StreamReader가 미리 읽어 둔 바이트는 원시 중계 전에 먼저 전달해야 한다.
+    # 읽기를 멈춘 뒤 EOF를 표시하면 read()는 기다리지 않고 버퍼에 있는 만큼만 돌려준다.
+    # (내부 _buffer에 의존하지 않으므로 uvloop 등 다른 루프 구현에서도 같다)
+    reader.feed_eof()
+    leftover = await reader.read()
+    sock = socket.socket(fileno=os.dup(transport.get_extra_info("socket").fileno()))
+    sock.setblocking(False)
+    transport.close()
+    return sock, leftover
+
+
+async def _wait_fd(add, remove, fd: int):
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+    add(fd, lambda: fut.done() or fut.set_result(None))
+    try:
+        await fut
+    finally:
+        remove(fd)
+
+
+def _grow_pipe(fd: int):
+    # 파이프 기본 용량(64 KiB)이면 splice 한 번에 옮길 수 있는 양이 작다. 실패하면 기본값을 쓴다.
+    if fcntl is None or not hasattr(fcntl, "F_SETPIPE_SZ"):
+        return
+    try:
+        fcntl.fcntl(fd, fcntl.F_SETPIPE_SZ, RAW_RELAY_CHUNK)
+    except OSError:
+        pass
+
+
+async def _splice_loop(src: socket.socket, dst: socket.socket, on_bytes: Callable[[int], None]):
+    """소켓 → 파이프 → 소켓으로 커널 안에서만 옮긴다. (사용자 공간 복사 없음)"""
+    loop = asyncio.get_running_loop()
+    pipe_r, pipe_w = os.pipe()
+    try:
+        _grow_pipe(pipe_w)
+        flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+        src_fd, dst_fd = src.fileno(), dst.fileno()
+        while True:
+            try:
+                n = os.splice(src_fd, pipe_w, RAW_RELAY_CHUNK, flags=flags)
+            except BlockingIOError:
+                await _wait_fd(loop.add_reader, loop.remove_reader, src_fd)
+                continue
+            if n == 0:
+                return
+            # 다음 읽기 전에 파이프를 비워 두므로 EAGAIN은 항상 "소켓에 데이터 없음"을 뜻한다.
+            remaining = n
+            while remaining:
+                try:
+                    remaining -= os.splice(pipe_r, dst_fd, remaining, flags=flags)
+                except BlockingIOError:
+                    await _wait_fd(loop.add_writer, loop.remove_writer, dst_fd)
+            on_bytes(n)
+    finally:
+        os.close(pipe_r)
+        os.close(pipe_w)
+
+
+async def _copy_loop(src: socket.socket, dst: socket.socket, on_bytes: Callable[[int], None]):
+    """splice가 없는 플랫폼용. 버퍼 하나를 재사용해 프레이밍/추가 복사 없이 옮긴다."""
+    loop = asyncio.get_running_loop()
+    buf = bytearray(RAW_RELAY_CHUNK)
+    view = memoryview(buf)
+    while True:
+        n = await loop.sock_recv_into(src, buf)
+        if not n:
+            return
+        await loop.sock_sendall(dst, view[:n])
+        on_bytes(n)
+
+
+async def _pump(src: socket.socket, dst: socket.socket, leftover: bytes,
+                on_bytes: Callable[[int], None]) -> bool:
+    """
+    한 방향을 EOF까지 중계한 뒤 dst의 송신 방향만 닫는다(반종료 전달).
+    stream_io.join_pipes 규약대로 EOF면 True, 연결 오류면 False를 반환한다.
+    """
+    try:
+        if leftover:
+            await asyncio.get_running_loop().sock_sendall(dst, leftover)
+            on_bytes(len(leftover))
+        if splice_supported():
+            await _splice_loop(src, dst, on_bytes)
+        else:
+            await _copy_loop(src, dst, on_bytes)
+    except OSError:
+        return False
+    try:
+        dst.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+    return True
+
+
+def _ignore(_: int):
+    pass
+
+
+async def relay_streams(a_reader: asyncio.StreamReader, a_writer: asyncio.StreamWriter,
+                        b_reader: asyncio.StreamReader, b_writer: asyncio.StreamWriter,
+                        on_a_to_b: Optional[Callable[[int], None]] = None,
+                        on_b_to_a: Optional[Callable[[int], None]] = None) -> bool:
+    """
+    두 스트림을 원시 소켓으로 떼어 내 프레이밍/암호화 없이 양방향 중계한다.
+    on_*는 옮긴 바이트 수를 받는 콜백(지표 집계용)이다. 두 방향이 모두 EOF로 끝났으면 True.
+    """
+    a_sock, a_rest = await detach_stream(a_reader, a_writer)
+    try:
+        b_sock, b_rest = await detach_stream(b_reader, b_writer)
+    except Exception:
+        a_sock.close()
+        raise
+    try:
+        task1 = asyncio.create_task(_pump(a_sock, b_sock, a_rest, on_a_to_b or _ignore))
+        task2 = asyncio.create_task(_pump(b_sock, a_sock, b_rest, on_b_to_a or _ignore))
+        return await join_pipes(task1, task2)
+    finally:
+        a_sock.close()
+        b_sock.close()
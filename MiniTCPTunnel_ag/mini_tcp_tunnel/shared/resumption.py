@@ -0,0 +1,144 @@
+import hashlib
+import hmac
+import os
+import struct
+import time
+from typing import List, Optional, Tuple
+
+from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+
+from .constants import (
+    PROTOCOL_VERSION, Role, RESUMPTION_SECRET_LEN, SESSION_TICKET_LEN, DEFAULT_TICKET_LIFETIME,
+)
+from .crypto_utils import derive_session_keys
+
+# 재개 세션 키 유도에 쓰는 HKDF info (전체 핸드셰이크의 키와 섞이지 않게 구분한다)
+RESUME_KEY_INFO = b"MINI_TCP_TUNNEL_V1_RESUME"
+TICKET_KEY_LEN = 32
+TICKET_NONCE_LEN = 12
+# SESSION_TICKET 페이로드: | lifetime(4) | resumption_secret(32) | ticket |
+TICKET_PAYLOAD_LEN = 4 + RESUMPTION_SECRET_LEN + SESSION_TICKET_LEN
+# 클라이언트는 서버 시계와의 차이를 고려해 만료 직전 티켓은 쓰지 않는다.
+TICKET_EXPIRY_MARGIN = 30
+
+
+def _binder(secret: bytes, label: bytes, transcript: bytes) -> bytes:
+    return hmac.new(secret, label + transcript, hashlib.sha256).digest()
+
+
+def client_binder(secret: bytes, hello_body: bytes) -> bytes:
+    """재개 헬로 본문에 대한 HMAC. 티켓만 가로챈 공격자는 이 값을 만들 수 없다."""
+    return _binder(secret, b"client", hello_body)
+
+
+def server_binder(secret: bytes, client_hello: bytes, server_body: bytes) -> bytes:
+    """클라이언트 헬로 전체와 서버 응답 본문에 대한 HMAC. 서버도 같은 비밀을 안다는 증명이 된다."""
+    return _binder(secret, b"server", client_hello + server_body)
+
+
+def build_resume_hello_body(ticket: bytes, client_nonce: bytes, client_eph: bytes) -> bytes:
+    # | Ver(2) | Role(1) | Nonce(16) | Eph_Key(32) | Ticket |
+    return struct.pack(">H", PROTOCOL_VERSION) + bytes([Role.CLIENT]) + client_nonce + client_eph + ticket
+
+
+def build_resume_server_body(server_nonce: bytes, server_eph: bytes) -> bytes:
+    # | Ver(2) | Role(1) | Nonce(16) | Eph_Key(32) |
+    return struct.pack(">H", PROTOCOL_VERSION) + bytes([Role.SERVER]) + server_nonce + server_eph
+
+
+def derive_resume_keys(secret: bytes, dh_shared: bytes, client_nonce: bytes, server_nonce: bytes):
+    """
+    재개 비밀(PSK)과 이번 연결의 X25519 공유 비밀을 함께 넣어 세션 키를 만든다.
+    티켓 키나 재개 비밀이 나중에 유출되어도 임시 키 없이는 지난 재개 세션을 복호화할 수 없다.
+    """
+    return derive_session_keys(secret + dh_shared, client_nonce + server_nonce, RESUME_KEY_INFO)
+
+
+class TicketKeys:
+    """
+    서버 측 티켓 발급/검증기.
+    티켓 키는 무작위로 만들고 lifetime마다 교체한다. 직전 키는 검증용으로 한 주기 더 남겨 두므로
+    교체 직전에 발급한 티켓도 만료될 때까지 쓸 수 있다. (identity 키와 무관하므로 그쪽이 유출되어도 안전)
+    auto_rotate가 False면 스스로 교체하지 않고 install()로 받은 키만 쓴다. (워커 모드: 브로커가 배포)
+    """
+    def __init__(self, lifetime: int = DEFAULT_TICKET_LIFETIME, auto_rotate: bool = True):
+        self.lifetime = lifetime
+        self.auto_rotate = auto_rotate
+        # [현재 키, 직전 키]. 발급은 현재 키로만 한다.
+        self._keys: List[bytes] = []
+        self._aeads: List[ChaCha20Poly1305] = []
+        self._rotated_at = 0.0
+        if auto_rotate:
+            self.rotate()
+
+    def rotate(self, keep_previous: bool = True):
+        """새 키로 교체한다. keep_previous가 False면 직전 키도 바로 버린다."""
+        self.install([os.urandom(TICKET_KEY_LEN)] + (self._keys[:1] if keep_previous else []))
+
+    def install(self, keys: List[bytes]):
+        self._keys = list(keys[:2])
+        self._aeads = [ChaCha20Poly1305(key) for key in self._keys]
+        self._rotated_at = time.monotonic()
+
+    def export(self) -> List[bytes]:
+        return list(self._keys)
+
+    def _maybe_rotate(self):
+        if not self.auto_rotate:
+            return
+        elapsed = time.monotonic() - self._rotated_at
+        if elapsed >= self.lifetime:
+            # 한 주기 넘게 교체가 없었다면 직전 키로 발급한 티켓도 이미 만료되었다.
+            self.rotate(keep_previous=elapsed < 2 * self.lifetime)
+
+    def issue(self, client_key: bytes) -> Optional[bytes]:
+        """client_key에 묶인 새 티켓을 만들고 SESSION_TICKET 페이로드를 반환한다. 키가 아직 없으면 None."""
+        self._maybe_rotate()
+        if not self._aeads:
+            return None
+        secret = os.urandom(RESUMPTION_SECRET_LEN)
+        expires_at = int(time.time()) + self.lifetime
+        nonce = os.urandom(TICKET_NONCE_LEN)
+        ticket = nonce + self._aeads[0].encrypt(nonce, client_key + secret + struct.pack(">Q", expires_at), None)
+        return struct.pack(">I", self.lifetime) + secret + ticket
+
+    def open(self, ticket: bytes) -> Optional[Tuple[bytes, bytes]]:
+        """티켓을 복호화해 (client_key, resumption_secret)을 반환한다. 위조/만료/교체된 키의 티켓은 None."""
+        if len(ticket) != SESSION_TICKET_LEN:
+            return None
+        self._maybe_rotate()
+        plain = None
+        for aead in self._aeads:
+            try:
+                plain = aead.decrypt(ticket[:TICKET_NONCE_LEN], ticket[TICKET_NONCE_LEN:], None)
+                break
+            except Exception:
+                continue
+        if plain is None:
+            return None
+        client_key = plain[0:32]
+        secret = plain[32:32 + RESUMPTION_SECRET_LEN]
+        expires_at = struct.unpack(">Q", plain[32 + RESUMPTION_SECRET_LEN:])[0]
+        if time.time() > expires_at:
+            return None
+        return client_key, secret
+
+
+class ClientTicket:
+    """클라이언트가 보관하는 티켓과 재개 비밀. 제어 세션이 끊겨도 유효 시간 동안 유지한다."""
+    def __init__(self, ticket: bytes, secret: bytes, lifetime: int):
+        self.ticket = ticket
+        self.secret = secret
+        self.expires_at = time.monotonic() + lifetime - TICKET_EXPIRY_MARGIN
+
+    @classmethod
+    def from_payload(cls, payload: bytes) -> Optional["ClientTicket"]:
+        if len(payload) != TICKET_PAYLOAD_LEN:
+            return None
+        lifetime = struct.unpack(">I", payload[0:4])[0]
+        secret = payload[4:4 + RESUMPTION_SECRET_LEN]
+        ticket = payload[4 + RESUMPTION_SECRET_LEN:]
+        return cls(ticket, secret, lifetime)
+
+    def is_valid(self) -> bool:
+        return time.monotonic() < self.expires_at
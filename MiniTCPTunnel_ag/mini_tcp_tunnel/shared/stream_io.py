@@ -0,0 +1,72 @@
+import asyncio
+
+from .constants import MIN_READ_SIZE, MAX_READ_SIZE
+
+
+def clamp_read_size(read_size: int) -> int:
+    """설정된 읽기 크기를 허용 범위(4 KiB ~ 1 MiB)로 보정한다."""
+    return max(MIN_READ_SIZE, min(MAX_READ_SIZE, int(read_size)))
+
+
+async def read_coalesced(reader: asyncio.StreamReader, read_size: int, coalesce_ms: float = 0.0) -> bytes:
+    """
+    소켓에서 최대 read_size 바이트를 읽는다.
+    coalesce_ms가 양수이면 첫 읽기가 read_size보다 작을 때 그 시간 동안 추가 데이터를 모아
+    작은 쓰기 여러 개를 하나의 프레임으로 보낸다. (프레임당 암호화/헤더/drain 비용 절감)
+    빈 bytes는 EOF를 의미한다.
+    """
+    data = await reader.read(read_size)
+    if not data or coalesce_ms <= 0 or len(data) >= read_size:
+        return data
+
+    chunks = [data]
+    total = len(data)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + coalesce_ms / 1000.0
+    while total < read_size:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            # StreamReader.read는 취소되어도 버퍼의 데이터를 잃지 않는다.
+            more = await asyncio.wait_for(reader.read(read_size - total), timeout=remaining)
+        except asyncio.TimeoutError:
+            break
+        if not more:
+            # EOF는 다음 읽기에서 다시 감지되므로 모은 데이터부터 보낸다.
+            break
+        chunks.append(more)
+        total += len(more)
+    return b"".join(chunks)
+
+
+def write_eof(writer: asyncio.StreamWriter) -> bool:
+    """소켓의 송신 방향만 닫는다(TCP half-close). 지원하지 않거나 이미 닫힌 소켓이면 False."""
+    try:
+        if writer.can_write_eof() and not writer.is_closing():
+            writer.write_eof()
+            return True
+    except (OSError, RuntimeError):
+        # 원격이 이미 연결을 끊은 경우 등. 곧 소켓 전체를 닫으므로 무시한다.
+        pass
+    return False
+
+
+async def join_pipes(first: "asyncio.Task[bool]", second: "asyncio.Task[bool]") -> bool:
+    """
+    브리지의 양방향 파이프 태스크를 기다린다.
+    파이프는 EOF를 반대편에 전달하고 끝나면 True(반종료), 연결 오류로 끝나면 False를 반환한다.
+    반종료된 방향은 반대 방향이 끝날 때까지 제한 없이 기다리고(롱 폴링/스트리밍 응답),
+    한쪽이 비정상 종료하면 반대쪽을 즉시 취소한다. 두 방향 모두 반종료로 끝났으면 True.
+    """
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if any(task.cancelled() or task.exception() is not None or not task.result() for task in done):
+                return False
+        return True
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(first, second, return_exceptions=True)
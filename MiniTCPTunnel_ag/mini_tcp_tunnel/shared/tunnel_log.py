@@ -0,0 +1,71 @@
+import logging
+from array import array
+from enum import IntEnum
+from typing import Dict
+
+
+class TunnelEvent(IntEnum):
+    """연결/프레임 단위로 자주 일어나는 이벤트. 로그 문자열 대신 번호별 카운터로 집계한다."""
+    PUBLIC_ACCEPTED = 0
+    PAIRING_PREPARED = 1
+    PAIRING_MATCHED = 2
+    PAIRING_CANCELLED = 3
+    INCOMING_CONN_SENT = 4
+    INCOMING_CONN_RECEIVED = 5
+    STREAM_OPENED = 6
+    DATA_CHANNEL_SPAWNED = 7
+    LOCAL_CONNECTED = 8
+    BRIDGE_STARTED = 9
+    BRIDGE_FINISHED = 10
+    BRIDGE_ABORTED = 11
+    FIRST_DATA = 12
+    EOF_FORWARDED = 13
+    CLIENT_CONNECTED = 14
+    FIRST_FRAME = 15
+    DATA_CONN_READY = 16
+
+
+# 프로세스 공용 이벤트 카운터. 부호 없는 64비트 정수 배열이라 문자열 생성이나 객체 할당 없이 증가시킬 수 있다.
+EVENT_COUNTERS = array("Q", bytes(8 * len(TunnelEvent)))
+# 연결 단위 로그를 N번에 한 번만 출력한다. (1이면 모두 출력, 카운터는 항상 집계)
+_sample_every = 1
+
+
+def configure_log_sampling(sample_every: int = 1):
+    """연결/프레임 단위 로그의 샘플링 간격을 정한다. 각 이벤트의 첫 발생과 이후 N번째마다 출력한다."""
+    global _sample_every
+    _sample_every = max(1, sample_every)
+
+
+def event_counts() -> Dict[str, int]:
+    """이벤트 이름 -> 누적 횟수."""
+    return {event.name.lower(): EVENT_COUNTERS[event] for event in TunnelEvent}
+
+
+class TunnelLog:
+    """
+    터널 핫 패스용 로거 래퍼.
+    - 메시지는 %-형식 인자로만 받아, 출력되지 않는 레벨이면 문자열을 만들지 않는다.
+    - 모든 호출은 먼저 이벤트 카운터를 올리고, sampled()는 샘플링 간격에 걸린 경우에만 출력한다.
+    호출하는 쪽에서 f-string을 넘기면 이 래퍼의 의미가 없으므로 반드시 인자를 따로 넘긴다.
+    """
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def event(self, event: TunnelEvent, level: int, msg: str, *args):
+        """이벤트를 세고, level이 켜져 있으면 출력한다."""
+        EVENT_COUNTERS[event] += 1
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args)
+
+    def sampled(self, event: TunnelEvent, level: int, msg: str, *args):
+        """이벤트를 세고, 첫 발생과 이후 샘플링 간격마다 한 번씩만 출력한다."""
+        count = EVENT_COUNTERS[event] + 1
+        EVENT_COUNTERS[event] = count
+        if (count == 1 or count % _sample_every == 0) and self.logger.isEnabledFor(level):
+            if _sample_every > 1:
+                msg += " [sampled 1/%d, total=%d]"
+                args += (_sample_every, count)
+            self.logger.log(level, msg, *args)
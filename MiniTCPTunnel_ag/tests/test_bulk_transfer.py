@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared.framing import configure_crypto_offload
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+PAYLOAD_SIZE = 4 * 1024 * 1024
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_hash_service(port: int):
+    """받은 바이트를 모두 읽은 뒤 SHA-256 다이제스트를 돌려주는 로컬 서비스"""
+    async def handle(reader, writer):
+        digest = hashlib.sha256()
+        received = 0
+        try:
+            while received < PAYLOAD_SIZE:
+                data = await reader.read(65536)
+                if not data: break
+                digest.update(data)
+                received += len(data)
+            writer.write(digest.hexdigest().encode())
+            await writer.drain()
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def run_scenario(server_port: int, tunnel_port: int, svc_port: int, mux_channels: int,
+                       read_size: int, coalesce_ms: float) -> bool:
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(server_port, server_key, read_size=read_size, coalesce_ms=coalesce_ms)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    svc = await start_hash_service(svc_port)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+        read_size=read_size,
+        coalesce_ms=coalesce_ms,
+    )
+    tunnel_cfg = TunnelConfig("bulk-test", tunnel_port, '127.0.0.1', svc_port)
+    client.add_tunnel(tunnel_cfg)
+
+    ok = False
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel_cfg.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: server.active_session and len(server.active_session.mux_channels) == mux_channels, 5.0)
+
+        payload = os.urandom(PAYLOAD_SIZE)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        reader, writer = await asyncio.open_connection('127.0.0.1', tunnel_port)
+        # 작은 쓰기를 여러 번 보내 병합 경로도 함께 검증한다.
+        for offset in range(0, PAYLOAD_SIZE, 1500):
+            writer.write(payload[offset:offset + 1500])
+        await writer.drain()
+        resp = await asyncio.wait_for(reader.read(100), timeout=20.0)
+        elapsed = loop.time() - start
+        writer.close()
+        ok = resp.decode() == hashlib.sha256(payload).hexdigest()
+        log(f">>> [TEST] mux={mux_channels} read_size={read_size} coalesce_ms={coalesce_ms}: "
+            f"digest_match={ok}, {PAYLOAD_SIZE / elapsed / (1024 * 1024):.1f} MiB/s")
+    finally:
+        await client.disconnect()
+        svc.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+async def main():
+    results = [
+        await run_scenario(9041, 10041, 9995, mux_channels=0, read_size=256 * 1024, coalesce_ms=0.0),
+        await run_scenario(9042, 10042, 9996, mux_channels=2, read_size=256 * 1024, coalesce_ms=2.0),
+        await run_scenario(9043, 10043, 9997, mux_channels=0, read_size=4096, coalesce_ms=0.0),
+    ]
+    # 큰 프레임의 암복호화를 스레드 풀에서 처리해도 데이터가 그대로 전달되어야 한다.
+    configure_crypto_offload(threshold=64 * 1024, workers=4)
+    try:
+        results.append(await run_scenario(9044, 10044, 9998, mux_channels=2, read_size=1024 * 1024, coalesce_ms=2.0))
+    finally:
+        configure_crypto_offload()
+    if all(results):
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
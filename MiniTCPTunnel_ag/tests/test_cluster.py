@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.server.cluster import run_cluster, cluster_supported
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9051
+WORKERS = 3
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(100)
+                if not data: break
+                writer.write(b"ECHO:" + data)
+                await writer.drain()
+        except:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_once(port: int, index: int) -> bool:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+    try:
+        msg = f"HELLO-{index}".encode()
+        writer.write(msg)
+        await writer.drain()
+        resp = await asyncio.wait_for(reader.read(100), timeout=5.0)
+        return resp == b"ECHO:" + msg
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def run_client_scenario(client_key, server_key, tunnel_port: int, echo_port: int, mux_channels: int) -> bool:
+    mock = await start_mock_local_service(echo_port)
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+    )
+    tunnel_cfg = TunnelConfig("cluster-test", tunnel_port, '127.0.0.1', echo_port)
+    client.add_tunnel(tunnel_cfg)
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel_cfg.status == "Open", 10.0)
+        await wait_until(lambda: len(client.mux_channels) == mux_channels, 5.0)
+        # 다른 워커들이 같은 포트를 열 시간을 준다.
+        await asyncio.sleep(0.5)
+        # 연결이 여러 워커로 분산되므로 워커 간 소켓 전달/회수 경로가 모두 사용된다.
+        results = await asyncio.gather(*(echo_once(tunnel_port, i) for i in range(30)), return_exceptions=True)
+        echoed = sum(r is True for r in results)
+        log(f">>> [TEST] workers={WORKERS} mux_channels={mux_channels}: {echoed}/30 echoed")
+        return echoed == 30
+    finally:
+        await client.disconnect()
+        mock.close()
+        # 세션 해제가 모든 워커에 전파될 시간을 준다.
+        await asyncio.sleep(0.5)
+
+async def main():
+    if not cluster_supported():
+        log(">>> [TEST] SKIP: worker mode is not supported on this platform")
+        return
+
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    # fork로 띄운 워커들이 허용 키 목록을 그대로 물려받는다.
+    ctx = multiprocessing.get_context("fork")
+    cluster = ctx.Process(
+        target=run_cluster,
+        args=(WORKERS, lambda link: Server(SERVER_PORT, server_key, cluster=link)),
+    )
+    cluster.start()
+    await asyncio.sleep(1.0)
+
+    try:
+        # 같은 클러스터에서 세션을 순서대로 바꿔가며 검증한다. (세션 해제 전파도 함께 확인)
+        mux_ok = await run_client_scenario(client_key, server_key, 10051, 9971, mux_channels=1)
+        legacy_ok = await run_client_scenario(client_key, server_key, 10052, 9972, mux_channels=0)
+        multi_ok = await run_client_scenario(client_key, server_key, 10053, 9973, mux_channels=4)
+    finally:
+        cluster.terminate()
+        cluster.join(timeout=5)
+
+    if mux_ok and legacy_ok and multi_ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
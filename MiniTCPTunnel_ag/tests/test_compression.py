@@ -0,0 +1,133 @@
+import asyncio
+import os
+import struct
+import sys
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.shared.constants import FRAME_FLAG_COMPRESSED
+from mini_tcp_tunnel.shared.compression import CompressionPolicy
+from mini_tcp_tunnel.shared.crypto_utils import CryptoContext
+from mini_tcp_tunnel.shared.framing import FrameCodec, configure_crypto_offload
+
+def log(msg):
+    print(msg, flush=True)
+
+class CaptureWriter:
+    """FrameCodec이 쓴 바이트를 그대로 모아 두는 가짜 StreamWriter"""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+
+    def writelines(self, chunks):
+        for chunk in chunks:
+            self.buffer += chunk
+
+    async def drain(self):
+        pass
+
+def make_pair():
+    key = os.urandom(32)
+    nonce_base = os.urandom(4)
+    writer = CaptureWriter()
+    sender = FrameCodec(None, writer, write_ctx=CryptoContext(key, nonce_base))
+    reader = asyncio.StreamReader()
+    receiver = FrameCodec(reader, None, read_ctx=CryptoContext(key, nonce_base))
+    return sender, writer, receiver, reader
+
+async def roundtrip(policy: CompressionPolicy, data: bytes):
+    sender, writer, receiver, reader = make_pair()
+    await sender.write_frame(data, policy)
+    head = struct.unpack(">I", writer.buffer[:4])[0]
+    reader.feed_data(bytes(writer.buffer))
+    out = await receiver.read_frame()
+    return out == data, bool(head & FRAME_FLAG_COMPRESSED)
+
+async def main():
+    ok = True
+    text = b"GET /index.html HTTP/1.1\r\nHost: example\r\n\r\n" * 200
+    noise = os.urandom(64 * 1024)
+
+    # 1. 압축이 잘 되는 데이터는 auto/always 모두 압축 플래그가 켜져야 한다.
+    for mode in ("auto", "always"):
+        same, flagged = await roundtrip(CompressionPolicy(mode), text)
+        log(f">>> [TEST] {mode} text: roundtrip={same}, compressed={flagged}")
+        ok = ok and same and flagged
+
+    # 2. never는 항상 원본으로 보낸다.
+    same, flagged = await roundtrip(CompressionPolicy("never"), text)
+    log(f">>> [TEST] never text: roundtrip={same}, compressed={flagged}")
+    ok = ok and same and not flagged
+
+    # 3. 무작위(암호화된 트래픽과 유사) 데이터는 auto에서 압축을 건너뛰고 백오프한다.
+    policy = CompressionPolicy("auto")
+    same, flagged = await roundtrip(policy, noise)
+    log(f">>> [TEST] auto noise: roundtrip={same}, compressed={flagged}")
+    ok = ok and same and not flagged
+    # 백오프 동안에는 압축이 잘 되는 프레임도 시도하지 않는다.
+    same, flagged = await roundtrip(policy, text)
+    ok = ok and same and not flagged and policy.skipped_frames == 2
+
+    # 4. 작은 프레임은 헤더 오버헤드만 늘어나므로 압축하지 않는다.
+    same, flagged = await roundtrip(CompressionPolicy("auto"), b"x" * 32)
+    ok = ok and same and not flagged
+
+    # 5. 압축 플래그 비트를 변조하면 AEAD 인증에서 거부되어야 한다.
+    sender, writer, receiver, reader = make_pair()
+    await sender.write_frame(text, CompressionPolicy("always"))
+    tampered = bytearray(writer.buffer)
+    tampered[0] ^= 0x80
+    reader.feed_data(bytes(tampered))
+    try:
+        await receiver.read_frame()
+        log(">>> [TEST] FAIL: tampered compression flag accepted")
+        ok = False
+    except Exception:
+        log(">>> [TEST] tampered compression flag rejected")
+
+    # 6. write_message는 memoryview payload를 복사 없이 받아 헤더와 함께 한 프레임으로 보낸다.
+    sender, writer, receiver, reader = make_pair()
+    await sender.write_message(30, 7, memoryview(text)[100:], compression=CompressionPolicy("auto"))
+    reader.feed_data(bytes(writer.buffer))
+    out = await receiver.read_frame()
+    same = out == bytes([30, 0, 0, 0, 0, 7]) + text[100:]
+    log(f">>> [TEST] write_message memoryview: roundtrip={same}")
+    ok = ok and same
+
+    # 7. 스레드 풀 오프로딩 중에도 동시 쓰기의 전송 순서와 nonce 순서가 일치해야 한다.
+    configure_crypto_offload(threshold=1024)
+    try:
+        sender, writer, receiver, reader = make_pair()
+        frames = [bytes([i]) * (2048 + i * 512) for i in range(20)]
+        await asyncio.gather(*(sender.write_frame(f) for f in frames))
+        reader.feed_data(bytes(writer.buffer))
+        received = [await receiver.read_frame() for _ in frames]
+        same = received == frames
+    except Exception as e:
+        log(f">>> [TEST] offload error: {e}")
+        same = False
+    finally:
+        configure_crypto_offload()
+    log(f">>> [TEST] offloaded frames in order: {same}")
+    ok = ok and same
+
+    if ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.shared import event_loop
+from mini_tcp_tunnel.shared.loop_bench import bench_event_loops, format_bench_results
+
+def log(msg):
+    print(msg, flush=True)
+
+def main():
+    ok = True
+
+    # 1. uvloop 요청은 설치 여부에 따라 uvloop 또는 asyncio로 해석되어야 한다.
+    resolved = event_loop.resolve_event_loop("uvloop")
+    expected = "uvloop" if event_loop.uvloop is not None else "asyncio"
+    log(f">>> [TEST] resolve uvloop -> {resolved} (available={event_loop.available_event_loops()})")
+    ok = ok and resolved == expected
+
+    # 2. 알 수 없는 이름은 조용히 대체하지 않고 거부한다.
+    try:
+        event_loop.resolve_event_loop("trio")
+        ok = False
+    except ValueError:
+        pass
+
+    # 3. 선택한 루프에서 코루틴이 실행되고 결과가 반환되어야 한다.
+    async def loop_type():
+        return type(asyncio.get_running_loop()).__module__
+    module = event_loop.run(loop_type, "auto")
+    log(f">>> [TEST] auto loop module: {module}")
+    ok = ok and module.startswith(event_loop.resolve_event_loop("auto"))
+
+    # 4. 벤치마크는 사용 가능한 루프마다 프레임 크기별 결과를 낸다.
+    results = bench_event_loops(frame_sizes=(1024, 65536), total_bytes=4 * 1024 * 1024)
+    log(format_bench_results(results))
+    ok = ok and len(results) == 2 * len(event_loop.available_event_loops())
+    ok = ok and all(r.frames_per_sec > 0 and r.mb_per_sec > 0 for r in results)
+
+    if ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9091
+SERVICE_PORT = 9977
+# 로컬 서비스가 요청을 다 받은 뒤 응답하기까지의 지연 (롱 폴링 흉내)
+RESPONSE_DELAY = 1.0
+# 응답이 끝난 뒤 공용 클라이언트가 EOF를 받기까지 허용하는 시간.
+# 예전 브리지는 반대 방향을 10초까지 기다렸으므로 이 값으로 회귀를 구분할 수 있다.
+EOF_DEADLINE = 3.0
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle(reader, writer):
+        try:
+            # 요청 끝(EOF)까지 읽은 뒤에만 응답한다. 반종료가 전달되지 않으면 여기서 멈춘다.
+            request = await reader.read()
+            await asyncio.sleep(RESPONSE_DELAY)
+            writer.write(b"RESPONSE:" + request[::-1])
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def half_close_roundtrip(port: int, request: bytes) -> bool:
+    loop = asyncio.get_running_loop()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(request)
+        await writer.drain()
+        writer.write_eof()
+        started = loop.time()
+        response = await asyncio.wait_for(reader.read(), timeout=RESPONSE_DELAY + EOF_DEADLINE)
+        elapsed = loop.time() - started
+    finally:
+        writer.close()
+    ok = response == b"RESPONSE:" + request[::-1] and elapsed < RESPONSE_DELAY + EOF_DEADLINE
+    log(f">>> [TEST] response={len(response)} bytes, eof after {elapsed:.2f}s, ok={ok}")
+    return ok
+
+async def run_scenario(mux_channels: int, tunnel_port: int) -> bool:
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(SERVER_PORT, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    service = await start_mock_local_service(SERVICE_PORT)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+    )
+    tunnel = TunnelConfig("halfclose", tunnel_port, '127.0.0.1', SERVICE_PORT)
+    client.add_tunnel(tunnel)
+    path = "mux" if mux_channels else "data_channel"
+
+    ok = True
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: len(client.mux_channels) == mux_channels, 5.0)
+
+        log(f">>> [TEST] {path}: request -> write_eof -> delayed response")
+        ok = await half_close_roundtrip(tunnel_port, b"hello half-close" * 1000)
+        ok = await half_close_roundtrip(tunnel_port, os.urandom(300 * 1024)) and ok
+
+        # 두 방향이 모두 EOF로 끝났으므로 서버 브리지도 곧바로 정리되어야 한다.
+        released = await wait_until(
+            lambda: all(not t.active for t in server.metrics.tunnels.values()), EOF_DEADLINE)
+        log(f">>> [TEST] {path}: bridges released={released}")
+        ok = ok and released
+    except Exception as e:
+        log(f">>> [TEST] {path}: error {e!r}")
+        ok = False
+    finally:
+        await client.disconnect()
+        service.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+async def main():
+    mux_ok = await run_scenario(1, 10091)
+    legacy_ok = await run_scenario(0, 10092)
+    if mux_ok and legacy_ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9141
+SERVICE_PORT = 9984
+# 테스트 시간을 줄이기 위해 HEARTBEAT 간격을 짧게 잡는다. (무응답 판정은 간격 x 3)
+HEARTBEAT_INTERVAL = 0.2
+IDLE_SECONDS = 1.5
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data: break
+                writer.write(data)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo(reader, writer, msg: bytes) -> bool:
+    writer.write(msg)
+    await writer.drain()
+    return await asyncio.wait_for(reader.readexactly(len(msg)), timeout=5.0) == msg
+
+async def closed_by_server(reader, timeout_sec: float) -> bool:
+    """서버가 공용 연결을 끊으면 EOF(또는 리셋)를 받는다."""
+    try:
+        return await asyncio.wait_for(reader.read(1), timeout=timeout_sec) == b""
+    except ConnectionError:
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+async def run_case(label: str, server: Server, server_key, client_key, mux_channels: int, tunnel_port: int,
+                   kind: str) -> bool:
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+        data_heartbeat_interval=HEARTBEAT_INTERVAL,
+    )
+    tunnel = TunnelConfig("web", tunnel_port, '127.0.0.1', SERVICE_PORT)
+    client.add_tunnel(tunnel)
+    ok = True
+    writer = None
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel.status == "Open", 5.0)
+        await wait_until(lambda: len(client.mux_channels) == mux_channels, 5.0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', tunnel_port)
+        first = await echo(reader, writer, b"hello")
+
+        # 양쪽이 HEARTBEAT를 주고받는 동안에는 무응답 판정 시간보다 오래 유휴여도 연결이 유지된다.
+        await asyncio.sleep(IDLE_SECONDS)
+        survived = await echo(reader, writer, b"still-alive")
+        heartbeats = client.get_liveness_stats()["heartbeats_sent"]
+        log(f">>> [TEST] {label}: echo={first}, survived {IDLE_SECONDS}s idle={survived}, "
+            f"client heartbeats={heartbeats}, server={server.liveness.snapshot()}")
+        ok = ok and first and survived and heartbeats > 0
+
+        # 클라이언트가 응답하지 않게 만든다. (TCP는 열려 있지만 HEARTBEAT가 오지 않음)
+        before = server.liveness.reaped.get(kind, 0)
+        await client.liveness.stop()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        closed = await closed_by_server(reader, 5.0)
+        elapsed = loop.time() - started
+        reaped = server.liveness.reaped.get(kind, 0) - before
+        log(f">>> [TEST] {label}: public socket closed={closed} after {elapsed:.2f}s, reaped {kind}={reaped}")
+        ok = ok and closed and reaped >= 1 and elapsed < 2.0
+    except Exception as e:
+        log(f">>> [TEST] {label}: error {e!r}")
+        ok = False
+    finally:
+        if writer:
+            writer.close()
+        await client.disconnect()
+    return ok
+
+async def main():
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+    service = await start_mock_local_service(SERVICE_PORT)
+    server = Server(SERVER_PORT, server_key, data_heartbeat_interval=HEARTBEAT_INTERVAL)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    try:
+        data_ok = await run_case("data channel", server, server_key, client_key, 0, 10151, "data_channel")
+        await asyncio.sleep(0.5)
+        mux_ok = await run_case("mux channel", server, server_key, client_key, 1, 10152, "mux_channel")
+        metrics_text = server.metrics.render_prometheus()
+        exported = 'minitcptunnel_liveness_reaped_total{kind="data_channel"}' in metrics_text
+        log(f">>> [TEST] reaped counts exported to /metrics={exported}, snapshot={server.metrics.snapshot()['liveness']}")
+    finally:
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        service.close()
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+
+    if data_ok and mux_ok and exported:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
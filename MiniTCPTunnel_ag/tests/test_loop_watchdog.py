@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import sys
+import os
+import time
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared import loop_watchdog
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9121
+SERVICE_PORT = 9982
+TUNNEL_PORT = 10131
+SLOW_CALLBACK_MS = 50
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data: break
+                writer.write(data)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_once(port: int, payload: bytes) -> bool:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+    try:
+        writer.write(payload)
+        await writer.drain()
+        received = await asyncio.wait_for(reader.readexactly(len(payload)), timeout=5.0)
+        return received == payload
+    finally:
+        writer.close()
+
+def block_loop():
+    # 루프를 막는 동기 작업을 흉내 낸다. (워치독이 느린 콜백으로 잡아야 한다)
+    time.sleep(0.2)
+
+async def main():
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+    service = await start_mock_local_service(SERVICE_PORT)
+
+    server = Server(SERVER_PORT, server_key, loop_watchdog_ms=SLOW_CALLBACK_MS)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+
+    # 같은 프로세스의 두 번째 워치독은 훅 없이 지연만 샘플링한다.
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        loop_watchdog_ms=SLOW_CALLBACK_MS,
+    )
+    tunnel = TunnelConfig("lan", TUNNEL_PORT, '127.0.0.1', SERVICE_PORT)
+    client.add_tunnel(tunnel)
+
+    ok = True
+    try:
+        await client.connect()
+        opened = await wait_until(lambda: tunnel.status == "Open", 5.0)
+        results = await asyncio.gather(*(echo_once(TUNNEL_PORT, os.urandom(64 * 1024)) for _ in range(10)))
+        log(f">>> [TEST] tunnel open={opened}, {sum(results)}/{len(results)} echoes ok")
+        ok = ok and opened and all(results)
+
+        # 출력되는 로그 레코드는 logging 분류로 집계된다.
+        logging.getLogger("LoopWatchdogTest").warning("emitting one record for the logging category")
+
+        asyncio.get_running_loop().call_soon(block_loop)
+        await asyncio.sleep(0.5)
+
+        stats = server.metrics.snapshot().get("event_loop")
+        if stats is None:
+            log(">>> [TEST] metrics snapshot has no event_loop section")
+            ok = False
+        else:
+            slow = [entry for entry in stats["slow_callbacks"] if "block_loop" in entry["callback"]]
+            categories = stats["category_seconds"]
+            log(f">>> [TEST] server lag={stats['lag']}, callbacks={stats['callbacks']}, slow block_loop={len(slow)}")
+            log(f">>> [TEST] server category seconds={categories}")
+            ok = ok and bool(slow) and slow[0]["ms"] >= 150 and stats["lag"]["max_ms"] >= 100
+            ok = ok and all(categories[name] > 0 for name in ("handshake", "crypto", "logging"))
+
+        client_stats = client.get_loop_stats()
+        log(f">>> [TEST] client lag samples={client_stats['lag']['samples']}, "
+            f"hooks owned={client.loop_watchdog.owns_hooks}")
+        ok = ok and client_stats["lag"]["samples"] > 0 and not client.loop_watchdog.owns_hooks
+    except Exception as e:
+        log(f">>> [TEST] error {e!r}")
+        ok = False
+    finally:
+        await client.disconnect()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        service.close()
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+
+    # 워치독이 멈추면 패치한 asyncio/logging 함수가 원래대로 돌아와야 한다.
+    restored = (asyncio.events.Handle._run is loop_watchdog._original_handle_run
+                and logging.Logger._log is loop_watchdog._original_logger_log
+                and loop_watchdog._active is None)
+    log(f">>> [TEST] hooks restored after stop={restored}")
+    ok = ok and restored
+
+    if ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
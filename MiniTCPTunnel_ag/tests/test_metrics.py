@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server, client_id
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9081
+METRICS_PORT = 9181
+ECHO_PORT = 9976
+CLIENT_ID = ""
+TEXT = b"GET /index.html HTTP/1.1\r\nHost: example\r\n\r\n" * 100
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data: break
+                writer.write(data)
+                await writer.drain()
+        except:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def http_get(path: str) -> str:
+    reader, writer = await asyncio.open_connection('127.0.0.1', METRICS_PORT)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200"), head
+    return body.decode()
+
+async def echo_roundtrip(port: int, data: bytes):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(data)
+    await writer.drain()
+    received = await asyncio.wait_for(reader.readexactly(len(data)), timeout=5.0)
+    return reader, writer, received == data
+
+async def run_scenario(mux_channels: int, web_port: int, raw_port: int) -> bool:
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+    # 지표는 (클라이언트, 터널)별로 집계되며 클라이언트는 공개키의 짧은 hex로 표시된다.
+    global CLIENT_ID
+    CLIENT_ID = client_id(client_key.verify_key.encode())
+
+    server = Server(SERVER_PORT, server_key, metrics_port=METRICS_PORT)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    mock = await start_mock_local_service(ECHO_PORT)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+    )
+    web = TunnelConfig("web", web_port, '127.0.0.1', ECHO_PORT, compression="always")
+    raw = TunnelConfig("raw", raw_port, '127.0.0.1', ECHO_PORT, compression="never")
+    client.add_tunnel(web)
+    client.add_tunnel(raw)
+    path = "mux" if mux_channels else "data_channel"
+
+    ok = True
+    try:
+        await client.connect()
+        await wait_until(lambda: web.tid in client.running_tunnels and raw.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: len(client.mux_channels) == mux_channels, 5.0)
+
+        # 1. 연결이 열려 있는 동안에도 활성 브리지와 연결별 카운터가 보인다.
+        reader, writer, same = await echo_roundtrip(web_port, TEXT)
+        ok = ok and same
+        connections = json.loads(await http_get("/connections"))
+        live = [c for c in connections if c["tunnel_id"] == "web" and c["client"] == CLIENT_ID]
+        live_ok = len(live) == 1 and live[0]["path"] == path and live[0]["public_to_client_bytes"] == len(TEXT)
+        log(f">>> [TEST] {path}: live connection visible={live_ok}")
+        ok = ok and live_ok
+        writer.close()
+
+        for _ in range(3):
+            _, w, same = await echo_roundtrip(raw_port, os.urandom(32 * 1024))
+            ok = ok and same
+            w.close()
+        # 공용 소켓을 닫으면 반종료가 로컬 서비스까지 전달되어 브리지가 곧바로 정리된다.
+        await wait_until(lambda: all(not t.active for t in server.metrics.tunnels.values()), 5.0)
+
+        # 2. 종료 후에는 터널별 누적값으로 합산된다.
+        snapshot = json.loads(await http_get("/metrics.json"))
+        tunnels = snapshot["clients"][CLIENT_ID]
+        web_m = tunnels["web"]
+        raw_m = tunnels["raw"]
+        totals_ok = (web_m["bytes"]["public_to_client"] == len(TEXT)
+                     and web_m["bytes"]["client_to_public"] == len(TEXT)
+                     and raw_m["bytes"]["public_to_client"] == 3 * 32 * 1024
+                     and raw_m["bridges_total"] == 3 and raw_m["active_bridges"] == 0
+                     and web_m["pairing_wait_seconds"][path]["count"] == 1)
+        ratio_ok = web_m["compression_ratio"] < 0.5 and raw_m["compression_ratio"] == 1.0
+        log(f">>> [TEST] {path}: totals={totals_ok}, web_ratio={web_m['compression_ratio']}, raw_ratio={raw_m['compression_ratio']}")
+        ok = ok and totals_ok and ratio_ok
+
+        # 3. Prometheus 텍스트에는 터널 라벨이 붙은 카운터와 핸드셰이크 히스토그램이 있다.
+        text = await http_get("/metrics")
+        prom_ok = (f'minitcptunnel_bytes_total{{client="{CLIENT_ID}",tunnel="raw",direction="public_to_client"}} 98304' in text
+                   and f'minitcptunnel_active_bridges{{client="{CLIENT_ID}",tunnel="web"}} 0' in text
+                   and 'minitcptunnel_handshake_duration_seconds_count{kind="full"}' in text
+                   and f'minitcptunnel_pairing_wait_seconds_count{{client="{CLIENT_ID}",tunnel="web",path="{path}"}} 1' in text)
+        log(f">>> [TEST] {path}: prometheus text ok={prom_ok}")
+        ok = ok and prom_ok
+
+        # 4. 닫힌 터널의 지표는 남은 브리지가 끝난 뒤 지워지고, 제어 세션이 끝나면 모두 지워진다.
+        _, w, same = await echo_roundtrip(raw_port, TEXT)
+        ok = ok and same
+        await client.request_close_tunnel(raw)
+        await wait_until(lambda: server.metrics.tunnels.get((CLIENT_ID, "raw")) is not None
+                         and server.metrics.tunnels[(CLIENT_ID, "raw")].retired, 5.0)
+        kept = (CLIENT_ID, "raw") in server.metrics.tunnels
+        w.close()
+        await wait_until(lambda: (CLIENT_ID, "raw") not in server.metrics.tunnels, 5.0)
+        dropped = (CLIENT_ID, "raw") not in server.metrics.tunnels
+        await client.disconnect()
+        await wait_until(lambda: not server.metrics.tunnels, 5.0)
+        prune_ok = kept and dropped and not server.metrics.tunnels
+        log(f">>> [TEST] {path}: pruned kept_while_active={kept}, dropped={dropped}, empty={not server.metrics.tunnels}")
+        ok = ok and prune_ok
+    except Exception as e:
+        log(f">>> [TEST] {path}: error {e!r}")
+        ok = False
+    finally:
+        await client.disconnect()
+        mock.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+async def main():
+    mux_ok = await run_scenario(1, 10081, 10082)
+    legacy_ok = await run_scenario(0, 10083, 10084)
+    if mux_ok and legacy_ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
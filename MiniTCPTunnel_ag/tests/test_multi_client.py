@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.cluster import cluster_supported, run_cluster
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9101
+CLUSTER_PORT = 9102
+WORKERS = 2
+# 클라이언트마다 다른 로컬 서비스 (응답 접두어로 어느 클라이언트를 거쳤는지 구분한다)
+SERVICES = {"alpha": 9978, "beta": 9979, "gamma": 9980}
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(name: str, port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data: break
+                writer.write(f"{name}:".encode() + data)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_once(port: int, name: str, index: int) -> bool:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+    try:
+        msg = f"HELLO-{index}".encode()
+        writer.write(msg)
+        await writer.drain()
+        resp = await asyncio.wait_for(reader.read(100), timeout=5.0)
+        return resp == f"{name}:".encode() + msg
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+def make_client(server_port: int, server_key, client_key, mux_channels: int) -> ControlClient:
+    return ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+    )
+
+async def run_clients(label: str, server_port: int, server_key, client_keys, base_port: int) -> bool:
+    """
+    클라이언트 여러 개가 동시에 접속해 같은 터널 ID("web")를 각자 다른 포트로 연다.
+    연결이 자기 클라이언트의 로컬 서비스로만 전달되는지 확인한다.
+    """
+    clients = {}
+    tunnels = {}
+    # 다중화 채널 경로와 연결별 데이터 채널(페어링) 경로를 함께 쓴다.
+    for i, name in enumerate(SERVICES):
+        client = make_client(server_port, server_key, client_keys[name], mux_channels=i % 2)
+        tunnel = TunnelConfig("web", base_port + i, '127.0.0.1', SERVICES[name])
+        client.add_tunnel(tunnel)
+        clients[name], tunnels[name] = client, tunnel
+
+    ok = True
+    try:
+        await asyncio.gather(*(c.connect() for c in clients.values()))
+        opened = await wait_until(lambda: all(t.status == "Open" for t in tunnels.values()), 10.0)
+        await wait_until(lambda: all(len(c.mux_channels) == c.mux_channel_count for c in clients.values()), 5.0)
+        # 워커 모드에서는 다른 워커들이 같은 포트를 열 시간을 준다.
+        await asyncio.sleep(0.5)
+        log(f">>> [TEST] {label}: {len(clients)} clients connected, tunnels open={opened}")
+        ok = ok and opened
+
+        jobs = [echo_once(base_port + i, name, n) for i, name in enumerate(SERVICES) for n in range(10)]
+        results = await asyncio.gather(*jobs, return_exceptions=True)
+        echoed = sum(r is True for r in results)
+        log(f">>> [TEST] {label}: {echoed}/{len(jobs)} routed to the right client")
+        ok = ok and echoed == len(jobs)
+
+        # 같은 클라이언트 키로 두 번째 제어 세션은 거부되고, 기존 세션은 영향을 받지 않는다.
+        duplicate = make_client(server_port, server_key, client_keys["alpha"], mux_channels=0)
+        await duplicate.connect()
+        rejected = not await wait_until(lambda: duplicate.session_hmac_key is not None, 2.0)
+        await duplicate.disconnect()
+        still_ok = await echo_once(base_port, "alpha", 99)
+        log(f">>> [TEST] {label}: duplicate session rejected={rejected}, original still works={still_ok}")
+        ok = ok and rejected and still_ok
+
+        # 한 클라이언트가 끊어도 다른 클라이언트의 터널은 유지된다.
+        await clients["beta"].disconnect()
+        await asyncio.sleep(0.5)
+        others_ok = (await echo_once(base_port, "alpha", 100)) and (await echo_once(base_port + 2, "gamma", 100))
+        log(f">>> [TEST] {label}: other clients unaffected by disconnect={others_ok}")
+        ok = ok and others_ok
+    except Exception as e:
+        log(f">>> [TEST] {label}: error {e!r}")
+        ok = False
+    finally:
+        for client in clients.values():
+            await client.disconnect()
+    return ok
+
+async def main():
+    server_key = generate_identity_key()
+    client_keys = {name: generate_identity_key() for name in SERVICES}
+    for key in client_keys.values():
+        ALLOWED_CLIENT_KEYS.append(key.verify_key.encode())
+    services = [await start_mock_local_service(name, port) for name, port in SERVICES.items()]
+
+    server = Server(SERVER_PORT, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    try:
+        single_ok = await run_clients("single process", SERVER_PORT, server_key, client_keys, 10101)
+    finally:
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+
+    cluster_ok = True
+    if cluster_supported():
+        # fork로 띄운 워커들이 허용 키 목록을 그대로 물려받는다.
+        ctx = multiprocessing.get_context("fork")
+        cluster = ctx.Process(
+            target=run_cluster,
+            args=(WORKERS, lambda link: Server(CLUSTER_PORT, server_key, cluster=link)),
+        )
+        cluster.start()
+        await asyncio.sleep(1.0)
+        try:
+            cluster_ok = await run_clients(f"workers={WORKERS}", CLUSTER_PORT, server_key, client_keys, 10111)
+        finally:
+            cluster.terminate()
+            cluster.join(timeout=5)
+
+    for service in services:
+        service.close()
+    if single_ok and cluster_ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,345 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared.constants import STREAM_WINDOW, MAX_STREAMS_PER_CHANNEL, MsgType
+from mini_tcp_tunnel.shared.framing import FrameCodec, MSG_HEADER
+from mini_tcp_tunnel.shared.mux import MuxChannel
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(100)
+                if not data: break
+                writer.write(b"ECHO:" + data)
+                await writer.drain()
+        except:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_once(port: int, index: int) -> bool:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+    try:
+        msg = f"HELLO-{index}".encode()
+        writer.write(msg)
+        await writer.drain()
+        resp = await asyncio.wait_for(reader.read(100), timeout=5.0)
+        return resp == b"ECHO:" + msg
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def run_scenario(server_port: int, tunnel_port: int, echo_port: int, mux_channels: int, data_pool_size: int = 0) -> bool:
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(server_port, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    mock = await start_mock_local_service(echo_port)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=mux_channels,
+        data_pool_size=data_pool_size,
+    )
+    tunnel_cfg = TunnelConfig("mux-test", tunnel_port, '127.0.0.1', echo_port)
+    client.add_tunnel(tunnel_cfg)
+
+    ok = False
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel_cfg.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: len(client.mux_channels) == mux_channels, 5.0)
+        await wait_until(lambda: server.active_session and len(server.active_session.mux_channels) == mux_channels, 5.0)
+        await wait_until(lambda: len(client.data_pool.idle) == data_pool_size, 5.0)
+
+        # 동시에 여러 연결을 열어 스트림이 섞이지 않는지 확인한다.
+        results = await asyncio.gather(*(echo_once(tunnel_port, i) for i in range(20)), return_exceptions=True)
+        ok = all(r is True for r in results)
+        log(f">>> [TEST] mux_channels={mux_channels}: {sum(r is True for r in results)}/20 echoed")
+
+        # 다중화 모드에서는 외부 연결마다 데이터 채널을 만들지 않으므로 pending이 비어 있어야 한다.
+        if mux_channels > 0 and server.active_session.pairer.pending:
+            log(">>> [TEST] FAIL: legacy pairing used while mux channels were available")
+            ok = False
+        # 풀을 켠 경우에는 미리 만들어 둔 채널이 최소 한 번은 사용되어야 한다.
+        if data_pool_size > 0:
+            stats = client.get_data_pool_stats()
+            log(f">>> [TEST] data pool stats: {stats}")
+            if stats["hits"] == 0:
+                ok = False
+    finally:
+        await client.disconnect()
+        mock.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+BLAST_SIZE = 8 * 1024 * 1024
+
+async def start_blast_service(port: int):
+    """요청을 받으면 대용량 응답을 쏟아내는 로컬 서비스 (느린 외부 소비자 시나리오용)"""
+    async def handle(reader, writer):
+        try:
+            await reader.read(100)
+            chunk = b"B" * 65536
+            for _ in range(BLAST_SIZE // len(chunk)):
+                writer.write(chunk)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', port)
+
+async def run_slow_reader_scenario(server_port: int, tunnel_port: int, svc_port: int) -> bool:
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(server_port, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    svc = await start_blast_service(svc_port)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=1,
+    )
+    tunnel_cfg = TunnelConfig("mux-slow", tunnel_port, '127.0.0.1', svc_port)
+    client.add_tunnel(tunnel_cfg)
+
+    ok = False
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel_cfg.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: server.active_session and len(server.active_session.mux_channels) == 1, 5.0)
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', tunnel_port)
+        writer.write(b"GO")
+        await writer.drain()
+
+        # 외부 소비자가 읽지 않는 동안 서버 스트림 버퍼는 윈도우를 넘지 않아야 한다.
+        peak = 0
+        for _ in range(15):
+            await asyncio.sleep(0.1)
+            for channel in server.active_session.mux_channels:
+                for stream in channel.streams.values():
+                    peak = max(peak, stream.buffered)
+        # 그동안 같은 채널의 다른 스트림은 정상 동작해야 한다.
+        other_ok = await echo_probe(client, server, tunnel_port)
+
+        received = 0
+        while received < BLAST_SIZE:
+            data = await asyncio.wait_for(reader.read(65536), timeout=10.0)
+            if not data: break
+            received += len(data)
+        writer.close()
+        ok = peak <= STREAM_WINDOW and received == BLAST_SIZE and other_ok
+        log(f">>> [TEST] slow reader: peak_buffered={peak} (window={STREAM_WINDOW}), "
+            f"received={received}/{BLAST_SIZE}, other_stream_ok={other_ok}")
+    finally:
+        await client.disconnect()
+        svc.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+async def echo_probe(client, server, tunnel_port: int) -> bool:
+    # 블라스트 서비스는 "GO" 한 번만 읽으므로, 응답 첫 바이트가 도착하는지만 확인한다.
+    reader, writer = await asyncio.open_connection('127.0.0.1', tunnel_port)
+    try:
+        writer.write(b"GO")
+        await writer.drain()
+        data = await asyncio.wait_for(reader.read(10), timeout=5.0)
+        return data.startswith(b"B")
+    except Exception:
+        return False
+    finally:
+        writer.close()
+
+async def run_stream_limit_scenario(port: int) -> bool:
+    """
+    상한을 넘는 STREAM_OPEN은 STREAM_CLOSE로 거절되고, 수신측 스트림 수는 상한에서 멈춰야 한다.
+    거절 응답을 보내는 쪽이 막혀 있어도 다른 스트림의 프레임은 계속 읽혀야 한다.
+    """
+    accepted = asyncio.Queue()
+    finished = asyncio.Event()
+
+    async def on_stream_open(stream, payload):
+        pass
+
+    async def handle(reader, writer):
+        channel = MuxChannel(FrameCodec(reader, writer), "limit", on_stream_open=on_stream_open)
+        await accepted.put(channel)
+        try:
+            await channel.run()
+        finally:
+            finished.set()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', port)
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    peer = FrameCodec(reader, writer)
+    extra = 3
+    try:
+        channel = await asyncio.wait_for(accepted.get(), timeout=2.0)
+        # 송신 버퍼가 가득 찬 상황처럼 STREAM_CLOSE 전송을 붙잡아 둔다.
+        gate = asyncio.Event()
+        send_control = channel.send_control
+
+        async def blocked_send_control(*args):
+            await gate.wait()
+            await send_control(*args)
+
+        channel.send_control = blocked_send_control
+        for sid in range(1, MAX_STREAMS_PER_CHANNEL + extra + 1):
+            await peer.write_message(MsgType.STREAM_OPEN, sid, b"")
+        await peer.write_message(MsgType.DATA, 1, b"x")
+        read_ok = await wait_until(lambda: 1 in channel.streams and channel.streams[1].buffered == 1, 2.0, 0.01)
+        gate.set()
+        rejected = []
+        while len(rejected) < extra:
+            data = await asyncio.wait_for(peer.read_frame(), timeout=5.0)
+            msg_type, _, stream_id = MSG_HEADER.unpack_from(data)
+            if msg_type == MsgType.STREAM_CLOSE:
+                rejected.append(stream_id)
+        expected = list(range(MAX_STREAMS_PER_CHANNEL + 1, MAX_STREAMS_PER_CHANNEL + extra + 1))
+        log(f">>> [TEST] stream limit: active={channel.active_streams}, rejected={rejected}, read_while_blocked={read_ok}")
+        return channel.active_streams == MAX_STREAMS_PER_CHANNEL and rejected == expected and read_ok
+    except Exception as e:
+        log(f">>> [TEST] stream limit: error {e!r}")
+        return False
+    finally:
+        writer.close()
+        # 상대가 끊으면 채널도 정리되고 끝나야 한다.
+        await asyncio.wait_for(finished.wait(), timeout=5.0)
+        server.close()
+
+async def run_pool_recovery_scenario(server_port: int, tunnel_port: int, echo_port: int) -> bool:
+    """풀 채널이 죽어 있으면 새 채널로 한 번 다시 시도하고, 오래 쉰 풀 채널은 쓰지 않아야 한다."""
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(server_port, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    mock = await start_mock_local_service(echo_port)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=server_port,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=0,
+        data_pool_size=2,
+    )
+    tunnel_cfg = TunnelConfig("pool-test", tunnel_port, '127.0.0.1', echo_port)
+    client.add_tunnel(tunnel_cfg)
+    pool = client.data_pool
+
+    async def dead_write(*args, **kwargs):
+        raise ConnectionResetError("simulated dead link")
+
+    ok = False
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel_cfg.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: len(pool.idle) == pool.size, 5.0)
+
+        # 1. NAT가 조용히 끊은 채널처럼 첫 쓰기가 실패해도 외부 연결은 새 채널로 처리된다.
+        for codec, _ in pool.idle:
+            codec.write_frame = dead_write
+        stale_ok = await echo_once(tunnel_port, 0) and pool.stale == 1
+
+        # 2. max_idle보다 오래 쉰 채널은 꺼내 주지 않고 버린다.
+        await wait_until(lambda: len(pool.idle) == pool.size, 5.0)
+        for codec, _ in pool.idle:
+            codec.write_frame = dead_write
+        pool.max_idle = 0.2
+        await asyncio.sleep(0.3)
+        expired_ok = await echo_once(tunnel_port, 1) and pool.expired >= pool.size and pool.stale == 1
+
+        ok = stale_ok and expired_ok
+        log(f">>> [TEST] data pool recovery: stale_ok={stale_ok}, expired_ok={expired_ok}, stats={pool.get_stats()}")
+    finally:
+        await client.disconnect()
+        mock.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+async def main():
+    mux_ok = await run_scenario(9031, 10031, 9985, mux_channels=2)
+    legacy_ok = await run_scenario(9032, 10032, 9986, mux_channels=0)
+    pool_ok = await run_scenario(9033, 10033, 9987, mux_channels=0, data_pool_size=4)
+    flow_ok = await run_slow_reader_scenario(9034, 10034, 9988)
+    limit_ok = await run_stream_limit_scenario(9035)
+    recovery_ok = await run_pool_recovery_scenario(9036, 10036, 9989)
+    if mux_ok and legacy_ok and pool_ok and flow_ok and limit_ok and recovery_ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
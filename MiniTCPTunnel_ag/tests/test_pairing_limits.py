@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import ConnectionPairer
+
+# 거절/만료 경고가 많이 찍히므로 오류만 출력한다.
+logging.basicConfig(level=logging.ERROR, format="%(name)s: %(message)s", stream=sys.stdout)
+
+def log(msg):
+    print(msg, flush=True)
+
+class FakeCodec:
+    pass
+
+async def test_cap_and_fulfill() -> bool:
+    pairer = ConnectionPairer(max_pending_per_tunnel=3, timeout=5.0)
+    futures = [pairer.prepare(f"web-{i}", "web") for i in range(3)]
+    # 상한에 도달한 터널은 바로 거절하고, 다른 터널은 영향을 받지 않는다.
+    rejected = pairer.prepare("web-3", "web") is None
+    other = pairer.prepare("ssh-0", "ssh") is not None
+
+    codec = FakeCodec()
+    matched = pairer.fulfill("web-1", codec) and futures[1].result() is codec
+    # 자리가 비면 다시 받을 수 있다.
+    reopened = pairer.prepare("web-4", "web") is not None
+    # 만료/미등록 conn_id는 False를 돌려주고 codec 정리는 호출자가 한다.
+    unknown = not pairer.fulfill("nope", FakeCodec())
+
+    pairer.cancel("web-0")
+    cancelled = futures[0].cancelled() and pairer.pending_per_tunnel["web"] == 2
+    ok = rejected and other and matched and reopened and unknown and cancelled
+    log(f">>> [TEST] cap: rejected={rejected}, other_tunnel={other}, matched={matched}, "
+        f"reopened={reopened}, unknown={unknown}, cancelled={cancelled}")
+    return ok
+
+async def test_expiry() -> bool:
+    pairer = ConnectionPairer(max_pending_per_tunnel=100, timeout=0.2)
+    early = [pairer.prepare(f"a-{i}", "web") for i in range(50)]
+    await asyncio.sleep(0.1)
+    late = [pairer.prepare(f"b-{i}", "web") for i in range(50)]
+    await asyncio.sleep(0.15)
+    # 먼저 등록한 항목만 만료되고, 나중 항목은 아직 대기 중이어야 한다.
+    first_wave = (all(isinstance(f.exception(), asyncio.TimeoutError) for f in early)
+                  and not any(f.done() for f in late))
+    await asyncio.sleep(0.15)
+    second_wave = all(f.done() and isinstance(f.exception(), asyncio.TimeoutError) for f in late)
+    empty = not pairer.pending and not pairer.pending_per_tunnel and pairer._expiry_timer is None
+    ok = first_wave and second_wave and empty
+    log(f">>> [TEST] expiry: first_wave={first_wave}, second_wave={second_wave}, empty={empty}")
+    return ok
+
+async def test_flood() -> bool:
+    loop = asyncio.get_running_loop()
+    pairer = ConnectionPairer(max_pending_per_tunnel=256, timeout=10.0)
+    start = loop.time()
+    accepted = 0
+    for i in range(100000):
+        if pairer.prepare(f"flood-{i}", "web") is not None:
+            accepted += 1
+    elapsed = loop.time() - start
+    # 대기 항목과 만료 힙은 상한을 넘지 않고, 만료 타이머는 하나만 쓴다.
+    bounded = accepted == 256 and len(pairer.pending) == 256 and len(pairer._deadlines) == 256
+
+    # 빠르게 매칭되는 경우에도 지연 삭제된 힙 항목이 무한히 쌓이지 않는다.
+    for i in range(256):
+        pairer.fulfill(f"flood-{i}", FakeCodec())
+    for i in range(10000):
+        pairer.prepare(f"fast-{i}", "web")
+        pairer.fulfill(f"fast-{i}", FakeCodec())
+    compacted = len(pairer._deadlines) <= 2 * len(pairer.pending) + 64
+    ok = bounded and compacted
+    log(f">>> [TEST] flood: accepted={accepted} in {elapsed:.3f}s, bounded={bounded}, heap={len(pairer._deadlines)}")
+    return ok
+
+async def main():
+    results = [await test_cap_and_fulfill(), await test_expiry(), await test_flood()]
+    if all(results):
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
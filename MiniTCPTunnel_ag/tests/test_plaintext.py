@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import multiprocessing
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server, client_id
+from mini_tcp_tunnel.server.cluster import cluster_supported, run_cluster
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared.raw_relay import splice_supported
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9111
+CLUSTER_PORT = 9112
+SERVICE_PORT = 9981
+WORKERS = 2
+BULK_SIZE = 8 * 1024 * 1024
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        # EOF를 받을 때까지 그대로 돌려주고, 송신 방향을 닫아 반종료가 거꾸로도 전달되는지 본다.
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data: break
+                writer.write(data)
+                await writer.drain()
+            writer.write_eof()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_until_eof(port: int, data: bytes) -> bool:
+    """data를 보내고 write_eof한 뒤, EOF까지 받은 응답이 원본과 같은지 확인한다."""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+    try:
+        async def send():
+            writer.write(data)
+            await writer.drain()
+            writer.write_eof()
+        sender = asyncio.create_task(send())
+        received = await asyncio.wait_for(reader.read(), timeout=20.0)
+        await sender
+        return received == data
+    finally:
+        writer.close()
+
+def active_paths(server: Server, client_key, tid: str):
+    metrics = server.metrics.tunnels.get((client_id(client_key.verify_key.encode()), tid))
+    return [conn.path for conn in metrics.active] if metrics else []
+
+async def run_single(allow_plaintext: bool, tunnel_port: int) -> bool:
+    label = "allowed" if allow_plaintext else "not allowed"
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(SERVER_PORT, server_key, allow_plaintext=allow_plaintext)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+
+    # 다중화 채널이 있어도 평문 터널은 1:1 데이터 채널로 가야 한다.
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=1,
+    )
+    tunnel = TunnelConfig("lan", tunnel_port, '127.0.0.1', SERVICE_PORT, plaintext=True)
+    client.add_tunnel(tunnel)
+
+    ok = True
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel.status == "Open", 5.0)
+        await wait_until(lambda: len(client.mux_channels) == 1, 5.0)
+
+        # 연결 하나를 열어 둔 채로 서버가 어떤 경로로 브리지하는지 확인한다.
+        reader, writer = await asyncio.open_connection('127.0.0.1', tunnel_port)
+        writer.write(b"ping")
+        await writer.drain()
+        pong = await asyncio.wait_for(reader.readexactly(4), timeout=5.0)
+        paths = active_paths(server, client_key, "lan")
+        writer.close()
+        expected = "plaintext" if allow_plaintext else "mux"
+        log(f">>> [TEST] {label}: echo={pong == b'ping'}, bridge paths={paths}")
+        ok = ok and pong == b"ping" and paths == [expected]
+
+        payload = os.urandom(BULK_SIZE)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        bulk_ok = await echo_until_eof(tunnel_port, payload)
+        elapsed = loop.time() - started
+        log(f">>> [TEST] {label}: {BULK_SIZE // (1024 * 1024)} MiB echo + half-close ok={bulk_ok} in {elapsed:.2f}s")
+        ok = ok and bulk_ok
+
+        small = await asyncio.gather(*(echo_until_eof(tunnel_port, f"conn-{i}".encode() * 100) for i in range(20)))
+        log(f">>> [TEST] {label}: {sum(small)}/{len(small)} concurrent connections ok")
+        ok = ok and all(small)
+
+        if allow_plaintext:
+            # 평문 중계는 프레임 헤더가 없으므로 서버가 센 바이트가 실제 페이로드와 정확히 같다.
+            released = await wait_until(lambda: not active_paths(server, client_key, "lan"), 3.0)
+            snapshot = server.metrics.tunnels[(client_id(client_key.verify_key.encode()), "lan")].snapshot()
+            log(f">>> [TEST] {label}: released={released}, bytes={snapshot['bytes']}")
+            ok = ok and released and snapshot["bytes"]["client_to_public"] >= BULK_SIZE
+    except Exception as e:
+        log(f">>> [TEST] {label}: error {e!r}")
+        ok = False
+    finally:
+        await client.disconnect()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+    return ok
+
+async def run_workers(tunnel_port: int) -> bool:
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+    ctx = multiprocessing.get_context("fork")
+    cluster = ctx.Process(
+        target=run_cluster,
+        args=(WORKERS, lambda link: Server(CLUSTER_PORT, server_key, cluster=link, allow_plaintext=True)),
+    )
+    cluster.start()
+    await asyncio.sleep(1.0)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=CLUSTER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=1,
+    )
+    tunnel = TunnelConfig("lan", tunnel_port, '127.0.0.1', SERVICE_PORT, plaintext=True)
+    client.add_tunnel(tunnel)
+    ok = True
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel.status == "Open", 5.0)
+        await asyncio.sleep(0.5)
+        # 다른 워커가 받은 공용 연결은 브로커를 거쳐 데이터 채널을 받은 워커에서 평문 중계된다.
+        results = await asyncio.gather(*(echo_until_eof(tunnel_port, os.urandom(256 * 1024)) for _ in range(20)),
+                                       return_exceptions=True)
+        passed = sum(r is True for r in results)
+        log(f">>> [TEST] workers={WORKERS}: {passed}/{len(results)} plaintext connections ok")
+        ok = passed == len(results)
+    except Exception as e:
+        log(f">>> [TEST] workers={WORKERS}: error {e!r}")
+        ok = False
+    finally:
+        await client.disconnect()
+        cluster.terminate()
+        cluster.join(timeout=5)
+    return ok
+
+async def main():
+    log(f">>> [TEST] splice supported={splice_supported()}")
+    service = await start_mock_local_service(SERVICE_PORT)
+    try:
+        allowed_ok = await run_single(True, 10121)
+        # 서버가 허용하지 않으면 평문 요청은 무시되고 암호화 경로(다중화 스트림)로 동작한다.
+        denied_ok = await run_single(False, 10122)
+        cluster_ok = await run_workers(10123) if cluster_supported() else True
+    finally:
+        service.close()
+    if allowed_ok and denied_ok and cluster_ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
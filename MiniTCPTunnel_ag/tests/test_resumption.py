@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9071
+TUNNEL_PORT = 10071
+ECHO_PORT = 9975
+MUX_CHANNELS = 2
+
+def log(msg):
+    print(msg, flush=True)
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(100)
+                if not data: break
+                writer.write(b"ECHO:" + data)
+                await writer.drain()
+        except:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_once(port: int) -> bool:
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+        try:
+            writer.write(b"PING")
+            await writer.drain()
+            return await asyncio.wait_for(reader.read(100), timeout=5.0) == b"ECHO:PING"
+        finally:
+            writer.close()
+    except Exception:
+        return False
+
+async def flap_and_wait(client: ControlClient, server: Server, tunnel_cfg: TunnelConfig) -> bool:
+    """제어 연결을 강제로 끊어(모바일 링크 단절 흉내) 재연결과 터널 복구를 기다린다."""
+    old_codec = client.codec
+    old_codec.writer.close()
+    await wait_until(lambda: client.codec is not old_codec, 5.0)
+    return await wait_until(
+        lambda: client.is_connected and tunnel_cfg.tid in client.running_tunnels
+        and server.active_session is not None and len(server.active_session.mux_channels) == MUX_CHANNELS
+        and len(client.mux_channels) == MUX_CHANNELS,
+        15.0)
+
+async def main():
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+
+    server = Server(SERVER_PORT, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+    mock = await start_mock_local_service(ECHO_PORT)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=MUX_CHANNELS,
+    )
+    tunnel_cfg = TunnelConfig("resume-test", TUNNEL_PORT, '127.0.0.1', ECHO_PORT)
+    client.add_tunnel(tunnel_cfg)
+    stats = server.handshake_stats
+
+    ok = True
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel_cfg.tid in client.running_tunnels, 5.0)
+        await wait_until(lambda: len(client.mux_channels) == MUX_CHANNELS, 5.0)
+
+        # 1. 최초 제어 연결만 전체 핸드셰이크, AUTH_OK 이후의 다중화 채널은 티켓으로 재개한다.
+        step_ok = client.session_ticket is not None and stats["full"] == 1 and stats["resumed"] == MUX_CHANNELS
+        step_ok = step_ok and await echo_once(TUNNEL_PORT)
+        log(f">>> [TEST] initial connect: stats={stats}, ticket={client.session_ticket is not None}, ok={step_ok}")
+        ok = ok and step_ok
+
+        # 2. 제어 연결이 끊기면 재연결(제어 + 다중화 채널)이 모두 전체 핸드셰이크 없이 이루어진다.
+        before = dict(stats)
+        recovered = await flap_and_wait(client, server, tunnel_cfg)
+        step_ok = recovered and stats["full"] == before["full"] and stats["resumed"] >= before["resumed"] + 1 + MUX_CHANNELS
+        step_ok = step_ok and await echo_once(TUNNEL_PORT)
+        log(f">>> [TEST] reconnect with ticket: stats={stats}, ok={step_ok}")
+        ok = ok and step_ok
+
+        # 3. 변조된 티켓은 거절되고, 같은 연결에서 전체 핸드셰이크로 대체된 뒤 새 티켓을 받는다.
+        before = dict(stats)
+        ticket = bytearray(client.session_ticket.ticket)
+        ticket[20] ^= 0xFF
+        client.session_ticket.ticket = bytes(ticket)
+        recovered = await flap_and_wait(client, server, tunnel_cfg)
+        step_ok = recovered and stats["ticket_rejected"] >= before["ticket_rejected"] + 1 and stats["full"] >= before["full"] + 1
+        step_ok = step_ok and client.session_ticket is not None and client.session_ticket.ticket != bytes(ticket)
+        step_ok = step_ok and await echo_once(TUNNEL_PORT)
+        log(f">>> [TEST] tampered ticket fallback: stats={stats}, ok={step_ok}")
+        ok = ok and step_ok
+
+        # 4. 티켓 키를 교체해도 직전 키로 발급한 티켓은 한 주기 동안 재개에 쓸 수 있고,
+        #    한 번 더 교체하면 더 이상 열리지 않는다.
+        before = dict(stats)
+        old_ticket = client.session_ticket.ticket
+        server.ticket_keys.rotate()
+        recovered = await flap_and_wait(client, server, tunnel_cfg)
+        step_ok = recovered and stats["full"] == before["full"] and client.session_ticket.ticket != old_ticket
+        server.ticket_keys.rotate()
+        step_ok = step_ok and server.ticket_keys.open(old_ticket) is None
+        step_ok = step_ok and server.ticket_keys.open(client.session_ticket.ticket) is not None
+        log(f">>> [TEST] ticket key rotation: stats={stats}, ok={step_ok}")
+        ok = ok and step_ok
+
+        # 5. 화이트리스트에서 제거된 클라이언트는 유효한 티켓이 있어도 재개할 수 없다.
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+        codec = await client._open_data_codec()
+        step_ok = codec is None
+        if codec:
+            await codec.close()
+        ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+        log(f">>> [TEST] revoked client cannot resume: ok={step_ok}")
+        ok = ok and step_ok
+    finally:
+        await client.disconnect()
+        mock.close()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+
+    if ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
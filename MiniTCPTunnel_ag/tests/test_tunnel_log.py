@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Windows 기본 인코딩(cp949)로 출력되면 로그가 깨질 수 있으므로,
+# stdout/stderr를 UTF-8로 재설정해 리다이렉션 파일도 UTF-8로 저장되게 한다.
+try:
+    sys.stdout.reconfigure(encoding="utf-8")
+    sys.stderr.reconfigure(encoding="utf-8")
+except Exception:
+    # 일부 환경에서는 reconfigure가 없을 수 있으니 안전하게 무시한다.
+    pass
+
+# Path hack
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from mini_tcp_tunnel.server.core import Server
+from mini_tcp_tunnel.server.protocol import ALLOWED_CLIENT_KEYS
+from mini_tcp_tunnel.client.core import ControlClient, TunnelConfig
+from mini_tcp_tunnel.shared.crypto_utils import generate_identity_key
+from mini_tcp_tunnel.shared.tunnel_log import TunnelLog, TunnelEvent, configure_log_sampling, event_counts
+
+logging.basicConfig(level=logging.WARNING, format="%(name)s: %(message)s", stream=sys.stdout)
+
+SERVER_PORT = 9131
+SERVICE_PORT = 9983
+TUNNEL_PORT = 10141
+CONNECTIONS = 20
+SAMPLE_EVERY = 5
+
+def log(msg):
+    print(msg, flush=True)
+
+class RecordCollector(logging.Handler):
+    """출력된 로그 레코드를 모아 샘플링 결과를 확인한다."""
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+class FormatCounter:
+    """문자열로 바뀐 횟수를 센다. (출력되지 않는 로그가 포맷팅을 하는지 확인용)"""
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "formatted"
+
+async def start_mock_local_service(port: int):
+    async def handle_echo(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data: break
+                writer.write(data)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+    return await asyncio.start_server(handle_echo, '127.0.0.1', port)
+
+async def wait_until(predicate, timeout_sec, interval_sec=0.1):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    while not predicate():
+        if loop.time() - start > timeout_sec:
+            return False
+        await asyncio.sleep(interval_sec)
+    return True
+
+async def echo_once(port: int, index: int) -> bool:
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout=2.0)
+    try:
+        msg = f"HELLO-{index}".encode()
+        writer.write(msg)
+        await writer.drain()
+        return await asyncio.wait_for(reader.readexactly(len(msg)), timeout=5.0) == msg
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+def check_lazy_formatting() -> bool:
+    """꺼진 레벨의 로그는 인자를 문자열로 만들지 않고 카운터만 올린다."""
+    logger = logging.getLogger("TunnelLogTest")
+    logger.setLevel(logging.INFO)
+    events = TunnelLog(logger)
+    arg = FormatCounter()
+    before = event_counts()["first_data"]
+    for _ in range(1000):
+        events.sampled(TunnelEvent.FIRST_DATA, logging.DEBUG, "frame %s", arg)
+        events.event(TunnelEvent.FIRST_DATA, logging.DEBUG, "frame %s", arg)
+    counted = event_counts()["first_data"] - before
+    log(f">>> [TEST] disabled debug logs: formatted={arg.formatted}, counted={counted}")
+    return arg.formatted == 0 and counted == 2000
+
+async def main():
+    configure_log_sampling(SAMPLE_EVERY)
+    ok = check_lazy_formatting()
+
+    collector = RecordCollector()
+    listener_logger = logging.getLogger(f"PublicListener({TUNNEL_PORT})")
+    listener_logger.setLevel(logging.INFO)
+    listener_logger.addHandler(collector)
+
+    server_key = generate_identity_key()
+    client_key = generate_identity_key()
+    ALLOWED_CLIENT_KEYS.append(client_key.verify_key.encode())
+    service = await start_mock_local_service(SERVICE_PORT)
+    server = Server(SERVER_PORT, server_key)
+    server_task = asyncio.create_task(server.listen())
+    await asyncio.sleep(0.3)
+
+    client = ControlClient(
+        server_host='127.0.0.1',
+        server_port=SERVER_PORT,
+        identity_key=client_key,
+        server_key=server_key.verify_key.encode(),
+        mux_channels=0,
+    )
+    tunnel = TunnelConfig("web", TUNNEL_PORT, '127.0.0.1', SERVICE_PORT)
+    client.add_tunnel(tunnel)
+    try:
+        await client.connect()
+        await wait_until(lambda: tunnel.status == "Open", 5.0)
+        before = event_counts()
+        results = [await echo_once(TUNNEL_PORT, i) for i in range(CONNECTIONS)]
+        await asyncio.sleep(0.3)
+        after = client.get_event_counts()
+        delta = {name: after[name] - before[name] for name in after}
+        log(f">>> [TEST] {sum(results)}/{CONNECTIONS} echoes ok, event deltas={delta}")
+        ok = ok and all(results)
+        # 카운터는 샘플링과 관계없이 모든 연결을 센다.
+        for name in ("public_accepted", "pairing_prepared", "pairing_matched", "incoming_conn_sent",
+                     "incoming_conn_received", "data_channel_spawned", "local_connected"):
+            ok = ok and delta[name] == CONNECTIONS
+
+        # 출력은 각 이벤트의 첫 발생과 이후 SAMPLE_EVERY번째마다만 남는다.
+        accepted = [m for m in collector.messages if m.startswith("New public connection")]
+        expected = [n for n in range(before["public_accepted"] + 1, after["public_accepted"] + 1)
+                    if n == 1 or n % SAMPLE_EVERY == 0]
+        log(f">>> [TEST] accepted logs={len(accepted)} (expected {len(expected)}), sample={accepted[:1]}")
+        ok = ok and len(accepted) == len(expected) and all("sampled 1/5" in m for m in accepted)
+
+        metrics_text = server.metrics.render_prometheus()
+        exported = f'minitcptunnel_events_total{{event="public_accepted"}} {after["public_accepted"]}' in metrics_text
+        log(f">>> [TEST] events exported to /metrics={exported}")
+        ok = ok and exported and server.metrics.snapshot()["events"]["public_accepted"] == after["public_accepted"]
+    except Exception as e:
+        log(f">>> [TEST] error {e!r}")
+        ok = False
+    finally:
+        await client.disconnect()
+        server_task.cancel()
+        try:
+            await server_task
+        except asyncio.CancelledError:
+            pass
+        service.close()
+        listener_logger.removeHandler(collector)
+        ALLOWED_CLIENT_KEYS.remove(client_key.verify_key.encode())
+        configure_log_sampling(1)
+
+    if ok:
+        log(">>> [TEST] SUCCESS")
+    else:
+        log(">>> [TEST] FAIL")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    try:
+        if sys.platform == 'win32':
+             asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass